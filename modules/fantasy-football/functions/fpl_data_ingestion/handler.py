@@ -3,21 +3,102 @@ Fantasy Premier League API Data Ingestion Function
 Fetches data from FPL API and loads into CDF RAW tables
 """
 import os
-import time
 from datetime import datetime
 from typing import Any
 
-import requests
 from cognite.client import CogniteClient
 from cognite.client.data_classes import Row
 
+from fetch_engine import FetchEngine
+from http_transport import get_shared_transport
+from league_standings import iter_standings_pages
+from picks_codec import encode_picks
+from raw_writer import RawWriter
+
+
+def fetch_json(url: str) -> Any:
+    """GET a FPL API URL through the pooled, rate-limited transport and return the decoded JSON body"""
+    return get_shared_transport().get_json(url)
+
+
+# Per-gameweek player stats provided by event/{gw}/live/
+LIVE_STAT_FIELDS = (
+    "total_points", "minutes", "goals_scored", "assists", "clean_sheets", "goals_conceded",
+    "own_goals", "penalties_saved", "penalties_missed", "yellow_cards", "red_cards", "saves",
+    "bonus", "bps", "influence", "creativity", "threat", "ict_index"
+)
+
+# Fields only element-summary/{player_id}/ provides
+ELEMENT_SUMMARY_FIELDS = ("value", "transfers_in", "transfers_out", "selected")
+
+
+def build_player_gameweek_columns(live_data: dict[str, Any], gameweek: int) -> dict[int, dict[str, Any]]:
+    """
+    Build fpl_player_gameweek columns for every player from one event/{gw}/live/ response
+    
+    Players whose team had no fixture that gameweek (empty "explain") are skipped,
+    matching the rows element-summary history would produce.
+    
+    Args:
+        live_data: Response of event/{gw}/live/
+        gameweek: Gameweek number
+    
+    Returns:
+        Columns keyed by player ID
+    """
+    updated_at = datetime.now().isoformat()
+    columns_by_player = {}
+    for element in live_data.get("elements", []):
+        if not element.get("explain"):
+            continue
+        player_stats = element.get("stats", {})
+        columns = {"player_id": element["id"], "gameweek": gameweek}
+        columns.update({field: player_stats.get(field) for field in LIVE_STAT_FIELDS})
+        columns["updated_at"] = updated_at
+        columns_by_player[element["id"]] = columns
+    return columns_by_player
+
+
+def rank_element_summary_players(
+    league_players: dict[int, int],
+    watchlist: list[int],
+    limit: int | None = None
+) -> list[int]:
+    """
+    Players to fetch element-summary for, most relevant first
+    
+    Watchlisted players come first, then the players in league squads by the
+    latest gameweek they were picked in, newest first, so the recent gameweeks
+    the dashboards show are covered first when limit cuts the list short.
+    
+    Args:
+        league_players: Player ID -> latest gameweek any league manager picked them
+        watchlist: Player IDs to always include
+        limit: Maximum number of players (no limit if None)
+    
+    Returns:
+        Player IDs in fetch order
+    """
+    ranked = list(dict.fromkeys(int(player_id) for player_id in watchlist))
+    watched = set(ranked)
+    ranked.extend(
+        player_id for player_id, _ in sorted(league_players.items(), key=lambda item: (-item[1], item[0]))
+        if player_id not in watched
+    )
+    return ranked if limit is None else ranked[:limit]
+
 
 def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
     """
     Main handler function for FPL data ingestion
     
     Args:
-        data: Input data containing configuration
+        data: Input data containing configuration (league_id, max_workers /
+              requests_per_second to tune the concurrent FPL fetches,
+              include_element_summary to add the fields only element-summary provides,
+              element_summary_scope ("all" players, or "league" for the players
+              in league squads plus watchlist player IDs), element_summary_limit,
+              and raw_batch_size / write_workers to tune the buffered RAW inserts)
         client: CogniteClient instance
     
     Returns:
@@ -30,8 +111,34 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
     ENTRY_URL_TEMPLATE = "https://fantasy.premierleague.com/api/entry/{entry_id}/"
     ENTRY_HISTORY_TEMPLATE = "https://fantasy.premierleague.com/api/entry/{entry_id}/history/"
     PICKS_URL_TEMPLATE = "https://fantasy.premierleague.com/api/entry/{entry_id}/event/{event_id}/picks/"
+    PLAYER_SUMMARY_TEMPLATE = "https://fantasy.premierleague.com/api/element-summary/{player_id}/"
+    LIVE_URL_TEMPLATE = "https://fantasy.premierleague.com/api/event/{event_id}/live/"
+    
+    def fetch_live(gw):
+        return fetch_json(LIVE_URL_TEMPLATE.format(event_id=gw))
+    
+    def fetch_player_summary(player_id):
+        return fetch_json(PLAYER_SUMMARY_TEMPLATE.format(player_id=player_id))
+    
+    def fetch_entry(entry_id):
+        return fetch_json(ENTRY_URL_TEMPLATE.format(entry_id=entry_id))
+    
+    def fetch_picks(entry_id, gw):
+        return fetch_json(PICKS_URL_TEMPLATE.format(entry_id=entry_id, event_id=gw))
+    
+    def write_player_gameweeks(player_gameweeks):
+        player_stats_rows = [
+            Row(key=f"player_{player_id}_gw_{gw}", columns=columns)
+            for (player_id, gw), columns in player_gameweeks.items()
+        ]
+        
+        if player_stats_rows:
+            raw_writer.insert("fpl_player_gameweek", player_stats_rows)
+            stats["player_stats"] = len(player_stats_rows)
+            print(f"Loaded {len(player_stats_rows)} player gameweek stats")
     
     db_name = "fantasy_football"
+    include_element_summary = data.get("include_element_summary", False)
     stats = {
         "teams": 0,
         "players": 0,
@@ -39,15 +146,28 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
         "player_stats": 0,
         "leagues": 0,
         "managers": 0,
-        "picks": 0
+        "picks": 0,
+        "element_summary": {},
+        "fetch_engine": {},
+        "rate_limiter": {},
+        "raw_writer": {}
     }
     
+    engine = FetchEngine(
+        max_workers=data.get("max_workers", 8),
+        requests_per_second=data.get("requests_per_second")
+    )
+    # Rows are buffered per table and inserted in large batches while fetching goes on
+    raw_writer = RawWriter(
+        client, db_name,
+        batch_size=data.get("raw_batch_size", 2000),
+        max_workers=data.get("write_workers", 4)
+    )
+    
     try:
         # 1. Fetch bootstrap-static data (players, teams, events/gameweeks)
         print("Fetching bootstrap-static data...")
-        response = requests.get(BOOTSTRAP_URL)
-        response.raise_for_status()
-        bootstrap_data = response.json()
+        bootstrap_data = fetch_json(BOOTSTRAP_URL)
         
         # Process teams
         team_rows = []
@@ -65,7 +185,7 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
             ))
         
         if team_rows:
-            client.raw.rows.insert(db_name, "fpl_bootstrap_static", team_rows)
+            raw_writer.insert("fpl_bootstrap_static", team_rows)
             stats["teams"] = len(team_rows)
             print(f"Loaded {len(team_rows)} teams")
         
@@ -92,11 +212,7 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
             ))
         
         if player_rows:
-            # Insert in batches of 1000
-            batch_size = 1000
-            for i in range(0, len(player_rows), batch_size):
-                batch = player_rows[i:i + batch_size]
-                client.raw.rows.insert(db_name, "fpl_bootstrap_static", batch)
+            raw_writer.insert("fpl_bootstrap_static", player_rows)
             stats["players"] = len(player_rows)
             print(f"Loaded {len(player_rows)} players")
         
@@ -119,85 +235,41 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
             ))
         
         if event_rows:
-            client.raw.rows.insert(db_name, "fpl_bootstrap_static", event_rows)
+            raw_writer.insert("fpl_bootstrap_static", event_rows)
             stats["gameweeks"] = len(event_rows)
             print(f"Loaded {len(event_rows)} gameweeks")
         
-        # 2. Fetch detailed player gameweek stats
+        # 2. Fetch player gameweek stats: one event/{gw}/live/ request per gameweek
         print("Fetching player gameweek stats...")
         current_event = next((e for e in bootstrap_data.get("events", []) if e.get("is_current")), None)
+        player_gameweeks = {}
+        # Player ID -> latest gameweek a league manager picked them
+        league_players = {}
         if current_event:
             current_gw = current_event["id"]
-            player_stats_rows = []
             
-            for player in bootstrap_data.get("elements", []):
-                player_id = player["id"]
-                # Fetch player's detailed history
-                try:
-                    player_url = f"https://fantasy.premierleague.com/api/element-summary/{player_id}/"
-                    player_response = requests.get(player_url)
-                    player_response.raise_for_status()
-                    player_data = player_response.json()
-                    
-                    for history in player_data.get("history", []):
-                        player_stats_rows.append(Row(
-                            key=f"player_{player_id}_gw_{history['round']}",
-                            columns={
-                                "player_id": player_id,
-                                "gameweek": history["round"],
-                                "total_points": history["total_points"],
-                                "minutes": history["minutes"],
-                                "goals_scored": history["goals_scored"],
-                                "assists": history["assists"],
-                                "clean_sheets": history["clean_sheets"],
-                                "goals_conceded": history["goals_conceded"],
-                                "own_goals": history["own_goals"],
-                                "penalties_saved": history["penalties_saved"],
-                                "penalties_missed": history["penalties_missed"],
-                                "yellow_cards": history["yellow_cards"],
-                                "red_cards": history["red_cards"],
-                                "saves": history["saves"],
-                                "bonus": history["bonus"],
-                                "bps": history["bps"],
-                                "influence": history["influence"],
-                                "creativity": history["creativity"],
-                                "threat": history["threat"],
-                                "ict_index": history["ict_index"],
-                                "value": history["value"],
-                                "transfers_in": history["transfers_in"],
-                                "transfers_out": history["transfers_out"],
-                                "selected": history["selected"],
-                                "updated_at": datetime.now().isoformat()
-                            }
-                        ))
-                    
-                    # Rate limiting
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"Error fetching stats for player {player_id}: {e}")
+            gameweek_jobs = [(gw,) for gw in range(1, current_gw + 1)]
+            for (gw,), live_data, error in engine.map(fetch_live, gameweek_jobs):
+                if error is not None:
+                    print(f"Error fetching live stats for GW {gw}: {error}")
                     continue
+                
+                for player_id, columns in build_player_gameweek_columns(live_data, gw).items():
+                    player_gameweeks[(player_id, gw)] = columns
             
-            if player_stats_rows:
-                # Insert in batches
-                batch_size = 1000
-                for i in range(0, len(player_stats_rows), batch_size):
-                    batch = player_stats_rows[i:i + batch_size]
-                    client.raw.rows.insert(db_name, "fpl_player_gameweek", batch)
-                stats["player_stats"] = len(player_stats_rows)
-                print(f"Loaded {len(player_stats_rows)} player gameweek stats")
+            # With element-summary extras the rows are completed and written after the league picks
+            if not include_element_summary:
+                write_player_gameweeks(player_gameweeks)
         
         # 3. Fetch league data if league_id is provided
         league_id = data.get("league_id") or os.getenv("FPL_LEAGUE_ID")
         if league_id:
             print(f"Fetching league data for league {league_id}...")
             league_url = LEAGUE_URL_TEMPLATE.format(league_id=league_id)
-            league_response = requests.get(league_url)
-            league_response.raise_for_status()
-            league_data = league_response.json()
+            pages = list(iter_standings_pages(lambda page: fetch_json(f"{league_url}?page_standings={page}")))
             
             # Process league info
-            league_info = league_data.get("league", {})
+            league_info = pages[0].get("league", {})
             league_row = Row(
                 key=f"league_{league_id}",
                 columns={
@@ -207,18 +279,14 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
                     "updated_at": datetime.now().isoformat()
                 }
             )
-            client.raw.rows.insert(db_name, "fpl_leagues", [league_row])
+            raw_writer.add("fpl_leagues", league_row)
             stats["leagues"] = 1
             
-            # Process manager teams and their picks
-            for standing in league_data.get("standings", {}).get("results", []):
-                entry_id = standing["entry"]
-                
-                # Fetch manager entry details
-                entry_url = ENTRY_URL_TEMPLATE.format(entry_id=entry_id)
-                entry_response = requests.get(entry_url)
-                entry_response.raise_for_status()
-                entry_data = entry_response.json()
+            # Process manager teams
+            entry_ids = [standing["entry"] for page in pages for standing in page.get("standings", {}).get("results", [])]
+            for (entry_id,), entry_data, error in engine.map(fetch_entry, [(entry_id,) for entry_id in entry_ids]):
+                if error is not None:
+                    raise error
                 
                 # Store manager info
                 manager_row = Row(
@@ -233,46 +301,81 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
                         "updated_at": datetime.now().isoformat()
                     }
                 )
-                client.raw.rows.insert(db_name, "fpl_manager_picks", [manager_row])
+                raw_writer.add("fpl_manager_picks", manager_row)
                 stats["managers"] += 1
+            
+            # Fetch picks for each manager and completed gameweek
+            if current_event:
+                picks_jobs = [(entry_id, gw) for entry_id in entry_ids for gw in range(1, current_gw + 1)]
+                for (entry_id, gw), picks_data, error in engine.map(fetch_picks, picks_jobs):
+                    if error is not None:
+                        print(f"Error fetching picks for manager {entry_id} GW {gw}: {error}")
+                        continue
+                    
+                    entry_history = picks_data.get("entry_history", {})
+                    picks_row = Row(
+                        key=f"manager_{entry_id}_gw_{gw}",
+                        columns={
+                            "entry_id": entry_id,
+                            "gameweek": gw,
+                            "points": entry_history.get("points"),
+                            "total_points": entry_history.get("total_points"),
+                            "rank": entry_history.get("rank"),
+                            "transfers": entry_history.get("event_transfers"),
+                            "transfer_cost": entry_history.get("event_transfers_cost"),
+                            "bank": entry_history.get("bank"),
+                            "team_value": entry_history.get("value"),
+                            "active_chip": picks_data.get("active_chip"),
+                            "picks": encode_picks(picks_data.get("picks", [])),
+                            "updated_at": datetime.now().isoformat()
+                        }
+                    )
+                    raw_writer.add("fpl_manager_picks", picks_row)
+                    stats["picks"] += 1
+                    
+                    for pick in picks_data.get("picks", []):
+                        league_players[pick["element"]] = max(gw, league_players.get(pick["element"], 0))
+        
+        # 4. Optional extra: value, transfers and ownership are only in element-summary
+        if include_element_summary and player_gameweeks:
+            all_players = [player["id"] for player in bootstrap_data.get("elements", [])]
+            scope = data.get("element_summary_scope", "all")
+            if scope == "league":
+                summary_players = rank_element_summary_players(
+                    league_players, data.get("watchlist", []), data.get("element_summary_limit")
+                )
+            else:
+                summary_players = all_players[:data.get("element_summary_limit")]
+            
+            calls_avoided = max(len(all_players) - len(summary_players), 0)
+            print(
+                f"Fetching element-summary extras for {len(summary_players)} players "
+                f"(scope: {scope}, {calls_avoided} calls avoided)..."
+            )
+            summaries_loaded = 0
+            for (player_id,), player_data, error in engine.map(fetch_player_summary, [(p,) for p in summary_players]):
+                if error is not None:
+                    print(f"Error fetching stats for player {player_id}: {error}")
+                    continue
                 
-                # Fetch picks for each completed gameweek
-                if current_event:
-                    for gw in range(1, current_gw + 1):
-                        try:
-                            picks_url = PICKS_URL_TEMPLATE.format(entry_id=entry_id, event_id=gw)
-                            picks_response = requests.get(picks_url)
-                            picks_response.raise_for_status()
-                            picks_data = picks_response.json()
-                            
-                            entry_history = picks_data.get("entry_history", {})
-                            picks_row = Row(
-                                key=f"manager_{entry_id}_gw_{gw}",
-                                columns={
-                                    "entry_id": entry_id,
-                                    "gameweek": gw,
-                                    "points": entry_history.get("points"),
-                                    "total_points": entry_history.get("total_points"),
-                                    "rank": entry_history.get("rank"),
-                                    "transfers": entry_history.get("event_transfers"),
-                                    "transfer_cost": entry_history.get("event_transfers_cost"),
-                                    "bank": entry_history.get("bank"),
-                                    "team_value": entry_history.get("value"),
-                                    "active_chip": picks_data.get("active_chip"),
-                                    "picks_json": str(picks_data.get("picks", [])),
-                                    "updated_at": datetime.now().isoformat()
-                                }
-                            )
-                            client.raw.rows.insert(db_name, "fpl_manager_picks", [picks_row])
-                            stats["picks"] += 1
-                            
-                            time.sleep(0.5)  # Rate limiting
-                            
-                        except Exception as e:
-                            print(f"Error fetching picks for manager {entry_id} GW {gw}: {e}")
-                            continue
-                
-                time.sleep(0.5)  # Rate limiting
+                summaries_loaded += 1
+                for history in player_data.get("history", []):
+                    columns = player_gameweeks.get((player_id, history["round"]))
+                    if columns is not None:
+                        columns.update({field: history.get(field) for field in ELEMENT_SUMMARY_FIELDS})
+            
+            stats["element_summary"] = {
+                "scope": scope,
+                "players": len(summary_players),
+                "loaded": summaries_loaded,
+                "calls_avoided": calls_avoided
+            }
+            write_player_gameweeks(player_gameweeks)
+        
+        raw_writer.flush()
+        stats["fetch_engine"] = engine.stats()
+        stats["rate_limiter"] = engine.limiter.stats()
+        stats["raw_writer"] = raw_writer.stats()
         
         return {
             "status": "success",
@@ -282,10 +385,22 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
         }
         
     except Exception as e:
+        # Rows buffered before the failure are still written
+        try:
+            raw_writer.flush()
+        except Exception as flush_error:
+            print(f"Error in final RAW flush: {flush_error}")
+        stats["fetch_engine"] = engine.stats()
+        stats["rate_limiter"] = engine.limiter.stats()
+        stats["raw_writer"] = raw_writer.stats()
         return {
             "status": "error",
             "message": str(e),
             "stats": stats,
             "timestamp": datetime.now().isoformat()
         }
+    
+    finally:
+        raw_writer.close()
+        engine.close()
 
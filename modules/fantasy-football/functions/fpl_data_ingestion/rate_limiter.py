@@ -0,0 +1,205 @@
+"""
+Adaptive Rate Limiter
+Token-bucket limiter shared by all FPL API calls in a process
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+
+# Default ceiling for the request rate (requests per second)
+DEFAULT_MAX_RATE = 10.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse a Retry-After header value
+
+    Args:
+        value: Header value, either delay seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate adapts to how the API responds
+
+    Healthy responses raise the rate step by step up to max_rate. HTTP 429/503
+    responses halve it (down to min_rate) and pause every caller until the
+    Retry-After delay, or an exponential backoff, has passed.
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(
+        self,
+        rate: float = 4.0,
+        min_rate: float = 0.5,
+        max_rate: float = DEFAULT_MAX_RATE,
+        burst: int = 4,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_retries: int = 4
+    ):
+        """
+        Initialize limiter
+
+        Args:
+            rate: Starting request rate (requests per second)
+            min_rate: Lowest rate the limiter backs off to
+            max_rate: Highest rate the limiter speeds up to
+            burst: Bucket capacity (requests that may start back to back)
+            increase_step: Rate added after each healthy response
+            decrease_factor: Rate multiplier applied on a throttled response
+            base_backoff: Pause after the first throttled response without Retry-After (seconds)
+            max_backoff: Upper bound for any pause (seconds)
+            max_retries: Retries of a throttled request before giving up
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate = min(max(rate, min_rate), max_rate)
+        self.burst = max(1, burst)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._cooldown_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.retries = 0
+        self.throttle_events = 0
+        self.throttled_seconds = 0.0
+
+    def configure(self, rate: float | None = None, max_rate: float | None = None) -> None:
+        """
+        Adjust the rate limits of a running limiter
+
+        Args:
+            rate: New current rate (requests per second)
+            max_rate: New ceiling for the rate
+        """
+        with self._lock:
+            if max_rate is not None:
+                self.max_rate = max(max_rate, self.min_rate)
+            if rate is not None:
+                self.rate = rate
+            self.rate = min(max(self.rate, self.min_rate), self.max_rate)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._cooldown_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.requests += 1
+                        self.throttled_seconds += now - started
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        """Record a healthy response and speed up"""
+        with self._lock:
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        """
+        Record a throttled response, slow down and pause all callers
+
+        Args:
+            retry_after: Delay requested by the server (seconds)
+        """
+        with self._lock:
+            self.throttle_events += 1
+            self._consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            if retry_after is None:
+                retry_after = self.base_backoff * 2 ** (self._consecutive_throttles - 1)
+            pause = min(retry_after, self.max_backoff)
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + pause)
+            self._tokens = 0.0
+
+    def execute(self, send: Callable[[], Any]) -> Any:
+        """
+        Send a request under the limiter, retrying throttled responses
+
+        Args:
+            send: Callable performing the request and returning a response
+                  with status_code and headers
+
+        Returns:
+            The first non-throttled response, or the last one once retries are exhausted
+        """
+        attempt = 0
+        while True:
+            self.acquire()
+            response = send()
+            if response.status_code not in self.THROTTLE_STATUSES:
+                self.on_success()
+                return response
+
+            self.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+            if attempt >= self.max_retries:
+                return response
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Throttling statistics, for tuning"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "throttle_events": self.throttle_events,
+                "throttled_seconds": round(self.throttled_seconds, 2),
+                "current_rate": round(self.rate, 2)
+            }
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_limiter() -> AdaptiveRateLimiter:
+    """Return the process-wide limiter used by all FPL API calls"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = AdaptiveRateLimiter()
+        return _shared_limiter
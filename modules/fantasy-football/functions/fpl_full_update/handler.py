@@ -2,16 +2,34 @@
 Comprehensive Fantasy Premier League Data Update Function
 Loads all FPL data (teams, players, managers, performance, transfers, betting, fixtures, odds) to CDF data model instances
 """
+import math
 import os
 import time
 from datetime import datetime
 from collections import defaultdict
 from typing import Any
 
-import requests
 import numpy as np
 from cognite.client import CogniteClient
 from cognite.client.data_classes.data_modeling import NodeApply, NodeOrEdgeData
+from cognite.client.exceptions import CogniteAPIError
+
+from cdf_writer import InstanceWriter
+from fetch_engine import FetchEngine
+from live_scoring import LiveLeagueScorer
+from manager_analytics import LeagueHistory
+from node_hashes import NodeHashStore
+from picks_tensor import PicksTensor, id_lookup
+from rate_limiter import DEFAULT_MAX_RATE
+from stage_metrics import StageMetrics
+from transfer_evaluation import PointsMatrix, evaluate_transfers
+from node_sink import MAX_APPLY_ITEMS, NodeSink
+from http_transport import get_shared_transport
+from league_standings import ShardPlanStore, league_entries, split_shards
+from watermarks import WatermarkStore, next_watermark
+
+# Player position per bootstrap-static element_type
+POSITION_MAP = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
 
 # Try to import OddsFetcher - if not available, will skip odds enrichment
 try:
@@ -27,11 +45,16 @@ class FPLClient:
     
     BASE_URL = "https://fantasy.premierleague.com/api"
     
+    def __init__(self, transport=None):
+        self.transport = transport or get_shared_transport()
+    
+    def _get(self, endpoint):
+        """GET an endpoint through the pooled, rate-limited transport"""
+        return self.transport.get_json(f"{self.BASE_URL}/{endpoint}")
+    
     def get_bootstrap_static(self):
         """Fetch bootstrap-static data (teams, players, gameweeks)"""
-        response = requests.get(f"{self.BASE_URL}/bootstrap-static/")
-        response.raise_for_status()
-        return response.json()
+        return self._get("bootstrap-static/")
     
     def get_current_gameweek(self):
         """Get the current gameweek number"""
@@ -39,86 +62,457 @@ class FPLClient:
         current = next((e for e in data['events'] if e.get('is_current')), None)
         return current['id'] if current else 1
     
-    def get_league_standings(self, league_id):
-        """Fetch league standings"""
-        response = requests.get(f"{self.BASE_URL}/leagues-classic/{league_id}/standings/")
-        response.raise_for_status()
-        return response.json()
+    def get_league_standings(self, league_id, page=1):
+        """Fetch one page (50 managers) of league standings"""
+        endpoint = f"leagues-classic/{league_id}/standings/"
+        if page > 1:
+            endpoint += f"?page_standings={page}"
+        return self._get(endpoint)
+    
+    def get_all_league_standings(self, league_id):
+        """Fetch the standings of every manager in a league, following all pages"""
+        return league_entries(lambda page: self.get_league_standings(league_id, page))
     
     def get_entry_history(self, entry_id):
         """Fetch manager's history"""
-        response = requests.get(f"{self.BASE_URL}/entry/{entry_id}/history/")
-        response.raise_for_status()
-        return response.json()
+        return self._get(f"entry/{entry_id}/history/")
+    
+    def get_entry_transfers(self, entry_id):
+        """Fetch every transfer a manager made this season"""
+        return self._get(f"entry/{entry_id}/transfers/")
     
     def get_entry_picks(self, entry_id, gameweek):
         """Fetch manager's picks for a gameweek"""
-        response = requests.get(f"{self.BASE_URL}/entry/{entry_id}/event/{gameweek}/picks/")
-        response.raise_for_status()
-        return response.json()
+        return self._get(f"entry/{entry_id}/event/{gameweek}/picks/")
     
     def get_fixtures(self):
         """Fetch all fixtures"""
-        response = requests.get(f"{self.BASE_URL}/fixtures/")
-        response.raise_for_status()
-        return response.json()
+        return self._get("fixtures/")
+    
+    def get_event_live(self, gameweek):
+        """Fetch live stats for every player in a gameweek"""
+        return self._get(f"event/{gameweek}/live/")
 
 
-def handle(data: dict[str, Any], client: CogniteClient, secrets: dict[str, str]) -> dict[str, Any]:
+class PicksStore:
     """
-    Main handler for comprehensive FPL data update
+    Run-scoped store of manager picks, keyed by (entry_id, gameweek)
+
+    Each pair is fetched from the FPL API at most once per run. Every stage that
+    needs picks (selections, formations, live scoring, ...) reads from the store.
+    Failed fetches are remembered too, so a broken pair is not retried by later stages.
+    Managers are released once all stages are done with them, so the store only
+    holds the picks still in use.
+    """
+
+    def __init__(self, fpl_client, engine):
+        self.fpl_client = fpl_client
+        self.engine = engine
+        self._picks = {}
+        self._errors = {}
+        self.hits = 0
+        self.misses = 0
+        self.peak_stored = 0
+
+    def _store(self, key, picks_data):
+        self._picks[key] = picks_data
+        self.peak_stored = max(self.peak_stored, len(self._picks))
+
+    def get(self, entry_id, gameweek):
+        """Return picks for a manager/gameweek, fetching from the API on first access"""
+        key = (entry_id, gameweek)
+        if key in self._picks:
+            self.hits += 1
+            return self._picks[key]
+        if key in self._errors:
+            self.hits += 1
+            raise self._errors[key]
+
+        self.misses += 1
+        try:
+            picks_data = self.engine.call(self.fpl_client.get_entry_picks, entry_id, gameweek)
+        except Exception as e:
+            self._errors[key] = e
+            raise
+
+        self._store(key, picks_data)
+        return picks_data
+
+    def fetch_all(self, keys):
+        """
+        Fill the store for many (entry_id, gameweek) pairs concurrently
+
+        Yields:
+            (key, picks_data, error) as each pair becomes available; stored pairs come first
+        """
+        missing = []
+        for key in keys:
+            if key in self._picks:
+                self.hits += 1
+                yield key, self._picks[key], None
+            elif key in self._errors:
+                self.hits += 1
+                yield key, None, self._errors[key]
+            else:
+                missing.append(key)
+
+        self.misses += len(missing)
+        for key, picks_data, error in self.engine.map(self.fpl_client.get_entry_picks, missing):
+            if error is not None:
+                self._errors[key] = error
+            else:
+                self._store(key, picks_data)
+            yield key, picks_data, error
+
+    def held(self, entry_id):
+        """A manager's stored picks, keyed by (entry_id, gameweek)"""
+        return {key: picks_data for key, picks_data in self._picks.items() if key[0] == entry_id}
+
+    def release(self, entry_id):
+        """Drop a manager's stored picks (failed pairs are still remembered)"""
+        for key in [key for key in self._picks if key[0] == entry_id]:
+            del self._picks[key]
+
+    def failed(self):
+        """(entry_id, gameweek) pairs whose fetch failed"""
+        return set(self._errors)
+
+    def stats(self):
+        """Hit/miss counts for the run"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": len(self._picks),
+            "peak_stored": self.peak_stored,
+            "failed": len(self._errors)
+        }
+
+
+def build_manager_team_nodes(entry_id, held, element_types, space, version):
+    """
+    Build the ManagerTeam nodes of all a manager's gameweeks at once
+    
+    Captains, formations and squad changes are read from one picks tensor of
+    the gameweeks. Bench boost weeks get no formation, since all 15 players
+    score, and the first held gameweek gets no squad changes.
     
     Args:
-        data: Input data (optional league_id override)
-        client: CogniteClient instance
-        secrets: Dictionary of secret values (e.g., API keys)
+        entry_id: Manager entry ID
+        held: Picks responses keyed by (entry_id, gameweek)
+        element_types: id_lookup() of player ID -> element_type
+        space: Data model space
+        version: View version
     
     Returns:
-        Dictionary with status and statistics
+        List of ManagerTeam NodeApply objects
     """
+    if not held:
+        return []
     
-    SPACE = "fantasy_football"
-    VERSION = "1"
-    LEAGUE_ID = data.get("league_id") or os.getenv("FPL_LEAGUE_ID", "1097811")
+    tensor = PicksTensor.from_api(held)
+    captains = tensor.captains()[0]
+    vice_captains = tensor.vice_captains()[0]
+    formations = tensor.formations(element_types)[0]
+    squad_changes = tensor.squad_changes()[1][0]
     
-    stats = {
-        "teams": 0,
-        "fixtures": 0,
-        "fixtures_with_odds": 0,
-        "gameweeks": 0,
-        "players": 0,
-        "managers": 0,
-        "performance_records": 0,
-        "manager_teams": 0,
-        "player_selections": 0,
-        "transfers": 0,
-        "team_betting_records": 0,
-        "formations_calculated": 0,
-        "errors": []
-    }
+    team_nodes = []
+    for g, gw in enumerate(tensor.gameweeks):
+        picks_data = held[(entry_id, gw)]
+        entry_history = picks_data.get('entry_history', {})
+        active_chip = picks_data.get('active_chip')
+        captain_id = int(captains[g])
+        vice_captain_id = int(vice_captains[g])
+        
+        manager_team_props = {
+            "manager": {"space": space, "externalId": f"manager_{entry_id}"},
+            "gameweek": {"space": space, "externalId": f"gameweek_{gw}"},
+            "captain": {"space": space, "externalId": f"player_{captain_id}"} if captain_id else None,
+            "viceCaptain": {"space": space, "externalId": f"player_{vice_captain_id}"} if vice_captain_id else None,
+            "totalPoints": entry_history.get('points'),
+            "teamValue": entry_history.get('value', 0) / 10.0 if entry_history.get('value') else None,
+            "bank": entry_history.get('bank', 0) / 10.0 if entry_history.get('bank') else None,
+            "activeChip": active_chip
+        }
+        if active_chip != 'bboost':
+            manager_team_props["formation"] = formations[g]
+        if g > 0:
+            manager_team_props["squadChanges"] = int(squad_changes[g])
+        
+        team_nodes.append(NodeApply(
+            space=space,
+            external_id=f"managerteam_{entry_id}_gw{gw}",
+            sources=[
+                NodeOrEdgeData(
+                    source={"space": space, "externalId": "ManagerTeam", "version": version, "type": "view"},
+                    properties=manager_team_props
+                )
+            ]
+        ))
     
+    return team_nodes
+
+
+def load_points_matrix(ctx, finished_gws):
+    """
+    Points of every player in every finished gameweek
+    
+    Read from the fpl_player_gameweek RAW table kept by fpl_data_ingestion;
+    finished gameweeks missing there are fetched from event/{gw}/live/.
+    """
+    bootstrap = ctx.bootstrap()
+    matrix = PointsMatrix(
+        max((p['id'] for p in bootstrap['elements']), default=0),
+        max((e['id'] for e in bootstrap['events']), default=38)
+    )
     try:
-        print(f"Starting FPL data update for league {LEAGUE_ID}")
-        fpl_client = FPLClient()
+        rows = ctx.client.raw.rows.list(
+            "fantasy_football", "fpl_player_gameweek", limit=None, columns=["player_id", "gameweek", "total_points"]
+        )
+    except CogniteAPIError as e:
+        if e.code != 404:
+            raise
+        rows = []
+    for row in rows:
+        columns = row.columns or {}
+        if columns.get("player_id") is None or columns.get("gameweek") is None:
+            continue
+        if int(columns["gameweek"]) in finished_gws:
+            matrix.add(int(columns["player_id"]), int(columns["gameweek"]), int(columns.get("total_points") or 0))
+    
+    missing = sorted(finished_gws - matrix.gameweeks)
+    for (gw,), live_data, error in ctx.engine.map(ctx.fpl_client.get_event_live, [(gw,) for gw in missing]):
+        if error is not None:
+            raise error
+        matrix.add_live(gw, live_data)
+    print(f"  Points matrix: {len(matrix.gameweeks)} gameweeks ({len(missing)} fetched live)")
+    return matrix
+
+
+def build_transfer_nodes(transfers, evaluation, space, version):
+    """
+    Build Transfer nodes with the points they gained
+    
+    Args:
+        transfers: Transfer rows (entry_id, gameweek, player_in, player_out,
+                   player_in_cost, player_out_cost, points hit per transfer)
+        evaluation: evaluate_transfers() result for the rows
+        space: Data model space
+        version: View version
+    
+    Returns:
+        List of Transfer NodeApply objects
+    """
+    transfer_nodes = {}
+    for i, (entry_id, gw, player_in_id, player_out_id, in_cost, out_cost, cost_per_transfer) in enumerate(transfers):
+        properties = {
+            "manager": {"space": space, "externalId": f"manager_{entry_id}"},
+            "gameweek": {"space": space, "externalId": f"gameweek_{gw}"},
+            "playerIn": {"space": space, "externalId": f"player_{player_in_id}"},
+            "playerOut": {"space": space, "externalId": f"player_{player_out_id}"},
+            "transferCost": int(cost_per_transfer),
+            "playerInPrice": in_cost / 10.0,
+            "playerOutPrice": out_cost / 10.0,
+            "evaluationComplete": bool(evaluation["complete"][i])
+        }
+        # Points are only known once the transfer gameweek is finished
+        if evaluation["started"][i]:
+            net_benefit = int(evaluation["next3"][i]) - cost_per_transfer
+            properties.update({
+                "pointsGainedNext1GW": int(evaluation["next1"][i]),
+                "pointsGainedNext3GW": int(evaluation["next3"][i]),
+                "pointsGainedNext5GW": int(evaluation["next5"][i]),
+                "evaluatedThroughGameweek": int(evaluation["evaluated_through"][i]),
+                "wasSuccessful": net_benefit > 0,
+                "netBenefit": int(round(net_benefit))
+            })
         
-        # =====================================================================
-        # STEP 1: Fetch bootstrap data
-        # =====================================================================
-        print("Fetching bootstrap data...")
-        bootstrap = fpl_client.get_bootstrap_static()
-        teams = bootstrap['teams']
-        events = bootstrap['events']
-        players = bootstrap['elements']
-        current_gw = fpl_client.get_current_gameweek()
+        external_id = f"transfer_{entry_id}_gw{gw}_{player_out_id}to{player_in_id}"
+        transfer_nodes[external_id] = NodeApply(
+            space=space,
+            external_id=external_id,
+            sources=[
+                NodeOrEdgeData(
+                    source={"space": space, "externalId": "Transfer", "version": version, "type": "view"},
+                    properties=properties
+                )
+            ]
+        )
+    
+    return list(transfer_nodes.values())
+
+
+def run_live_scoring(writer, fpl_client, picks_store, league_id, space, version, poll_interval=60, duration=840):
+    """
+    Poll live gameweek data and push changed live scores for every league manager
+    
+    Picks for the current gameweek are fetched once and reused for every poll.
+    Only nodes whose live values changed since the last push are written. Live
+    values go to their own live* properties, so the points, totals and ranks
+    written by the regular updates (and their content hashes) stay valid.
+    
+    Args:
+        writer: Instance writer for the live node updates
+        fpl_client: FPL API client
+        picks_store: Run-scoped picks store
+        league_id: FPL classic league ID
+        space: Data model space
+        version: View version
+        poll_interval: Seconds between polls of event/{gw}/live/
+        duration: Seconds to keep polling
+    
+    Returns:
+        Dictionary with poll statistics and the latest live standings
+    """
+    bootstrap = fpl_client.get_bootstrap_static()
+    current = next((e for e in bootstrap['events'] if e.get('is_current')), None)
+    if current is None:
+        return {"polls": 0, "message": "No gameweek in progress"}
+    gw = current['id']
+    
+    standings = fpl_client.get_all_league_standings(league_id)
+    picks_by_entry = {}
+    for (entry_id, _), picks_data, error in picks_store.fetch_all([(s['entry'], gw) for s in standings]):
+        if error is None:
+            picks_by_entry[entry_id] = picks_data
+    scorer = LiveLeagueScorer(picks_by_entry)
+    print(f"Live scoring GW{gw} for {len(scorer.entry_ids)} managers (every {poll_interval}s for {duration}s)")
+    
+    def node(external_id, view, properties):
+        return NodeApply(
+            space=space,
+            external_id=external_id,
+            sources=[
+                NodeOrEdgeData(
+                    source={"space": space, "externalId": view, "version": version, "type": "view"},
+                    properties=properties
+                )
+            ]
+        )
+    
+    live_stats = {"gameweek": gw, "polls": 0, "nodes_written": 0, "compute_ms": [], "standings": []}
+    pushed = {}
+    stop_at = time.monotonic() + duration
+    
+    while True:
+        live_data = fpl_client.get_event_live(gw)
         
-        print(f"  Teams: {len(teams)}, Gameweeks: {len(events)}, Players: {len(players)}, Current GW: {current_gw}")
+        started = time.perf_counter()
+        scores = scorer.score(live_data)
+        live_stats["compute_ms"].append(round((time.perf_counter() - started) * 1000, 3))
         
+        # Only push values that changed since the previous poll
+        changed = []
+        for i, entry_id in enumerate(scorer.entry_ids):
+            live_points = int(scores["live_points"][i])
+            projected_total = int(scores["projected_total"][i])
+            # Live properties only: the values of the regular updates stay untouched
+            updates = {
+                f"performance_{entry_id}_gw{gw}": ("ManagerGameweekPerformance", {"livePoints": live_points, "liveTotalPoints": projected_total}),
+                f"managerteam_{entry_id}_gw{gw}": ("ManagerTeam", {"livePoints": live_points}),
+                f"manager_{entry_id}": ("Manager", {"liveTotalPoints": projected_total, "liveLeagueRank": int(scores["projected_rank"][i])})
+            }
+            for external_id, (view, properties) in updates.items():
+                if pushed.get(external_id) != properties:
+                    changed.append(node(external_id, view, properties))
+                    pushed[external_id] = properties
+        
+        if changed:
+            writer.apply(changed)
+        live_stats["polls"] += 1
+        live_stats["nodes_written"] += len(changed)
+        print(f"  Poll {live_stats['polls']}: {len(changed)} changed nodes, scored in {live_stats['compute_ms'][-1]} ms")
+        
+        if time.monotonic() + poll_interval >= stop_at:
+            break
+        time.sleep(poll_interval)
+    
+    live_stats["standings"] = sorted(
+        (
+            {
+                "entry_id": entry_id,
+                "live_points": int(scores["live_points"][i]),
+                "captain_points": int(scores["captain_points"][i]),
+                "projected_total": int(scores["projected_total"][i]),
+                "projected_rank": int(scores["projected_rank"][i])
+            }
+            for i, entry_id in enumerate(scorer.entry_ids)
+        ),
+        key=lambda row: row["projected_rank"]
+    )
+    return live_stats
+
+
+class StageContext:
+    """
+    State shared by the stages of one invocation
+
+    Bootstrap data and fixtures are fetched once and reused by every stage that
+    runs in the invocation, and all stages share one fetch engine and picks store.
+    """
+
+    def __init__(self, client, data, secrets, stats):
+        self.client = client
+        self.data = data
+        self.secrets = secrets
+        self.stats = stats
+        self.space = "fantasy_football"
+        self.version = "1"
+        self.league_id = data.get("league_id") or os.getenv("FPL_LEAGUE_ID", "1097811")
+        self.full_rebuild = bool(data.get("full_rebuild", False))
+        # With a shard, the managers stage only ingests that shard's entries of a saved plan
+        self.shard = None if data.get("shard") is None else int(data["shard"])
+        self.shard_count = int(data.get("shard_count") or 1)
+        self.fpl_client = FPLClient()
+        self.engine = FetchEngine(
+            max_workers=data.get("max_workers", 8),
+            requests_per_second=data.get("requests_per_second")
+        )
+        self.picks_store = PicksStore(self.fpl_client, self.engine)
+        self.metrics = StageMetrics("fpl_full_update", transports=[self.fpl_client.transport], limiter=self.engine.limiter)
+        self._bootstrap = None
+        self._fixtures = None
+
+    def bootstrap(self):
+        """bootstrap-static data (teams, players, gameweeks), fetched on first use"""
+        if self._bootstrap is None:
+            print("Fetching bootstrap data...")
+            with self.metrics.step("bootstrap"):
+                self._bootstrap = self.fpl_client.get_bootstrap_static()
+            print(f"  Teams: {len(self._bootstrap['teams'])}, Gameweeks: {len(self._bootstrap['events'])}, "
+                  f"Players: {len(self._bootstrap['elements'])}, Current GW: {self.current_gameweek()}")
+        return self._bootstrap
+
+    def current_gameweek(self):
+        """Current gameweek number"""
+        current = next((e for e in self.bootstrap()['events'] if e.get('is_current')), None)
+        return current['id'] if current else 1
+
+    def league_standings(self):
+        """Standings entries to ingest: the whole league, or this invocation's shard of it"""
+        if self.shard is None:
+            return self.fpl_client.get_all_league_standings(self.league_id)
+        return ShardPlanStore(self.client).load(self.league_id, self.shard, self.shard_count)
+
+    def fixtures(self):
+        """All fixtures, fetched on first use"""
+        if self._fixtures is None:
+            self._fixtures = self.fpl_client.get_fixtures()
+            print(f"  Fetched {len(self._fixtures)} fixtures from FPL API")
+        return self._fixtures
+
+
+def load_reference(ctx, writer):
+    """Load teams and gameweeks"""
+    SPACE, VERSION, stats = ctx.space, ctx.version, ctx.stats
+    teams = ctx.bootstrap()['teams']
+    events = ctx.bootstrap()['events']
+    
+    with ctx.metrics.step("teams", writer):
         # =====================================================================
         # STEP 2: Load Teams
         # =====================================================================
         print("Loading teams...")
         team_nodes = []
-        teams_dict = {team['id']: team for team in teams}
         
         for team in teams:
             team_nodes.append(NodeApply(
@@ -137,166 +531,11 @@ def handle(data: dict[str, Any], client: CogniteClient, secrets: dict[str, str])
                 ]
             ))
         
-        client.data_modeling.instances.apply(nodes=team_nodes, auto_create_direct_relations=True)
+        writer.apply(team_nodes)
         stats["teams"] = len(team_nodes)
         print(f"  ✓ Loaded {len(team_nodes)} teams")
-        
-        # =====================================================================
-        # STEP 2.5: Load Fixtures (with odds if available)
-        # =====================================================================
-        print("Loading fixtures...")
-        try:
-            fixtures_raw = fpl_client.get_fixtures()
-            print(f"  Fetched {len(fixtures_raw)} fixtures from FPL API")
-            
-            # Enrich with odds if available
-            if ODDS_AVAILABLE:
-                api_key = secrets.get("ODDS_API_KEY")
-                if api_key:
-                    print("  Fetching betting odds...")
-                    try:
-                        fetcher = OddsFetcher(api_key=api_key, source='odds_api')
-                        odds_data = fetcher.fetch_premier_league_odds()
-                        
-                        if odds_data:
-                            print(f"  ✓ Fetched odds for {len(odds_data)} matches")
-                            
-                            # Add team names to fixtures for matching
-                            for fixture in fixtures_raw:
-                                home_team_id = fixture.get('team_h')
-                                away_team_id = fixture.get('team_a')
-                                fixture['team_h_name'] = teams_dict.get(home_team_id, {}).get('name', 'Unknown')
-                                fixture['team_a_name'] = teams_dict.get(away_team_id, {}).get('name', 'Unknown')
-                            
-                            fixtures_raw = fetcher.match_with_fpl_fixtures(odds_data, fixtures_raw)
-                            stats["fixtures_with_odds"] = sum(1 for f in fixtures_raw if f.get('home_win_odds'))
-                            print(f"  ✓ Matched odds for {stats['fixtures_with_odds']} fixtures")
-                        else:
-                            print("  ⚠️  No odds data available")
-                    except Exception as e:
-                        print(f"  ⚠️  Failed to fetch odds: {e}")
-                else:
-                    print("  ⚠️  No ODDS_API_KEY configured, skipping odds")
-            
-            # Create fixture nodes
-            fixture_nodes = []
-            for fixture in fixtures_raw:
-                fixture_id = fixture['id']
-                gameweek = fixture.get('event')
-                
-                # Skip fixtures without gameweek (postponed)
-                if not gameweek:
-                    continue
-                
-                home_team_id = fixture.get('team_h')
-                away_team_id = fixture.get('team_a')
-                
-                # Parse kickoff time
-                kickoff = None
-                if fixture.get('kickoff_time'):
-                    try:
-                        kickoff = datetime.fromisoformat(fixture['kickoff_time'].replace('Z', '+00:00'))
-                    except:
-                        pass
-                
-                props = {
-                    "fixtureId": fixture_id,
-                    "gameweek": {"space": SPACE, "externalId": f"gameweek_{gameweek}"},
-                    "homeTeam": {"space": SPACE, "externalId": f"team_{home_team_id}"} if home_team_id else None,
-                    "awayTeam": {"space": SPACE, "externalId": f"team_{away_team_id}"} if away_team_id else None,
-                    "kickoffTime": kickoff,
-                    "homeTeamDifficulty": fixture.get('team_h_difficulty'),
-                    "awayTeamDifficulty": fixture.get('team_a_difficulty'),
-                    "homeTeamScore": fixture.get('team_h_score'),
-                    "awayTeamScore": fixture.get('team_a_score'),
-                    "isFinished": fixture.get('finished', False),
-                    "started": fixture.get('started', False),
-                    "provisionalStartTime": fixture.get('provisional_start_time', False)
-                }
-                
-                # Add odds if available
-                if fixture.get('home_win_odds'):
-                    props.update({
-                        "homeWinOdds": fixture.get('home_win_odds'),
-                        "drawOdds": fixture.get('draw_odds'),
-                        "awayWinOdds": fixture.get('away_win_odds'),
-                        "homeWinProbability": fixture.get('home_win_probability'),
-                        "drawProbability": fixture.get('draw_probability'),
-                        "awayWinProbability": fixture.get('away_win_probability')
-                    })
-                
-                fixture_nodes.append(NodeApply(
-                    space=SPACE,
-                    external_id=f"fixture_{fixture_id}",
-                    sources=[
-                        NodeOrEdgeData(
-                            source={"space": SPACE, "externalId": "Fixture", "version": VERSION, "type": "view"},
-                            properties=props
-                        )
-                    ]
-                ))
-            
-            # Load fixtures in batches
-            batch_size = 100
-            for i in range(0, len(fixture_nodes), batch_size):
-                batch = fixture_nodes[i:i + batch_size]
-                client.data_modeling.instances.apply(nodes=batch, auto_create_direct_relations=True)
-            
-            stats["fixtures"] = len(fixture_nodes)
-            print(f"  ✓ Loaded {len(fixture_nodes)} fixtures")
-            
-            # Update team strength and next fixture info
-            print("  Updating team strength ratings...")
-            for team in teams:
-                team_id = team['id']
-                # Find next unfinished fixture for this team
-                next_fixtures = [f for f in fixtures_raw 
-                                if (f.get('team_h') == team_id or f.get('team_a') == team_id) 
-                                and not f.get('finished')]
-                next_fixture_id = next_fixtures[0]['id'] if next_fixtures else None
-                
-                # Calculate upcoming fixture difficulty (average of next 3-5 fixtures)
-                upcoming_difficulties = []
-                for f in next_fixtures[:5]:
-                    if f.get('team_h') == team_id:
-                        upcoming_difficulties.append(f.get('team_h_difficulty', 3))
-                    else:
-                        upcoming_difficulties.append(f.get('team_a_difficulty', 3))
-                
-                avg_difficulty = sum(upcoming_difficulties) / len(upcoming_difficulties) if upcoming_difficulties else None
-                
-                # Update team node with strength and fixture info
-                update_node = NodeApply(
-                    space=SPACE,
-                    external_id=f"team_{team_id}",
-                    sources=[
-                        NodeOrEdgeData(
-                            source={"space": SPACE, "externalId": "PLTeam", "version": VERSION, "type": "view"},
-                            properties={
-                                "teamId": team_id,
-                                "name": team['name'],
-                                "shortName": team['short_name'],
-                                "strength": team.get('strength'),
-                                "strengthOverallHome": team.get('strength_overall_home'),
-                                "strengthOverallAway": team.get('strength_overall_away'),
-                                "strengthAttackHome": team.get('strength_attack_home'),
-                                "strengthAttackAway": team.get('strength_attack_away'),
-                                "strengthDefenceHome": team.get('strength_defence_home'),
-                                "strengthDefenceAway": team.get('strength_defence_away'),
-                                "upcomingFixtureDifficulty": avg_difficulty,
-                                "nextFixture": {"space": SPACE, "externalId": f"fixture_{next_fixture_id}"} if next_fixture_id else None
-                            }
-                        )
-                    ]
-                )
-                client.data_modeling.instances.apply(nodes=[update_node], auto_create_direct_relations=True)
-            
-            print(f"  ✓ Updated team strength ratings")
-            
-        except Exception as e:
-            print(f"  ✗ Error loading fixtures: {e}")
-            stats["errors"].append(f"Fixtures: {str(e)}")
-        
+    
+    with ctx.metrics.step("gameweeks", writer):
         # =====================================================================
         # STEP 3: Load Gameweeks
         # =====================================================================
@@ -330,17 +569,202 @@ def handle(data: dict[str, Any], client: CogniteClient, secrets: dict[str, str])
                 ]
             ))
         
-        client.data_modeling.instances.apply(nodes=gameweek_nodes, auto_create_direct_relations=True)
+        writer.apply(gameweek_nodes)
         stats["gameweeks"] = len(gameweek_nodes)
         print(f"  ✓ Loaded {len(gameweek_nodes)} gameweeks")
+
+
+def load_fixtures(ctx, writer):
+    """Load fixtures and update team strength and upcoming fixture difficulty"""
+    SPACE, VERSION, stats = ctx.space, ctx.version, ctx.stats
+    teams = ctx.bootstrap()['teams']
+    
+    with ctx.metrics.step("fixtures", writer):
+        # =====================================================================
+        # STEP 2.5: Load Fixtures
+        # =====================================================================
+        print("Loading fixtures...")
+        fixtures_raw = ctx.fixtures()
         
+        # Create fixture nodes
+        fixture_nodes = []
+        for fixture in fixtures_raw:
+            fixture_id = fixture['id']
+            gameweek = fixture.get('event')
+            
+            # Skip fixtures without gameweek (postponed)
+            if not gameweek:
+                continue
+            
+            home_team_id = fixture.get('team_h')
+            away_team_id = fixture.get('team_a')
+            
+            # Parse kickoff time
+            kickoff = None
+            if fixture.get('kickoff_time'):
+                try:
+                    kickoff = datetime.fromisoformat(fixture['kickoff_time'].replace('Z', '+00:00'))
+                except:
+                    pass
+            
+            props = {
+                "fixtureId": fixture_id,
+                "gameweek": {"space": SPACE, "externalId": f"gameweek_{gameweek}"},
+                "homeTeam": {"space": SPACE, "externalId": f"team_{home_team_id}"} if home_team_id else None,
+                "awayTeam": {"space": SPACE, "externalId": f"team_{away_team_id}"} if away_team_id else None,
+                "kickoffTime": kickoff,
+                "homeTeamDifficulty": fixture.get('team_h_difficulty'),
+                "awayTeamDifficulty": fixture.get('team_a_difficulty'),
+                "homeTeamScore": fixture.get('team_h_score'),
+                "awayTeamScore": fixture.get('team_a_score'),
+                "isFinished": fixture.get('finished', False),
+                "started": fixture.get('started', False),
+                "provisionalStartTime": fixture.get('provisional_start_time', False)
+            }
+            
+            fixture_nodes.append(NodeApply(
+                space=SPACE,
+                external_id=f"fixture_{fixture_id}",
+                sources=[
+                    NodeOrEdgeData(
+                        source={"space": SPACE, "externalId": "Fixture", "version": VERSION, "type": "view"},
+                        properties=props
+                    )
+                ]
+            ))
+        
+        writer.apply(fixture_nodes)
+        
+        stats["fixtures"] = len(fixture_nodes)
+        print(f"  ✓ Loaded {len(fixture_nodes)} fixtures")
+        
+        # Update team strength and next fixture info
+        print("  Updating team strength ratings...")
+        strength_nodes = []
+        for team in teams:
+            team_id = team['id']
+            # Find next unfinished fixture for this team
+            next_fixtures = [f for f in fixtures_raw 
+                            if (f.get('team_h') == team_id or f.get('team_a') == team_id) 
+                            and not f.get('finished')]
+            next_fixture_id = next_fixtures[0]['id'] if next_fixtures else None
+            
+            # Calculate upcoming fixture difficulty (average of next 3-5 fixtures)
+            upcoming_difficulties = []
+            for f in next_fixtures[:5]:
+                if f.get('team_h') == team_id:
+                    upcoming_difficulties.append(f.get('team_h_difficulty', 3))
+                else:
+                    upcoming_difficulties.append(f.get('team_a_difficulty', 3))
+            
+            avg_difficulty = sum(upcoming_difficulties) / len(upcoming_difficulties) if upcoming_difficulties else None
+            
+            # Update team node with strength and fixture info
+            strength_nodes.append(NodeApply(
+                space=SPACE,
+                external_id=f"team_{team_id}",
+                sources=[
+                    NodeOrEdgeData(
+                        source={"space": SPACE, "externalId": "PLTeam", "version": VERSION, "type": "view"},
+                        properties={
+                            "teamId": team_id,
+                            "name": team['name'],
+                            "shortName": team['short_name'],
+                            "strength": team.get('strength'),
+                            "strengthOverallHome": team.get('strength_overall_home'),
+                            "strengthOverallAway": team.get('strength_overall_away'),
+                            "strengthAttackHome": team.get('strength_attack_home'),
+                            "strengthAttackAway": team.get('strength_attack_away'),
+                            "strengthDefenceHome": team.get('strength_defence_home'),
+                            "strengthDefenceAway": team.get('strength_defence_away'),
+                            "upcomingFixtureDifficulty": avg_difficulty,
+                            "nextFixture": {"space": SPACE, "externalId": f"fixture_{next_fixture_id}"} if next_fixture_id else None
+                        }
+                    )
+                ]
+            ))
+        
+        writer.apply(strength_nodes)
+        print(f"  ✓ Updated team strength ratings")
+
+
+def load_odds(ctx, writer):
+    """
+    Enrich fixtures with betting odds
+    
+    Only the odds properties are written, so this stage can run (and fail) on
+    its own without touching the fixture data loaded by load_fixtures.
+    """
+    SPACE, VERSION, stats = ctx.space, ctx.version, ctx.stats
+    teams_dict = {team['id']: team for team in ctx.bootstrap()['teams']}
+    
+    with ctx.metrics.step("odds", writer):
+        print("Loading betting odds...")
+        if not ODDS_AVAILABLE:
+            print("  ⚠️  OddsFetcher not available, skipping odds")
+            return
+        api_key = ctx.secrets.get("ODDS_API_KEY")
+        if not api_key:
+            print("  ⚠️  No ODDS_API_KEY configured, skipping odds")
+            return
+        
+        fetcher = OddsFetcher(api_key=api_key, source='odds_api')
+        ctx.metrics.track(fetcher.transport)
+        odds_data = fetcher.fetch_premier_league_odds()
+        if not odds_data:
+            print("  ⚠️  No odds data available")
+            return
+        print(f"  ✓ Fetched odds for {len(odds_data)} matches")
+        
+        # Add team names to fixtures for matching
+        fixtures_raw = [dict(fixture) for fixture in ctx.fixtures()]
+        for fixture in fixtures_raw:
+            fixture['team_h_name'] = teams_dict.get(fixture.get('team_h'), {}).get('name', 'Unknown')
+            fixture['team_a_name'] = teams_dict.get(fixture.get('team_a'), {}).get('name', 'Unknown')
+        
+        fixtures_raw = fetcher.match_with_fpl_fixtures(odds_data, fixtures_raw)
+        
+        odds_nodes = []
+        for fixture in fixtures_raw:
+            # Skip fixtures without gameweek (postponed) or without matched odds
+            if not fixture.get('event') or not fixture.get('home_win_odds'):
+                continue
+            
+            odds_nodes.append(NodeApply(
+                space=SPACE,
+                external_id=f"fixture_{fixture['id']}",
+                sources=[
+                    NodeOrEdgeData(
+                        source={"space": SPACE, "externalId": "Fixture", "version": VERSION, "type": "view"},
+                        properties={
+                            "fixtureId": fixture['id'],
+                            "homeWinOdds": fixture.get('home_win_odds'),
+                            "drawOdds": fixture.get('draw_odds'),
+                            "awayWinOdds": fixture.get('away_win_odds'),
+                            "homeWinProbability": fixture.get('home_win_probability'),
+                            "drawProbability": fixture.get('draw_probability'),
+                            "awayWinProbability": fixture.get('away_win_probability')
+                        }
+                    )
+                ]
+            ))
+        
+        writer.apply(odds_nodes)
+        stats["fixtures_with_odds"] = len(odds_nodes)
+        print(f"  ✓ Matched odds for {stats['fixtures_with_odds']} fixtures")
+
+
+def load_players(ctx, writer):
+    """Load players"""
+    SPACE, VERSION, stats = ctx.space, ctx.version, ctx.stats
+    players = ctx.bootstrap()['elements']
+    
+    with ctx.metrics.step("players", writer):
         # =====================================================================
         # STEP 4: Load Players
         # =====================================================================
         print("Loading players...")
         player_nodes = []
-        position_map = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
-        players_by_id = {p['id']: p for p in players}
         
         for player in players:
             player_nodes.append(NodeApply(
@@ -355,7 +779,7 @@ def handle(data: dict[str, Any], client: CogniteClient, secrets: dict[str, str])
                             "firstName": player['first_name'],
                             "lastName": player['second_name'],
                             "plTeam": {"space": SPACE, "externalId": f"team_{player['team']}"},
-                            "position": position_map.get(player['element_type'], "Unknown"),
+                            "position": POSITION_MAP.get(player['element_type'], "Unknown"),
                             "currentPrice": player['now_cost'] / 10.0,
                             "totalPoints": player['total_points'],
                             "form": float(player.get('form', 0)) if player.get('form') else 0.0,
@@ -366,86 +790,77 @@ def handle(data: dict[str, Any], client: CogniteClient, secrets: dict[str, str])
                 ]
             ))
         
-        # Load in batches
-        batch_size = 100
-        for i in range(0, len(player_nodes), batch_size):
-            batch = player_nodes[i:i + batch_size]
-            client.data_modeling.instances.apply(nodes=batch, auto_create_direct_relations=True)
+        writer.apply(player_nodes)
         
         stats["players"] = len(player_nodes)
         print(f"  ✓ Loaded {len(player_nodes)} players")
-        
+
+
+def load_managers(ctx, writer):
+    """
+    Load managers, performance, manager teams, player selections and transfers
+    
+    Nodes stream through a sink while picks are fetched. If the stage fails,
+    the nodes produced so far are still written; the watermarks were not
+    advanced, so the same gameweeks are redone next run.
+    """
+    sink = NodeSink(writer, max_buffered=ctx.data.get("max_buffered_nodes", MAX_APPLY_ITEMS))
+    try:
+        ingest_managers(ctx, sink)
+    except Exception:
+        try:
+            sink.flush()
+        except Exception as flush_error:
+            ctx.stats["errors"].append(f"Final flush: {str(flush_error)}")
+        raise
+    finally:
+        ctx.stats["sink"] = sink.stats()
+
+
+def ingest_managers(ctx, sink):
+    """Fetch league managers and their picks, streaming the resulting nodes to the sink"""
+    SPACE, VERSION, stats = ctx.space, ctx.version, ctx.stats
+    players = ctx.bootstrap()['elements']
+    finished_gws = {event['id'] for event in ctx.bootstrap()['events'] if event.get('finished')}
+    
+    # Incremental mode: finished gameweeks at or below a manager's watermark are skipped
+    watermarks = WatermarkStore(ctx.client, scope="fpl_full_update")
+    if not ctx.full_rebuild:
+        watermarks.load()
+    
+    with ctx.metrics.step("managers", sink.writer):
         # =====================================================================
         # STEP 5: Load Managers & Performance
         # =====================================================================
         print("Loading managers and performance...")
-        league_data = fpl_client.get_league_standings(LEAGUE_ID)
-        standings = league_data['standings']['results']
+        standings = ctx.league_standings()
+        if ctx.shard is not None:
+            stats["shard"] = {"shard": ctx.shard, "shard_count": ctx.shard_count, "managers": len(standings)}
+            print(f"  Shard {ctx.shard + 1}/{ctx.shard_count}: {len(standings)} managers")
         
-        manager_nodes = []
-        performance_nodes = []
-        manager_histories = {}
+        ingest_gameweeks = {}
+        transfer_costs = {}
+        managers_by_entry = {manager['entry']: manager for manager in standings}
+        history_jobs = [(entry_id,) for entry_id in managers_by_entry]
         
-        for manager in standings:
-            entry_id = manager['entry']
-            
+        # Histories are packed into managers x gameweeks matrices as they arrive;
+        # the Manager nodes are built from one batched analytics pass at the end
+        league_history = LeagueHistory(managers_by_entry, len(ctx.bootstrap()['events']))
+        
+        for (entry_id,), history, error in ctx.engine.map(ctx.fpl_client.get_entry_history, history_jobs):
             try:
-                history = fpl_client.get_entry_history(entry_id)
-                manager_histories[entry_id] = history
+                if error is not None:
+                    raise error
                 current_gw_data = history.get('current', [])
+                watermark = watermarks.get(entry_id)
+                league_history.add(entry_id, current_gw_data)
                 
-                # Calculate analytics
-                weekly_points = [gw['points'] for gw in current_gw_data]
-                
-                if len(weekly_points) > 1 and np.mean(weekly_points) > 0:
-                    points_mean = np.mean(weekly_points)
-                    points_std = np.std(weekly_points)
-                    coeff_variation = points_std / points_mean
-                    consistency_score = max(0, min(100, 100 * (1 - min(coeff_variation, 1))))
-                else:
-                    consistency_score = 0.0
-                    points_mean = float(np.mean(weekly_points)) if weekly_points else 0.0
-                    points_std = 0.0
-                
-                if current_gw_data:
-                    starting_value = current_gw_data[0]['value'] / 10.0
-                    current_value = current_gw_data[-1]['value'] / 10.0
-                    team_value_growth = current_value - starting_value
-                    final_team_value = current_value
-                else:
-                    team_value_growth = 0.0
-                    final_team_value = 100.0
-                
-                total_transfers = sum(gw.get('event_transfers', 0) for gw in current_gw_data)
-                
-                # Create manager node
-                manager_nodes.append(NodeApply(
-                    space=SPACE,
-                    external_id=f"manager_{entry_id}",
-                    sources=[
-                        NodeOrEdgeData(
-                            source={"space": SPACE, "externalId": "Manager", "version": VERSION, "type": "view"},
-                            properties={
-                                "entryId": entry_id,
-                                "managerName": manager['player_name'],
-                                "teamName": manager['entry_name'],
-                                "overallPoints": manager['total'],
-                                "overallRank": manager.get('rank'),
-                                "leagueRank": manager.get('rank'),
-                                "teamValue": final_team_value,
-                                "consistencyScore": round(consistency_score, 2),
-                                "averagePointsPerWeek": round(points_mean, 2),
-                                "pointsStdDev": round(points_std, 2),
-                                "teamValueGrowth": round(team_value_growth, 2),
-                                "totalTransfers": total_transfers,
-                            }
-                        )
-                    ]
-                ))
-                
-                # Create performance records
+                # Create performance records (only gameweeks above the watermark)
+                performance_nodes = []
                 for gw_data in current_gw_data:
                     gameweek = gw_data['event']
+                    if gameweek <= watermark:
+                        continue
                     performance_nodes.append(NodeApply(
                         space=SPACE,
                         external_id=f"performance_{entry_id}_gw{gameweek}",
@@ -467,338 +882,465 @@ def handle(data: dict[str, Any], client: CogniteClient, secrets: dict[str, str])
                             )
                         ]
                     ))
-                
-                time.sleep(0.3)  # Rate limiting
-                
+            
             except Exception as e:
                 stats["errors"].append(f"Manager {entry_id}: {str(e)}")
                 continue
+            
+            # Only gameweek numbers and transfer costs are kept; the nodes go straight to the sink
+            ingest_gameweeks[entry_id] = [gw['event'] for gw in current_gw_data if gw['event'] > watermark]
+            transfer_costs[entry_id] = {
+                gw['event']: (gw.get('event_transfers_cost', 0), gw.get('event_transfers', 0)) for gw in current_gw_data
+            }
+            sink.extend(performance_nodes)
+            stats["performance_records"] += len(performance_nodes)
         
-        client.data_modeling.instances.apply(nodes=manager_nodes, auto_create_direct_relations=True)
-        stats["managers"] = len(manager_nodes)
-        print(f"  ✓ Loaded {len(manager_nodes)} managers")
-        
-        # Load performance in batches
-        for i in range(0, len(performance_nodes), batch_size):
-            batch = performance_nodes[i:i + batch_size]
-            client.data_modeling.instances.apply(nodes=batch, auto_create_direct_relations=True)
-        
-        stats["performance_records"] = len(performance_nodes)
-        print(f"  ✓ Loaded {len(performance_nodes)} performance records")
+        with ctx.metrics.timer("manager_analytics"):
+            analytics = league_history.analytics()
+            team_values = dict(zip(league_history.entry_ids, analytics["team_value"]))
+            manager_properties = league_history.manager_properties(analytics)
+        for entry_id in transfer_costs:
+            manager = managers_by_entry[entry_id]
+            team_value = team_values[entry_id]
+            sink.add(NodeApply(
+                space=SPACE,
+                external_id=f"manager_{entry_id}",
+                sources=[
+                    NodeOrEdgeData(
+                        source={"space": SPACE, "externalId": "Manager", "version": VERSION, "type": "view"},
+                        properties={
+                            "entryId": entry_id,
+                            "managerName": manager['player_name'],
+                            "teamName": manager['entry_name'],
+                            "overallPoints": manager['total'],
+                            "overallRank": manager.get('rank'),
+                            "leagueRank": manager.get('rank'),
+                            "teamValue": 100.0 if np.isnan(team_value) else float(team_value),
+                            **manager_properties[entry_id]
+                        }
+                    )
+                ]
+            ))
+            stats["managers"] += 1
         
+        print(f"  ✓ Loaded {stats['managers']} managers")
+        print(f"  ✓ Loaded {stats['performance_records']} performance records")
+    
+    with ctx.metrics.step("picks", sink.writer):
         # =====================================================================
-        # STEP 6: Load Manager Teams & Player Selections
+        # STEP 6: Load Manager Teams & Player Selections (with formations)
         # =====================================================================
+        # Picks are processed as they arrive. Once all of a manager's gameweeks are in,
+        # their picks are released from the store.
         print("Loading manager teams and player selections...")
-        print("(This may take a while - fetching picks for each manager/gameweek)")
         
-        manager_team_nodes = []
-        player_selection_nodes = []
+        element_types = id_lookup({p['id']: p['element_type'] for p in players})
+        teams_count = defaultdict(int)
+        selections_count = defaultdict(int)
+        picks_jobs = [
+            (manager['entry'], gw)
+            for manager in standings
+            for gw in ingest_gameweeks.get(manager['entry'], [])
+        ]
+        pending_picks = defaultdict(int)
+        for entry_id, _ in picks_jobs:
+            pending_picks[entry_id] += 1
+        print(f"  Fetching picks for {len(picks_jobs)} manager/gameweek pairs ({ctx.engine.max_workers} workers)")
         
-        for idx, manager in enumerate(standings, 1):
-            entry_id = manager['entry']
-            manager_name = manager['player_name']
-            print(f"  [{idx}/{len(standings)}] {manager_name:<35} ", end="")
+        for (entry_id, gw), picks_data, error in ctx.picks_store.fetch_all(picks_jobs):
+            pending_picks[entry_id] -= 1
             
-            try:
-                history = manager_histories.get(entry_id, {})
-                gameweeks = [gw['event'] for gw in history.get('current', [])]
-                selections_count = 0
-                
-                for gw in gameweeks:
-                    try:
-                        picks_data = fpl_client.get_entry_picks(entry_id, gw)
-                        picks = picks_data.get('picks', [])
-                        entry_history = picks_data.get('entry_history', {})
-                        
-                        # Find captain and vice captain
-                        captain_id = None
-                        vice_captain_id = None
-                        for pick in picks:
-                            if pick.get('is_captain'):
-                                captain_id = pick['element']
-                            if pick.get('is_vice_captain'):
-                                vice_captain_id = pick['element']
+            if error is not None:
+                stats["errors"].append(f"Picks for {entry_id} GW{gw}: {str(error)}")
+            else:
+                try:
+                    picks = picks_data.get('picks', [])
+                    manager_team_ext_id = f"managerteam_{entry_id}_gw{gw}"
+                    
+                    # Create PlayerSelection nodes for each of the 15 picks
+                    selection_nodes = []
+                    for pick in picks:
+                        player_id = pick['element']
+                        position = pick['position']
                         
-                        # Create ManagerTeam node
-                        manager_team_ext_id = f"managerteam_{entry_id}_gw{gw}"
-                        manager_team_nodes.append(NodeApply(
+                        selection_nodes.append(NodeApply(
                             space=SPACE,
-                            external_id=manager_team_ext_id,
+                            external_id=f"selection_{entry_id}_gw{gw}_p{player_id}_pos{position}",
                             sources=[
                                 NodeOrEdgeData(
-                                    source={"space": SPACE, "externalId": "ManagerTeam", "version": VERSION, "type": "view"},
+                                    source={"space": SPACE, "externalId": "PlayerSelection", "version": VERSION, "type": "view"},
                                     properties={
-                                        "manager": {"space": SPACE, "externalId": f"manager_{entry_id}"},
-                                        "gameweek": {"space": SPACE, "externalId": f"gameweek_{gw}"},
-                                        "captain": {"space": SPACE, "externalId": f"player_{captain_id}"} if captain_id else None,
-                                        "viceCaptain": {"space": SPACE, "externalId": f"player_{vice_captain_id}"} if vice_captain_id else None,
-                                        "totalPoints": entry_history.get('points'),
-                                        "teamValue": entry_history.get('value', 0) / 10.0 if entry_history.get('value') else None,
-                                        "bank": entry_history.get('bank', 0) / 10.0 if entry_history.get('bank') else None,
-                                        "activeChip": picks_data.get('active_chip')
+                                        "managerTeam": {"space": SPACE, "externalId": manager_team_ext_id},
+                                        "player": {"space": SPACE, "externalId": f"player_{player_id}"},
+                                        "position": position,
+                                        "multiplier": pick['multiplier'],
+                                        "isCaptain": pick.get('is_captain', False),
+                                        "isViceCaptain": pick.get('is_vice_captain', False),
+                                        "pointsScored": None  # Would need player gameweek stats to populate
                                     }
                                 )
                             ]
                         ))
-                        
-                        # Create PlayerSelection nodes for each of the 15 picks
-                        for pick in picks:
-                            player_id = pick['element']
-                            position = pick['position']
-                            multiplier = pick['multiplier']
-                            is_captain = pick.get('is_captain', False)
-                            is_vice = pick.get('is_vice_captain', False)
-                            
-                            player_selection_nodes.append(NodeApply(
-                                space=SPACE,
-                                external_id=f"selection_{entry_id}_gw{gw}_p{player_id}_pos{position}",
-                                sources=[
-                                    NodeOrEdgeData(
-                                        source={"space": SPACE, "externalId": "PlayerSelection", "version": VERSION, "type": "view"},
-                                        properties={
-                                            "managerTeam": {"space": SPACE, "externalId": manager_team_ext_id},
-                                            "player": {"space": SPACE, "externalId": f"player_{player_id}"},
-                                            "position": position,
-                                            "multiplier": multiplier,
-                                            "isCaptain": is_captain,
-                                            "isViceCaptain": is_vice,
-                                            "pointsScored": None  # Would need player gameweek stats to populate
-                                        }
-                                    )
-                                ]
-                            ))
-                            selections_count += 1
-                        
-                        time.sleep(0.3)  # Rate limiting
-                        
-                    except Exception as e:
-                        stats["errors"].append(f"Picks for {entry_id} GW{gw}: {str(e)}")
-                        continue
-                
-                print(f"✓ {len(gameweeks)} teams, {selections_count} selections")
                 
-            except Exception as e:
-                print(f"✗ Error: {e}")
-                stats["errors"].append(f"Manager teams {entry_id}: {str(e)}")
-                continue
-        
-        # Load manager teams in batches
-        for i in range(0, len(manager_team_nodes), batch_size):
-            batch = manager_team_nodes[i:i + batch_size]
-            client.data_modeling.instances.apply(nodes=batch, auto_create_direct_relations=True)
-        
-        stats["manager_teams"] = len(manager_team_nodes)
-        print(f"  ✓ Loaded {len(manager_team_nodes)} manager teams")
-        
-        # Load player selections in batches
-        for i in range(0, len(player_selection_nodes), batch_size):
-            batch = player_selection_nodes[i:i + batch_size]
-            client.data_modeling.instances.apply(nodes=batch, auto_create_direct_relations=True)
-        
-        stats["player_selections"] = len(player_selection_nodes)
-        print(f"  ✓ Loaded {len(player_selection_nodes)} player selections")
-        
-        # =====================================================================
-        # STEP 6.5: Calculate Formations for Manager Teams
-        # =====================================================================
-        print("Calculating formations for manager teams...")
-        
-        # Build a lookup of player positions
-        player_positions = {f"player_{p['id']}": position_map.get(p['element_type']) for p in players}
-        
-        # Build formation data from player selections
-        formations_data = defaultdict(lambda: {"DEF": 0, "MID": 0, "FWD": 0, "active_chip": None})
-        
-        for idx, manager in enumerate(standings):
-            entry_id = manager['entry']
+                except Exception as e:
+                    stats["errors"].append(f"Picks for {entry_id} GW{gw}: {str(e)}")
+                else:
+                    sink.extend(selection_nodes)
+                    selections_count[entry_id] += len(picks)
+                    stats["player_selections"] += len(picks)
             
-            try:
-                history = manager_histories.get(entry_id, {})
-                gameweeks = [gw['event'] for gw in history.get('current', [])]
-                
-                for gw in gameweeks:
-                    try:
-                        picks_data = fpl_client.get_entry_picks(entry_id, gw)
-                        picks = picks_data.get('picks', [])
-                        active_chip = picks_data.get('active_chip')
-                        
-                        # Skip if bench boost is active
-                        if active_chip == 'bboost':
-                            continue
-                        
-                        # Count starting 11 by position (position 1-11 are starters)
-                        position_counts = {"DEF": 0, "MID": 0, "FWD": 0}
-                        
-                        for pick in picks:
-                            if pick['position'] <= 11:  # Starting 11
-                                player_ext_id = f"player_{pick['element']}"
-                                pos = player_positions.get(player_ext_id)
-                                if pos in position_counts:
-                                    position_counts[pos] += 1
-                        
-                        # Format as formation string (e.g., "4-3-3")
-                        formation_str = f"{position_counts['DEF']}-{position_counts['MID']}-{position_counts['FWD']}"
-                        
-                        # Store for later update
-                        manager_team_ext_id = f"managerteam_{entry_id}_gw{gw}"
-                        formations_data[manager_team_ext_id] = {
-                            "formation": formation_str,
-                            "entry_id": entry_id,
-                            "gameweek": gw
-                        }
-                        
-                        time.sleep(0.2)  # Rate limiting
-                        
-                    except Exception as e:
-                        continue
-                
-            except Exception as e:
-                continue
-        
-        # Update manager team nodes with formations
-        formation_updates = []
-        for ext_id, data in formations_data.items():
-            formation_updates.append(NodeApply(
-                space=SPACE,
-                external_id=ext_id,
-                sources=[
-                    NodeOrEdgeData(
-                        source={"space": SPACE, "externalId": "ManagerTeam", "version": VERSION, "type": "view"},
-                        properties={
-                            "formation": data["formation"]
-                        }
-                    )
-                ]
-            ))
-        
-        # Apply formation updates in batches
-        for i in range(0, len(formation_updates), batch_size):
-            batch = formation_updates[i:i + batch_size]
-            client.data_modeling.instances.apply(nodes=batch, auto_create_direct_relations=True)
+            # Once all of a manager's gameweeks are in, their ManagerTeam nodes are
+            # built from one picks tensor and the picks are released
+            if pending_picks[entry_id] == 0:
+                try:
+                    with ctx.metrics.timer("formations"):
+                        team_nodes = build_manager_team_nodes(
+                            entry_id, ctx.picks_store.held(entry_id), element_types, SPACE, VERSION
+                        )
+                except Exception as e:
+                    stats["errors"].append(f"Manager teams for {entry_id}: {str(e)}")
+                else:
+                    sink.extend(team_nodes)
+                    teams_count[entry_id] += len(team_nodes)
+                    stats["manager_teams"] += len(team_nodes)
+                    stats["formations_calculated"] += sum(1 for node in team_nodes if "formation" in node.sources[0].properties)
+                ctx.picks_store.release(entry_id)
         
-        stats["formations_calculated"] = len(formation_updates)
-        print(f"  ✓ Calculated formations for {len(formation_updates)} manager teams")
+        for idx, manager in enumerate(standings, 1):
+            entry_id = manager['entry']
+            print(f"  [{idx}/{len(standings)}] {manager['player_name']:<35} "
+                  f"✓ {teams_count[entry_id]} teams, {selections_count[entry_id]} selections")
         
+        print(f"  ✓ Loaded {stats['manager_teams']} manager teams")
+        print(f"  ✓ Loaded {stats['player_selections']} player selections")
+        print(f"  ✓ Calculated formations for {stats['formations_calculated']} manager teams")
+        sink.flush()
+    
+    with ctx.metrics.step("transfers", sink.writer):
         # =====================================================================
-        # STEP 7: Load Transfers (simplified - last 5 GWs only)
+        # STEP 7: Load Transfers
         # =====================================================================
-        print("Analyzing transfers (last 5 gameweeks)...")
-        
-        player_stats = {p['id']: {'form': float(p.get('form', 0))} for p in players}
-        all_transfers = []
-        recent_gameweeks = range(max(1, current_gw - 4), current_gw + 1)
+        # One entry/{id}/transfers/ call per manager returns the exact transfers of the whole season
+        print("Loading transfers...")
+        transfer_rows = []
+        transfer_jobs = [(entry_id,) for entry_id in transfer_costs]
         
-        for entry_id in [s['entry'] for s in standings]:
-            try:
-                history = manager_histories.get(entry_id, {})
-                gameweeks = [gw['event'] for gw in history.get('current', [])]
-                
-                picks_by_gw = {}
-                for gw in [g for g in gameweeks if g in recent_gameweeks]:
-                    try:
-                        picks_data = fpl_client.get_entry_picks(entry_id, gw)
-                        picks_by_gw[gw] = {
-                            'picks': picks_data.get('picks', []),
-                            'transfers': picks_data.get('entry_history', {})
-                        }
-                        time.sleep(0.3)
-                    except:
-                        continue
-                
-                sorted_gws = sorted(picks_by_gw.keys())
-                for i in range(len(sorted_gws) - 1):
-                    prev_gw = sorted_gws[i]
-                    curr_gw = sorted_gws[i + 1]
-                    
-                    prev_squad = {pick['element'] for pick in picks_by_gw[prev_gw]['picks']}
-                    curr_squad = {pick['element'] for pick in picks_by_gw[curr_gw]['picks']}
-                    
-                    players_in = curr_squad - prev_squad
-                    players_out = prev_squad - curr_squad
-                    
-                    if players_in and players_out:
-                        transfer_cost = picks_by_gw[curr_gw]['transfers'].get('event_transfers_cost', 0)
-                        num_transfers = picks_by_gw[curr_gw]['transfers'].get('event_transfers', 0)
-                        cost_per_transfer = transfer_cost / num_transfers if num_transfers > 0 else 0
-                        
-                        for player_in_id, player_out_id in zip(list(players_in), list(players_out)):
-                            player_in = players_by_id.get(player_in_id, {})
-                            player_out = players_by_id.get(player_out_id, {})
-                            
-                            form_in = player_stats.get(player_in_id, {}).get('form', 0)
-                            form_out = player_stats.get(player_out_id, {}).get('form', 0)
-                            
-                            net_benefit = (form_in - form_out) * 3
-                            
-                            all_transfers.append({
-                                'entry_id': entry_id,
-                                'gameweek': curr_gw,
-                                'player_in_id': player_in_id,
-                                'player_out_id': player_out_id,
-                                'player_in_price': player_in.get('now_cost', 0) / 10.0,
-                                'player_out_price': player_out.get('now_cost', 0) / 10.0,
-                                'transfer_cost': int(cost_per_transfer),
-                                'net_benefit': int(round(net_benefit)),
-                                'was_successful': net_benefit > cost_per_transfer
-                            })
-                
-            except Exception as e:
-                stats["errors"].append(f"Transfers for {entry_id}: {str(e)}")
+        for (entry_id,), transfers, error in ctx.engine.map(ctx.fpl_client.get_entry_transfers, transfer_jobs):
+            if error is not None:
+                stats["errors"].append(f"Transfers for {entry_id}: {str(error)}")
                 continue
+            for transfer in transfers:
+                gw = transfer.get('event')
+                if not gw:
+                    continue
+                transfer_cost, num_transfers = transfer_costs[entry_id].get(gw, (0, 0))
+                transfer_rows.append((
+                    entry_id, gw, transfer['element_in'], transfer['element_out'],
+                    transfer.get('element_in_cost', 0), transfer.get('element_out_cost', 0),
+                    transfer_cost / num_transfers if num_transfers > 0 else 0
+                ))
         
-        # Create transfer nodes
-        transfer_nodes = []
-        for transfer in all_transfers:
-            transfer_nodes.append(NodeApply(
-                space=SPACE,
-                external_id=f"transfer_{transfer['entry_id']}_gw{transfer['gameweek']}_{transfer['player_out_id']}to{transfer['player_in_id']}",
-                sources=[
-                    NodeOrEdgeData(
-                        source={"space": SPACE, "externalId": "Transfer", "version": VERSION, "type": "view"},
-                        properties={
-                            "manager": {"space": SPACE, "externalId": f"manager_{transfer['entry_id']}"},
-                            "gameweek": {"space": SPACE, "externalId": f"gameweek_{transfer['gameweek']}"},
-                            "playerIn": {"space": SPACE, "externalId": f"player_{transfer['player_in_id']}"},
-                            "playerOut": {"space": SPACE, "externalId": f"player_{transfer['player_out_id']}"},
-                            "transferCost": transfer['transfer_cost'],
-                            "playerInPrice": transfer['player_in_price'],
-                            "playerOutPrice": transfer['player_out_price'],
-                            "pointsGainedNext3GW": transfer['net_benefit'],
-                            "wasSuccessful": transfer['was_successful'],
-                            "netBenefit": transfer['net_benefit']
-                        }
-                    )
-                ]
-            ))
-        
-        for i in range(0, len(transfer_nodes), batch_size):
-            batch = transfer_nodes[i:i + batch_size]
-            client.data_modeling.instances.apply(nodes=batch, auto_create_direct_relations=True)
-        
-        stats["transfers"] = len(transfer_nodes)
-        print(f"  ✓ Loaded {len(transfer_nodes)} transfers")
+        # Actual points of the players in and out over the next 1/3/5 gameweeks, for all
+        # transfers at once. Open windows are re-evaluated every run; closed ones no longer
+        # change, so their nodes are skipped by the writer.
+        try:
+            matrix = load_points_matrix(ctx, finished_gws)
+            with ctx.metrics.timer("transfer_evaluation"):
+                evaluation = evaluate_transfers(
+                    matrix,
+                    max(finished_gws, default=0),
+                    np.array([row[1] for row in transfer_rows], dtype=np.int64),
+                    np.array([row[2] for row in transfer_rows], dtype=np.int64),
+                    np.array([row[3] for row in transfer_rows], dtype=np.int64)
+                )
+            transfer_nodes = build_transfer_nodes(transfer_rows, evaluation, SPACE, VERSION)
+        except Exception as e:
+            stats["errors"].append(f"Transfers: {str(e)}")
+        else:
+            sink.extend(transfer_nodes)
+            stats["transfers"] += len(transfer_nodes)
         
-        print(f"\n✅ Data update complete!")
-        print(f"   Teams: {stats['teams']}, Fixtures: {stats['fixtures']} ({stats['fixtures_with_odds']} with odds)")
-        print(f"   Gameweeks: {stats['gameweeks']}, Players: {stats['players']}")
-        print(f"   Managers: {stats['managers']}, Performance: {stats['performance_records']}")
-        print(f"   Manager Teams: {stats['manager_teams']} ({stats['formations_calculated']} with formations)")
-        print(f"   Player Selections: {stats['player_selections']}, Transfers: {stats['transfers']}")
+        # Write whatever is still buffered before the watermarks move
+        sink.flush()
         
+        print(f"  ✓ Loaded {stats['transfers']} transfers")
+    
+    stats["picks_store"] = ctx.picks_store.stats()
+    
+    # Advance watermarks only now that everything for the run has been written
+    failed_picks = ctx.picks_store.failed()
+    for entry_id, gameweeks in ingest_gameweeks.items():
+        failed = {gw for failed_entry, gw in failed_picks if failed_entry == entry_id}
+        watermarks.advance(entry_id, next_watermark(watermarks.get(entry_id), gameweeks, finished_gws, failed))
+    stats["watermarks"] = {
+        "mode": "full" if ctx.full_rebuild else "incremental",
+        "gameweeks_ingested": sum(len(gws) for gws in ingest_gameweeks.values()),
+        "updated": watermarks.save()
+    }
+
+
+# Stages in the order they run when the whole update runs in one invocation.
+# The fpl_auto_update workflow runs each stage as its own task.
+STAGES = {
+    "reference": load_reference,
+    "fixtures": load_fixtures,
+    "odds": load_odds,
+    "players": load_players,
+    "managers": load_managers
+}
+
+# Stages whose failure does not fail a full update
+OPTIONAL_STAGES = {"odds"}
+
+
+# Workflow settings of the managers task created for each shard
+SHARD_TASK_RETRIES = 3
+SHARD_TASK_TIMEOUT = 1500
+
+# Function data passed on from the coordinator to every shard task
+SHARD_TASK_DATA = ("full_rebuild", "max_workers", "write_workers", "max_buffered_nodes")
+
+
+def plan_manager_shards(ctx):
+    """
+    Split the league's managers into shards for parallel managers stages
+    
+    Reads every page of the standings, saves each shard's entries to RAW and
+    builds one workflow task per shard. The number of shards is shard_count from
+    the function data, or enough shards of at most shard_size (default 500) managers.
+    
+    Returns:
+        Workflow task definitions for a dynamic task, one managers stage per shard
+    """
+    entries = ctx.fpl_client.get_all_league_standings(ctx.league_id)
+    shard_count = int(ctx.data.get("shard_count") or max(1, math.ceil(len(entries) / int(ctx.data.get("shard_size", 500)))))
+    shards = split_shards(entries, shard_count)
+    ShardPlanStore(ctx.client).save(ctx.league_id, shards)
+    ctx.stats["shards"] = {"managers": len(entries), "shard_count": shard_count, "sizes": [len(shard) for shard in shards]}
+    print(f"  ✓ Planned {shard_count} shards for {len(entries)} managers")
+    
+    shard_data = {key: ctx.data[key] for key in SHARD_TASK_DATA if key in ctx.data}
+    # The shards call the FPL API at the same time, so they split the request rate
+    # budget, which is the default ceiling unless requests_per_second is given
+    requests_per_second = float(ctx.data.get("requests_per_second") or DEFAULT_MAX_RATE)
+    shard_data["requests_per_second"] = requests_per_second / shard_count
+    
+    return [
+        {
+            "externalId": f"load_managers_shard_{shard}",
+            "type": "function",
+            "parameters": {
+                "function": {
+                    "externalId": "fpl_full_update",
+                    "data": {
+                        "league_id": ctx.league_id,
+                        "stage": "managers",
+                        "shard": shard,
+                        "shard_count": shard_count,
+                        **shard_data
+                    }
+                }
+            },
+            "retries": SHARD_TASK_RETRIES,
+            "timeout": SHARD_TASK_TIMEOUT,
+            "onFailure": "abortWorkflow"
+        }
+        for shard in range(shard_count)
+    ]
+
+
+def run_stage(name, ctx):
+    """
+    Run one stage with its own writer and content hashes
+    
+    Each stage keeps its hashes under its own scope, so stages running in
+    parallel never overwrite each other's hash rows.
+    
+    Returns:
+        True if the stage succeeded
+    """
+    scope = f"fpl_full_update.{name}"
+    if name == "managers" and ctx.shard is not None:
+        scope += f".shard{ctx.shard}"
+    node_hashes = NodeHashStore(ctx.client, scope=scope)
+    writer = InstanceWriter(ctx.client, max_workers=ctx.data.get("write_workers", 4), hash_store=node_hashes)
+    stage_stats = {"status": "success"}
+    started = time.perf_counter()
+    try:
+        # Nodes whose content equals what the last run wrote are skipped by the writer
+        if not ctx.full_rebuild:
+            node_hashes.load()
+        STAGES[name](ctx, writer)
+    except Exception as e:
+        stage_stats["status"] = "error"
+        ctx.stats["errors"].append(f"Stage {name}: {str(e)}")
+        print(f"  ✗ Stage {name} failed: {e}")
+    
+    # Hashes of everything written are kept, also when the stage failed half-way
+    try:
+        stage_stats["node_hashes"] = {"rows_written": node_hashes.save(), **node_hashes.stats()}
+    except Exception as e:
+        ctx.stats["errors"].append(f"Stage {name} hashes: {str(e)}")
+    stage_stats["seconds"] = round(time.perf_counter() - started, 2)
+    stage_stats["writer"] = writer.stats()
+    ctx.stats["stages"][name] = stage_stats
+    return stage_stats["status"] == "success"
+
+
+def handle(data: dict[str, Any], client: CogniteClient, secrets: dict[str, str]) -> dict[str, Any]:
+    """
+    Main handler for comprehensive FPL data update
+    
+    Args:
+        data: Input data (optional league_id override, stage to run a single stage
+              ("reference", "fixtures", "odds", "players" or "managers"; default all
+              stages in order), stage="plan_shards" with shard_count or shard_size to
+              split the league into shards, shard and shard_count to run the managers
+              stage for one shard of that plan, max_workers and requests_per_second to tune the
+              concurrent FPL fetches, full_rebuild to ignore the incremental watermarks
+              and content hashes and re-write every gameweek, max_buffered_nodes to cap
+              the nodes held in memory before they are written, write_workers for the
+              number of concurrent CDF write requests, mode="live" with poll_interval and
+              duration to poll live scores during matches instead of a full update)
+        client: CogniteClient instance
+        secrets: Dictionary of secret values (e.g., API keys)
+    
+    Returns:
+        Dictionary with status and statistics (and the shard tasks for plan_shards)
+    
+    Raises:
+        RuntimeError: If a single requested stage fails, so the workflow task is retried
+    """
+    
+    stage = data.get("stage", "all")
+    if stage not in ("all", "plan_shards") and stage not in STAGES:
+        return {
+            "status": "error",
+            "message": f"Unknown stage '{stage}', expected one of: all, plan_shards, {', '.join(STAGES)}",
+            "stats": {},
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    stats = {
+        "teams": 0,
+        "fixtures": 0,
+        "fixtures_with_odds": 0,
+        "gameweeks": 0,
+        "players": 0,
+        "managers": 0,
+        "performance_records": 0,
+        "manager_teams": 0,
+        "player_selections": 0,
+        "transfers": 0,
+        "team_betting_records": 0,
+        "formations_calculated": 0,
+        "picks_store": {},
+        "fetch_engine": {},
+        "rate_limiter": {},
+        "watermarks": {},
+        "sink": {},
+        "stages": {},
+        "steps": {},
+        "errors": []
+    }
+    ctx = StageContext(client, data, secrets or {}, stats)
+    
+    # The engine's requests_per_second ceiling is lifted again when the invocation
+    # ends, so it does not stay on the shared limiter of a warm instance
+    try:
+        return run_invocation(ctx, stage)
+    finally:
+        ctx.engine.close()
+
+
+def run_invocation(ctx, stage):
+    """Run live scoring, the shard planner or the update stages of one handle() call"""
+    data, stats = ctx.data, ctx.stats
+    
+    if data.get("mode") == "live":
+        writer = InstanceWriter(ctx.client, max_workers=data.get("write_workers", 4))
+        try:
+            live_stats = run_live_scoring(
+                writer, ctx.fpl_client, ctx.picks_store, ctx.league_id, ctx.space, ctx.version,
+                poll_interval=data.get("poll_interval", 60),
+                duration=data.get("duration", 840)
+            )
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+            return {
+                "status": "error",
+                "message": str(e),
+                "stats": {"writer": writer.stats()},
+                "timestamp": datetime.now().isoformat()
+            }
         return {
             "status": "success",
-            "message": "FPL data update completed successfully",
-            "stats": stats,
+            "message": "FPL live scoring completed",
+            "stats": {
+                "live": live_stats,
+                "picks_store": ctx.picks_store.stats(),
+                "rate_limiter": ctx.engine.limiter.stats(),
+                "writer": writer.stats()
+            },
             "timestamp": datetime.now().isoformat()
         }
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
+    
+    # Coordinator of a sharded update; errors fail the call so the workflow task is retried
+    if stage == "plan_shards":
+        print(f"Planning manager shards for league {ctx.league_id}")
+        tasks = plan_manager_shards(ctx)
+        return {
+            "status": "success",
+            "message": f"Planned {len(tasks)} manager shards",
+            "stats": {"shards": stats["shards"], "rate_limiter": ctx.engine.limiter.stats()},
+            "tasks": tasks,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    names = list(STAGES) if stage == "all" else [stage]
+    print(f"Starting FPL data update for league {ctx.league_id} (stages: {', '.join(names)})")
+    print(f"  Mode: {'full rebuild' if ctx.full_rebuild else 'incremental'}")
+    
+    failed = [name for name in names if not run_stage(name, ctx)]
+    
+    stats["picks_store"] = ctx.picks_store.stats()
+    stats["fetch_engine"] = ctx.engine.stats()
+    stats["rate_limiter"] = ctx.engine.limiter.stats()
+    stats["steps"] = ctx.metrics.stats()
+    ctx.metrics.log()
+    
+    print(f"\n{'⚠️ ' if failed else '✅'} Data update complete!")
+    print(f"   Teams: {stats['teams']}, Fixtures: {stats['fixtures']} ({stats['fixtures_with_odds']} with odds)")
+    print(f"   Gameweeks: {stats['gameweeks']}, Players: {stats['players']}")
+    print(f"   Managers: {stats['managers']}, Performance: {stats['performance_records']}")
+    print(f"   Manager Teams: {stats['manager_teams']} ({stats['formations_calculated']} with formations)")
+    print(f"   Player Selections: {stats['player_selections']}, Transfers: {stats['transfers']}")
+    print(f"   Picks store: {stats['picks_store']['misses']} fetched, {stats['picks_store']['hits']} reused, "
+          f"peak {stats['picks_store']['peak_stored']} held")
+    if stats["sink"]:
+        print(f"   Sink: {stats['sink']['flushes']} flushes, peak {stats['sink']['peak_buffered']} nodes buffered")
+    for name, stage_stats in stats["stages"].items():
+        print(f"   Stage {name}: {stage_stats['status']} in {stage_stats['seconds']}s, "
+              f"{stage_stats['writer']['written']} nodes written, {stage_stats['writer']['skipped']} unchanged skipped, "
+              f"{stage_stats['writer']['retries']} retries")
+    print(f"   Rate limiter: {stats['rate_limiter']['throttled_seconds']}s throttled, "
+          f"{stats['rate_limiter']['retries']} retries")
+    
+    # A failed single-stage run fails the workflow task, so its retries and onFailure policy apply
+    if failed and stage != "all":
+        raise RuntimeError(f"Stage {stage} failed: {stats['errors'][-1]}")
+    
+    required_failed = [name for name in failed if name not in OPTIONAL_STAGES]
+    if required_failed:
         return {
             "status": "error",
-            "message": str(e),
+            "message": f"FPL data update failed in stage(s): {', '.join(required_failed)}",
             "stats": stats,
             "timestamp": datetime.now().isoformat()
         }
-
+    return {
+        "status": "success",
+        "message": "FPL data update completed successfully" + (f" (skipped after errors: {', '.join(failed)})" if failed else ""),
+        "stats": stats,
+        "timestamp": datetime.now().isoformat()
+    }
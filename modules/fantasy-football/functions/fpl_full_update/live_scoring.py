@@ -0,0 +1,89 @@
+"""
+Live Gameweek Scoring
+Vectorized live scores, captaincy effect and projected league ranks for a mini-league
+"""
+from typing import Any
+
+import numpy as np
+
+SQUAD_SIZE = 15
+
+
+class LiveLeagueScorer:
+    """
+    Scores every manager of a league against event/{gw}/live/ data
+
+    Picks are packed once into managers x 15 arrays of player IDs and multipliers,
+    so each poll is a single gather of live points plus a few array reductions.
+    Multipliers already encode the captain (2), triple captain (3), bench (0)
+    and bench boost (bench players at 1). Automatic substitutions are not applied.
+    """
+
+    def __init__(self, picks_by_entry: dict[int, dict[str, Any]]):
+        """
+        Initialize scorer
+
+        Args:
+            picks_by_entry: entry/{id}/event/{gw}/picks/ responses for the gameweek, keyed by entry ID
+        """
+        self.entry_ids = sorted(picks_by_entry)
+        managers = len(self.entry_ids)
+
+        self.elements = np.zeros((managers, SQUAD_SIZE), dtype=np.int32)
+        self.multipliers = np.zeros((managers, SQUAD_SIZE), dtype=np.int8)
+        self.base_totals = np.zeros(managers, dtype=np.int32)
+        self.transfer_costs = np.zeros(managers, dtype=np.int32)
+
+        for i, entry_id in enumerate(self.entry_ids):
+            picks_data = picks_by_entry[entry_id]
+            for j, pick in enumerate(picks_data.get("picks", [])[:SQUAD_SIZE]):
+                self.elements[i, j] = pick["element"]
+                self.multipliers[i, j] = pick.get("multiplier", 0)
+
+            entry_history = picks_data.get("entry_history", {})
+            # Season total before this gameweek: total_points is net of this
+            # gameweek's transfer cost while points is gross, so the cost is added back
+            self.transfer_costs[i] = entry_history.get("event_transfers_cost") or 0
+            self.base_totals[i] = (
+                (entry_history.get("total_points") or 0) - (entry_history.get("points") or 0) + self.transfer_costs[i]
+            )
+
+    def score(self, live_data: dict[str, Any]) -> dict[str, np.ndarray]:
+        """
+        Compute live scores for all managers
+
+        Args:
+            live_data: Response of event/{gw}/live/
+
+        Returns:
+            Arrays aligned with entry_ids: live_points (gross, like entry_history.points),
+            captain_points (extra points from captaincy), projected_total (after the
+            transfer cost, like entry_history.total_points) and projected_rank
+        """
+        live_elements = live_data.get("elements", [])
+        max_id = max([element["id"] for element in live_elements] + [int(self.elements.max(initial=0))])
+        points_by_element = np.zeros(max_id + 1, dtype=np.int32)
+        if live_elements:
+            ids = np.fromiter((element["id"] for element in live_elements), dtype=np.int32, count=len(live_elements))
+            points = np.fromiter(
+                (element.get("stats", {}).get("total_points", 0) for element in live_elements),
+                dtype=np.int32,
+                count=len(live_elements)
+            )
+            points_by_element[ids] = points
+
+        pick_points = points_by_element[self.elements]
+        live_points = (pick_points * self.multipliers).sum(axis=1)
+        captain_points = (pick_points * np.maximum(self.multipliers - 1, 0)).sum(axis=1)
+        projected_total = self.base_totals + live_points - self.transfer_costs
+
+        # Competition ranking: 1 + number of managers with a strictly higher total
+        descending = np.sort(-projected_total)
+        projected_rank = np.searchsorted(descending, -projected_total, side="left") + 1
+
+        return {
+            "live_points": live_points,
+            "captain_points": captain_points,
+            "projected_total": projected_total,
+            "projected_rank": projected_rank
+        }
@@ -0,0 +1,146 @@
+"""
+Node Content Hashes
+Per-node content hashes kept between runs in a CDF RAW table, for change detection
+"""
+import hashlib
+import json
+import threading
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Any
+
+from cognite.client import CogniteClient
+from cognite.client.data_classes import Row
+from cognite.client.data_classes.data_modeling import NodeApply
+from cognite.client.exceptions import CogniteAPIError
+
+# (view, bucket, key, digest) of one node write
+HashEntry = tuple[str, int, str, str]
+
+
+def _sources(node: NodeApply) -> list[tuple[str, dict[str, Any]]]:
+    """(view external ID, properties) of every source a node writes to"""
+    sources = []
+    for source in node.sources or []:
+        if isinstance(source, dict):
+            view, properties = source.get("source", {}), source.get("properties", {})
+        else:
+            view, properties = source.source, source.properties
+        view = view.get("externalId", "unknown") if isinstance(view, dict) else getattr(view, "external_id", "unknown")
+        sources.append((view, dict(properties or {})))
+    return sources
+
+
+class NodeHashStore:
+    """
+    Content hashes of the nodes written by previous runs
+
+    A node is unchanged when the hash of its properties equals the hash stored
+    the last time it was written with the same set of property names. Writes of
+    different property subsets to one node (e.g. a base write and a later update)
+    are tracked separately. Hashes are 16 hex characters, packed into a fixed
+    number of RAW rows per view, so the state stays small and loads in a few calls.
+    Every scope has its own RAW table, so a run only reads its own hashes however
+    many other scopes (stages, shards) there are.
+    """
+
+    def __init__(
+        self,
+        client: CogniteClient,
+        scope: str,
+        db_name: str = "fantasy_football",
+        table_name: str = "fpl_node_hashes",
+        buckets: int = 128
+    ):
+        """
+        Initialize hash store
+
+        Args:
+            client: CogniteClient instance
+            scope: Name of the writer the hashes belong to (e.g. the function external ID)
+            db_name: RAW database holding the state table
+            table_name: Prefix of the RAW state tables; the scope's table is "{table_name}.{scope}"
+            buckets: RAW rows per view that the hashes are spread over
+        """
+        self.client = client
+        self.scope = scope
+        self.db_name = db_name
+        self.table_name = f"{table_name}.{scope}"
+        self.buckets = buckets
+        self._hashes: dict[tuple[str, int], dict[str, str]] = defaultdict(dict)
+        self._changed: set[tuple[str, int]] = set()
+        self._lock = threading.Lock()
+
+    def _row_key(self, view: str, bucket: int) -> str:
+        return f"{view}|{bucket}"
+
+    def load(self) -> "NodeHashStore":
+        """Read all hashes of this scope from its RAW table (a missing table means no hashes)"""
+        try:
+            rows = self.client.raw.rows.list(self.db_name, self.table_name, limit=None)
+        except CogniteAPIError as e:
+            if e.code != 404:
+                raise
+            rows = []
+
+        for row in rows:
+            view, bucket = row.key.rsplit("|", 1)
+            self._hashes[(view, int(bucket))] = {
+                key: digest for key, digest in (row.columns or {}).items() if key != "updated_at"
+            }
+        return self
+
+    def entry(self, node: NodeApply) -> HashEntry:
+        """Hash a node's properties"""
+        sources = _sources(node)
+        view = sources[0][0] if sources else "unknown"
+        names = ",".join(f"{source_view}:{name}" for source_view, properties in sources for name in sorted(properties))
+        key = f"{node.external_id}:{zlib.crc32(names.encode()):08x}"
+        content = json.dumps(sources, sort_keys=True, default=str).encode()
+        digest = hashlib.blake2b(content, digest_size=8).hexdigest()
+        return view, zlib.crc32(key.encode()) % self.buckets, key, digest
+
+    def unchanged(self, entry: HashEntry) -> bool:
+        """Whether a node was last written with exactly this content"""
+        view, bucket, key, digest = entry
+        with self._lock:
+            return self._hashes.get((view, bucket), {}).get(key) == digest
+
+    def record(self, entries: list[HashEntry]) -> None:
+        """Remember the content of nodes that were written"""
+        with self._lock:
+            for view, bucket, key, digest in entries:
+                if self._hashes[(view, bucket)].get(key) != digest:
+                    self._hashes[(view, bucket)][key] = digest
+                    self._changed.add((view, bucket))
+
+    def save(self) -> int:
+        """
+        Write changed hash rows to RAW
+
+        Returns:
+            Number of rows written
+        """
+        with self._lock:
+            if not self._changed:
+                return 0
+            saved = sorted(self._changed)
+            updated_at = datetime.now().isoformat()
+            rows = [
+                Row(key=self._row_key(view, bucket), columns={**self._hashes[(view, bucket)], "updated_at": updated_at})
+                for view, bucket in saved
+            ]
+
+        self.client.raw.rows.insert(self.db_name, self.table_name, rows, ensure_parent=True)
+        with self._lock:
+            self._changed.difference_update(saved)
+        return len(rows)
+
+    def stats(self) -> dict[str, Any]:
+        """Hash store summary for the run"""
+        with self._lock:
+            return {
+                "hashes": sum(len(hashes) for hashes in self._hashes.values()),
+                "rows_pending": len(self._changed)
+            }
@@ -0,0 +1,68 @@
+"""
+Streaming Node Sink
+Write buffer that sends nodes to CDF as soon as a batch fills
+"""
+from typing import Any, Iterable
+
+from cognite.client.data_classes.data_modeling import NodeApply
+
+from cdf_writer import MAX_APPLY_ITEMS, InstanceWriter
+
+
+class NodeSink:
+    """
+    Bounded buffer between node producers and the CDF data model
+
+    Producers add nodes one at a time while they fetch data. As soon as
+    max_buffered nodes are waiting they are handed to the instance writer, so
+    the number of nodes held in memory never exceeds the cap however large the
+    league is, and everything flushed so far is kept if the run fails later on.
+    """
+
+    def __init__(self, writer: InstanceWriter, max_buffered: int = MAX_APPLY_ITEMS):
+        """
+        Initialize sink
+
+        Args:
+            writer: Instance writer that applies the flushed nodes
+            max_buffered: Nodes held in memory before a flush (capped at the API maximum)
+        """
+        self.writer = writer
+        self.max_buffered = max(1, min(int(max_buffered), MAX_APPLY_ITEMS))
+        self._buffer: list[NodeApply] = []
+        self.flushes = 0
+        self.peak_buffered = 0
+
+    def add(self, node: NodeApply) -> None:
+        """Buffer a node, flushing if the buffer is full"""
+        self._buffer.append(node)
+        self.peak_buffered = max(self.peak_buffered, len(self._buffer))
+        if len(self._buffer) >= self.max_buffered:
+            self.flush()
+
+    def extend(self, nodes: Iterable[NodeApply]) -> None:
+        """Buffer several nodes, flushing whenever the buffer fills"""
+        for node in nodes:
+            self.add(node)
+
+    def flush(self) -> int:
+        """
+        Write all buffered nodes
+
+        Returns:
+            Number of nodes written
+        """
+        if not self._buffer:
+            return 0
+        batch, self._buffer = self._buffer, []
+        written = self.writer.apply(batch)
+        self.flushes += 1
+        return written
+
+    def stats(self) -> dict[str, Any]:
+        """Buffer statistics for the run (per-view write counts are in the writer stats)"""
+        return {
+            "flushes": self.flushes,
+            "max_buffered": self.max_buffered,
+            "peak_buffered": self.peak_buffered
+        }
@@ -9,6 +9,11 @@ from typing import Dict, List, Optional
 from datetime import datetime
 import logging
 
+try:
+    from http_transport import HTTPTransport
+except ImportError:
+    from .http_transport import HTTPTransport
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +30,8 @@ class OddsFetcher:
         """
         self.api_key = api_key or os.getenv("ODDS_API_KEY")
         self.source = source
+        # Odds APIs have their own quotas, so they get a pooled transport without the FPL rate limiter
+        self.transport = HTTPTransport(pool_size=2, timeout=(5.0, 10.0))
         
     def fetch_premier_league_odds(self) -> List[Dict]:
         """
@@ -63,7 +70,7 @@ class OddsFetcher:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.transport.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -156,7 +163,7 @@ class OddsFetcher:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.transport.get(url, params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
             
@@ -256,7 +263,7 @@ class OddsFetcher:
         
         try:
             logger.info(f"Requesting odds from The Odds API (regions: uk,eu)...")
-            response = requests.get(url, params=params, timeout=10)
+            response = self.transport.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
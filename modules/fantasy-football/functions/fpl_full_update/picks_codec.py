@@ -0,0 +1,32 @@
+"""
+Picks Codec
+Compact encoding of a manager's picks for the fpl_manager_picks RAW table
+"""
+from typing import Any
+
+# Integers stored per pick, in this order
+PICK_FIELDS = ("element", "position", "multiplier", "flags")
+
+# Bits of the flags field
+CAPTAIN_FLAG = 1
+VICE_CAPTAIN_FLAG = 2
+
+
+def encode_picks(picks: list[dict[str, Any]]) -> list[int]:
+    """
+    Encode entry/{id}/event/{gw}/picks/ picks as one flat integer list
+
+    Every pick takes len(PICK_FIELDS) integers: element, position, multiplier
+    and flags (CAPTAIN_FLAG | VICE_CAPTAIN_FLAG). A full squad is 60 integers,
+    stored as a JSON array that decodes without any per-pick parsing.
+    """
+    encoded = []
+    for k, pick in enumerate(picks):
+        flags = (CAPTAIN_FLAG if pick.get("is_captain") else 0) | (VICE_CAPTAIN_FLAG if pick.get("is_vice_captain") else 0)
+        encoded.extend((
+            int(pick["element"]),
+            int(pick.get("position") or k + 1),
+            int(pick.get("multiplier") or 0),
+            flags
+        ))
+    return encoded
@@ -0,0 +1,366 @@
+"""
+Picks Tensor
+Manager picks of a league as managers x gameweeks x 15 arrays, with vectorized
+formation, captaincy, team usage and squad change calculations
+"""
+import ast
+import json
+from itertools import chain
+from typing import Any, Iterable
+
+import numpy as np
+
+try:
+    from picks_codec import CAPTAIN_FLAG, PICK_FIELDS, VICE_CAPTAIN_FLAG, encode_picks
+except ImportError:
+    from .picks_codec import CAPTAIN_FLAG, PICK_FIELDS, VICE_CAPTAIN_FLAG, encode_picks
+
+SQUAD_SIZE = 15
+STARTERS = 11
+
+# FPL element_type codes
+POSITION_CODES = {"GK": 1, "DEF": 2, "MID": 3, "FWD": 4}
+
+
+def id_lookup(values: dict[int, int]) -> np.ndarray:
+    """Array indexed by ID (e.g. player ID -> element_type or team), 0 where unknown"""
+    lookup = np.zeros(max(values, default=0) + 1, dtype=np.int32)
+    if values:
+        lookup[np.fromiter(values.keys(), dtype=np.int64)] = np.fromiter(values.values(), dtype=np.int64)
+    return lookup
+
+
+def _gather(lookup: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """lookup[ids], with 0 for IDs outside the lookup"""
+    inside = ids < len(lookup)
+    return np.where(inside, lookup[np.where(inside, ids, 0)], 0)
+
+
+class PicksTensor:
+    """
+    Picks of a set of managers over a set of gameweeks
+
+    Slot j of [manager, gameweek] holds the pick at squad position j + 1, so
+    slots 0-10 are the starting 11 and 11-14 the bench. Player ID 0 marks an
+    empty slot and `filled` tells which manager/gameweek pairs have picks.
+    """
+
+    def __init__(self, entry_ids: Iterable[int], gameweeks: Iterable[int]):
+        """
+        Initialize empty arrays
+
+        Args:
+            entry_ids: Manager entry IDs (rows)
+            gameweeks: Gameweek numbers (columns)
+        """
+        self.entry_ids = sorted(set(entry_ids))
+        self.gameweeks = sorted(set(gameweeks))
+        self._entry_index = {entry_id: i for i, entry_id in enumerate(self.entry_ids)}
+        self._gameweek_index = {gw: i for i, gw in enumerate(self.gameweeks)}
+
+        shape = (len(self.entry_ids), len(self.gameweeks), SQUAD_SIZE)
+        self.elements = np.zeros(shape, dtype=np.int32)
+        self.multipliers = np.zeros(shape, dtype=np.int8)
+        self.is_captain = np.zeros(shape, dtype=bool)
+        self.is_vice_captain = np.zeros(shape, dtype=bool)
+        self.filled = np.zeros(shape[:2], dtype=bool)
+        self.parse_errors = 0
+
+    @classmethod
+    def from_api(cls, picks_by_key: dict[tuple[int, int], dict[str, Any]]) -> "PicksTensor":
+        """
+        Build from entry/{id}/event/{gw}/picks/ responses
+
+        Args:
+            picks_by_key: Responses keyed by (entry_id, gameweek)
+        """
+        tensor = cls((entry_id for entry_id, _ in picks_by_key), (gw for _, gw in picks_by_key))
+        for (entry_id, gw), picks_data in picks_by_key.items():
+            tensor.set_picks(entry_id, gw, picks_data.get("picks", []))
+        return tensor
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict[str, Any]]) -> "PicksTensor":
+        """
+        Build from one record per pick, e.g. PlayerSelection nodes
+
+        Args:
+            records: API pick fields (element, position, multiplier, is_captain,
+                     is_vice_captain) plus entry_id and gameweek
+        """
+        picks_by_key: dict[tuple[int, int], list[dict[str, Any]]] = {}
+        for record in records:
+            picks_by_key.setdefault((int(record["entry_id"]), int(record["gameweek"])), []).append(record)
+        tensor = cls((entry_id for entry_id, _ in picks_by_key), (gw for _, gw in picks_by_key))
+        for (entry_id, gw), picks in picks_by_key.items():
+            tensor.set_picks(entry_id, gw, picks)
+        return tensor
+
+    @classmethod
+    def from_encoded(
+        cls,
+        entry_ids: Iterable[int],
+        gameweeks: Iterable[int],
+        encoded: list[list[int]]
+    ) -> "PicksTensor":
+        """
+        Build from picks_codec.encode_picks() lists in one vectorized pass
+
+        Args:
+            entry_ids: Manager entry ID of each list
+            gameweeks: Gameweek of each list
+            encoded: Encoded picks, aligned with entry_ids and gameweeks
+
+        Lists whose length is not a whole number of picks are counted in
+        parse_errors and skipped.
+        """
+        entry_ids = np.fromiter(entry_ids, dtype=np.int64, count=len(encoded))
+        gameweeks = np.fromiter(gameweeks, dtype=np.int64, count=len(encoded))
+        fields = len(PICK_FIELDS)
+        lengths = np.fromiter((len(picks) for picks in encoded), dtype=np.int64, count=len(encoded))
+        valid = lengths % fields == 0
+
+        tensor = cls(entry_ids[valid].tolist(), gameweeks[valid].tolist())
+        tensor.parse_errors = int((~valid).sum())
+        valid_rows = np.flatnonzero(valid)
+        if len(valid_rows) == 0:
+            return tensor
+
+        # One row per pick: element, position, multiplier, flags
+        flat = np.fromiter(
+            chain.from_iterable(encoded[r] for r in valid_rows), dtype=np.int64, count=int(lengths[valid].sum())
+        )
+        picks = flat.reshape(-1, fields)
+        rows = np.repeat(np.arange(len(valid_rows)), lengths[valid] // fields)
+
+        i = np.searchsorted(tensor.entry_ids, entry_ids[valid])
+        g = np.searchsorted(tensor.gameweeks, gameweeks[valid])
+        tensor.filled[i, g] = True
+
+        slot = picks[:, 1] - 1
+        inside = (slot >= 0) & (slot < SQUAD_SIZE)
+        i, g, slot, picks = i[rows][inside], g[rows][inside], slot[inside], picks[inside]
+        tensor.elements[i, g, slot] = picks[:, 0]
+        tensor.multipliers[i, g, slot] = picks[:, 2]
+        tensor.is_captain[i, g, slot] = (picks[:, 3] & CAPTAIN_FLAG) > 0
+        tensor.is_vice_captain[i, g, slot] = (picks[:, 3] & VICE_CAPTAIN_FLAG) > 0
+        return tensor
+
+    @classmethod
+    def from_pick_arrays(cls, records: dict[str, Any]) -> "PicksTensor":
+        """
+        Build from the column arrays returned by records() (or a DataFrame of them)
+
+        Manager/gameweek pairs are marked filled when they have at least one pick.
+        """
+        entry_ids = np.asarray(records["entry_id"], dtype=np.int64)
+        gameweeks = np.asarray(records["gameweek"], dtype=np.int64)
+        tensor = cls(entry_ids.tolist(), gameweeks.tolist())
+        if len(entry_ids) == 0:
+            return tensor
+
+        i = np.searchsorted(tensor.entry_ids, entry_ids)
+        g = np.searchsorted(tensor.gameweeks, gameweeks)
+        slot = np.asarray(records["position"], dtype=np.int64) - 1
+        tensor.filled[i, g] = True
+        tensor.elements[i, g, slot] = np.asarray(records["player_id"])
+        tensor.multipliers[i, g, slot] = np.asarray(records["multiplier"])
+        tensor.is_captain[i, g, slot] = np.asarray(records["is_captain"], dtype=bool)
+        tensor.is_vice_captain[i, g, slot] = np.asarray(records["is_vice_captain"], dtype=bool)
+        return tensor
+
+    @classmethod
+    def from_raw_rows(cls, rows: Iterable[Any]) -> "PicksTensor":
+        """
+        Build from fpl_manager_picks RAW rows
+
+        The compact "picks" column (picks_codec) of every row is decoded in one
+        pass by from_encoded(). Rows written before it only have picks_json,
+        which is parsed as JSON with a fallback to a Python literal (str()
+        output) and re-encoded. Rows without a gameweek (manager summaries) are
+        skipped and rows that fail to parse are counted in parse_errors.
+        """
+        entry_ids, gameweeks, encoded = [], [], []
+        parse_errors = 0
+        for row in rows:
+            columns = row.columns or {}
+            if "gameweek" not in columns:
+                # Manager summary rows share the table
+                continue
+            try:
+                key = (int(columns["entry_id"]), int(columns["gameweek"]))
+                picks = columns.get("picks")
+                if isinstance(picks, str):
+                    picks = json.loads(picks)
+                elif picks is None:
+                    picks_json = columns.get("picks_json", "[]")
+                    try:
+                        picks = encode_picks(json.loads(picks_json))
+                    except (TypeError, ValueError):
+                        picks = encode_picks(ast.literal_eval(picks_json))
+            except (AttributeError, KeyError, TypeError, ValueError, SyntaxError):
+                parse_errors += 1
+                continue
+            entry_ids.append(key[0])
+            gameweeks.append(key[1])
+            encoded.append(picks)
+
+        tensor = cls.from_encoded(entry_ids, gameweeks, encoded)
+        tensor.parse_errors += parse_errors
+        return tensor
+
+    def set_picks(self, entry_id: int, gameweek: int, picks: list[dict[str, Any]]) -> None:
+        """Store the picks of one manager and gameweek"""
+        i = self._entry_index[entry_id]
+        g = self._gameweek_index[gameweek]
+        for k, pick in enumerate(picks[:SQUAD_SIZE]):
+            slot = int(pick.get("position") or k + 1) - 1
+            if not 0 <= slot < SQUAD_SIZE:
+                continue
+            self.elements[i, g, slot] = pick["element"]
+            self.multipliers[i, g, slot] = pick.get("multiplier", 0)
+            self.is_captain[i, g, slot] = bool(pick.get("is_captain"))
+            self.is_vice_captain[i, g, slot] = bool(pick.get("is_vice_captain"))
+        self.filled[i, g] = True
+
+    def entry_index(self, entry_id: int) -> int:
+        """Row of a manager"""
+        return self._entry_index[entry_id]
+
+    def gameweek_index(self, gameweek: int) -> int:
+        """Column of a gameweek"""
+        return self._gameweek_index[gameweek]
+
+    def records(self) -> dict[str, np.ndarray]:
+        """
+        One row per stored pick, as column arrays
+
+        Returns:
+            entry_id, gameweek, player_id, position, multiplier, is_captain and
+            is_vice_captain arrays of equal length
+        """
+        i, g, slot = np.nonzero(self.elements)
+        return {
+            "entry_id": np.asarray(self.entry_ids, dtype=np.int64)[i],
+            "gameweek": np.asarray(self.gameweeks, dtype=np.int64)[g],
+            "player_id": self.elements[i, g, slot],
+            "position": slot + 1,
+            "multiplier": self.multipliers[i, g, slot],
+            "is_captain": self.is_captain[i, g, slot],
+            "is_vice_captain": self.is_vice_captain[i, g, slot]
+        }
+
+    def captains(self) -> np.ndarray:
+        """Captain player ID per manager and gameweek (0 if none)"""
+        return np.where(self.is_captain, self.elements, 0).max(axis=2)
+
+    def vice_captains(self) -> np.ndarray:
+        """Vice-captain player ID per manager and gameweek (0 if none)"""
+        return np.where(self.is_vice_captain, self.elements, 0).max(axis=2)
+
+    def position_counts(self, element_types: np.ndarray) -> np.ndarray:
+        """
+        Starting 11 players per position
+
+        Args:
+            element_types: id_lookup() of player ID -> element_type
+
+        Returns:
+            managers x gameweeks x 5 counts, indexed by element_type (1 GK ... 4 FWD)
+        """
+        types = _gather(element_types, self.elements[:, :, :STARTERS])
+        return np.stack([(types == code).sum(axis=2) for code in range(5)], axis=2)
+
+    def formations(self, element_types: np.ndarray) -> np.ndarray:
+        """Formation per manager and gameweek as "DEF-MID-FWD" (None where no picks)"""
+        counts = self.position_counts(element_types)
+        formations = np.full(self.filled.shape, None, dtype=object)
+        for i, g in zip(*np.nonzero(self.filled)):
+            formations[i, g] = f"{counts[i, g, 2]}-{counts[i, g, 3]}-{counts[i, g, 4]}"
+        return formations
+
+    def _player_points(self, points: np.ndarray) -> np.ndarray:
+        """Points of the picked players, before multipliers (0 outside the points array)"""
+        gameweeks = np.broadcast_to(np.asarray(self.gameweeks, dtype=np.int64)[None, :, None], self.elements.shape)
+        inside = (self.elements < points.shape[0]) & (gameweeks < points.shape[1])
+        return np.where(inside, points[np.where(inside, self.elements, 0), np.where(inside, gameweeks, 0)], 0)
+
+    def pick_points(self, points: np.ndarray) -> np.ndarray:
+        """
+        Points scored by every pick, multiplier applied
+
+        Args:
+            points: Player x gameweek points, indexed [player_id, gameweek]
+
+        Returns:
+            managers x gameweeks x 15 points
+        """
+        return self._player_points(points) * self.multipliers
+
+    def captain_points(self, points: np.ndarray) -> np.ndarray:
+        """Extra points from captaincy (and triple captain) per manager and gameweek"""
+        extra = np.maximum(self.multipliers.astype(np.int32) - 1, 0)
+        return (self._player_points(points) * extra).sum(axis=2)
+
+    def points_by_player(self, points: np.ndarray, entry_id: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Points each player earned for the managers, multiplier applied
+
+        Args:
+            points: Player x gameweek points, indexed [player_id, gameweek]
+            entry_id: Only count this manager's picks
+
+        Returns:
+            (player IDs, points) of every player picked at least once
+        """
+        elements = self.elements
+        pick_points = self.pick_points(points)
+        if entry_id is not None:
+            i = self._entry_index[entry_id]
+            elements, pick_points = elements[i], pick_points[i]
+        picked = elements > 0
+        totals = np.bincount(elements[picked], weights=pick_points[picked])
+        player_ids = np.unique(elements[picked])
+        return player_ids, totals[player_ids]
+
+    def team_usage(self, player_teams: np.ndarray, starters_only: bool = False) -> np.ndarray:
+        """
+        Picks per manager and Premier League team, over all gameweeks
+
+        Args:
+            player_teams: id_lookup() of player ID -> team ID
+            starters_only: Only count the starting 11
+
+        Returns:
+            managers x (max team ID + 1) counts
+        """
+        elements = self.elements[:, :, :STARTERS] if starters_only else self.elements
+        teams = _gather(player_teams, elements)
+        team_count = int(player_teams.max(initial=0)) + 1
+        rows = np.broadcast_to(np.arange(len(self.entry_ids))[:, None, None], teams.shape)
+        picked = elements > 0
+        flat = rows[picked] * team_count + teams[picked]
+        return np.bincount(flat, minlength=len(self.entry_ids) * team_count).reshape(-1, team_count)
+
+    def squad_changes(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Players brought in against each manager's previous stored gameweek
+
+        Returns:
+            (new, changes): managers x gameweeks x 15 mask of picks not in the
+            previous squad, and managers x gameweeks number of new players. The
+            first stored gameweek of a manager has no changes.
+        """
+        new = np.zeros(self.elements.shape, dtype=bool)
+        # Previous filled gameweek per manager and gameweek (-1 if none)
+        columns = np.where(self.filled, np.arange(len(self.gameweeks))[None, :], -1)
+        previous = np.maximum.accumulate(columns, axis=1)
+        previous = np.concatenate([np.full((len(self.entry_ids), 1), -1), previous[:, :-1]], axis=1)
+
+        compare = self.filled & (previous >= 0)
+        if compare.any():
+            i, g = np.nonzero(compare)
+            current = self.elements[i, g]
+            before = self.elements[i, previous[i, g]]
+            new[i, g] = (current > 0) & ~(current[:, :, None] == before[:, None, :]).any(axis=2)
+        return new, new.sum(axis=2)
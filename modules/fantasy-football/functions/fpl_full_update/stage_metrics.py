@@ -0,0 +1,127 @@
+"""
+Stage Metrics
+Wall time, HTTP and CDF write measurements per step of a function run
+"""
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of unsorted values (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+
+class StageMetrics:
+    """
+    Per-step timing and request counters for one invocation
+
+    A step is measured by reading the cumulative counters of the HTTP
+    transports, the rate limiter and the instance writer when it starts and
+    again when it ends. Steps should therefore not overlap in time: requests made
+    by worker threads during a step are counted towards it. Work interleaved
+    within a step (e.g. formations computed while picks stream in) is measured
+    with timer(), which records time only.
+    """
+
+    def __init__(self, function: str, transports: list[Any] | None = None, limiter: Any = None):
+        """
+        Initialize metrics
+
+        Args:
+            function: Function external ID, included in every log line
+            transports: HTTP transports whose requests are counted
+            limiter: Rate limiter whose waiting time is counted
+        """
+        self.function = function
+        self.transports = list(transports or [])
+        self.limiter = limiter
+        self._steps: dict[str, dict[str, Any]] = {}
+        self._http_ms: dict[str, list[float]] = {}
+        self._cdf_ms: dict[str, list[float]] = {}
+
+    def track(self, transport: Any) -> None:
+        """Also count the requests of a transport created during the run"""
+        if transport not in self.transports:
+            self.transports.append(transport)
+
+    def _entry(self, name: str) -> dict[str, Any]:
+        if name not in self._steps:
+            self._steps[name] = {"seconds": 0.0, "calls": 0}
+        return self._steps[name]
+
+    @contextmanager
+    def step(self, name: str, writer: Any = None) -> Iterator[None]:
+        """
+        Measure a step; repeated steps of the same name are added up
+
+        Args:
+            name: Step name (e.g. "teams", "picks")
+            writer: Instance writer whose writes are counted
+        """
+        transports = list(self.transports)
+        http_before = [transport.counters() for transport in transports]
+        throttled_before = self.limiter.throttled_seconds if self.limiter is not None else 0.0
+        writer_before = writer.counters() if writer is not None else None
+        self._entry(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self._entry(name)
+            entry["seconds"] += time.perf_counter() - started
+            entry["calls"] += 1
+
+            # Transports added with track() during the step start from zero
+            for transport in self.transports[len(transports):]:
+                transports.append(transport)
+                http_before.append({"requests": 0, "bytes": 0, "latencies": 0})
+            http_ms = self._http_ms.setdefault(name, [])
+            for transport, before in zip(transports, http_before):
+                after = transport.counters()
+                entry["http_requests"] = entry.get("http_requests", 0) + after["requests"] - before["requests"]
+                entry["http_bytes"] = entry.get("http_bytes", 0) + after["bytes"] - before["bytes"]
+                http_ms.extend(transport.latencies_ms[before["latencies"]:after["latencies"]])
+            if self.limiter is not None:
+                entry["throttled_seconds"] = entry.get("throttled_seconds", 0.0) + self.limiter.throttled_seconds - throttled_before
+
+            if writer is not None:
+                after = writer.counters()
+                entry["cdf_apply_calls"] = entry.get("cdf_apply_calls", 0) + after["apply_calls"] - writer_before["apply_calls"]
+                entry["cdf_items"] = entry.get("cdf_items", 0) + after["items"] - writer_before["items"]
+                entry["cdf_backoff_seconds"] = entry.get("cdf_backoff_seconds", 0.0) + after["backoff_seconds"] - writer_before["backoff_seconds"]
+                self._cdf_ms.setdefault(name, []).extend(writer.latencies_ms[writer_before["latencies"]:after["latencies"]])
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Add the time of a block to a step, without request counters"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self._entry(name)
+            entry["seconds"] += time.perf_counter() - started
+            entry["calls"] += 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Measurements per step, in the order the steps first ran"""
+        result = {}
+        for name, entry in self._steps.items():
+            step = {key: round(value, 3) if isinstance(value, float) else value for key, value in entry.items()}
+            if name in self._http_ms:
+                step["http_p50_ms"] = percentile(self._http_ms[name], 0.50)
+                step["http_p95_ms"] = percentile(self._http_ms[name], 0.95)
+            if name in self._cdf_ms:
+                step["cdf_p50_ms"] = percentile(self._cdf_ms[name], 0.50)
+                step["cdf_p95_ms"] = percentile(self._cdf_ms[name], 0.95)
+            result[name] = step
+        return result
+
+    def log(self) -> None:
+        """Print one JSON line per step"""
+        for name, step in self.stats().items():
+            print(json.dumps({"event": "step_metrics", "function": self.function, "step": name, **step}, sort_keys=True))
@@ -0,0 +1,189 @@
+"""
+CDF Instance Writer
+Auto-chunked, concurrent data modeling writes with retries on throttling
+"""
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Sequence
+
+from cognite.client import CogniteClient
+from cognite.client.data_classes.data_modeling import NodeApply
+from cognite.client.exceptions import CogniteAPIError
+
+try:
+    from node_hashes import HashEntry, NodeHashStore
+except ImportError:
+    from .node_hashes import HashEntry, NodeHashStore
+
+# Maximum number of items accepted by one instances.apply call
+MAX_APPLY_ITEMS = 1000
+
+# CDF responses that mean "slow down and try again"
+THROTTLE_CODES = (429, 503)
+
+
+def view_of(node: NodeApply) -> str:
+    """External ID of the first view a node writes to"""
+    if not node.sources:
+        return "unknown"
+    source = node.sources[0]
+    if isinstance(source, dict):
+        source = source.get("source", source)
+    else:
+        source = source.source
+    if isinstance(source, dict):
+        return source.get("externalId", "unknown")
+    return getattr(source, "external_id", "unknown")
+
+
+class InstanceWriter:
+    """
+    Writes nodes in chunks of up to MAX_APPLY_ITEMS, several chunks at a time
+
+    Nodes are grouped per view before chunking, so write counts and latencies
+    can be reported per view. Chunks throttled by CDF (HTTP 429/503) are retried
+    with exponential backoff; other errors are raised to the caller. Chunks of
+    one apply() call run concurrently, so a node should appear at most once per call.
+
+    With a hash store, nodes whose content equals what was last written are
+    skipped, and the hashes of written nodes are recorded once their chunk succeeds.
+    """
+
+    def __init__(
+        self,
+        client: CogniteClient,
+        max_workers: int = 4,
+        chunk_size: int = MAX_APPLY_ITEMS,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        hash_store: NodeHashStore | None = None
+    ):
+        """
+        Initialize writer
+
+        Args:
+            client: CogniteClient instance
+            max_workers: Chunks applied at the same time
+            chunk_size: Nodes per apply call (capped at the API maximum)
+            max_retries: Retries of a throttled chunk before giving up
+            base_backoff: Pause before the first retry (seconds), doubled on each retry
+            max_backoff: Upper bound for any pause (seconds)
+            hash_store: Content hashes of earlier writes, to skip unchanged nodes
+        """
+        self.client = client
+        self.max_workers = max(1, int(max_workers))
+        self.chunk_size = max(1, min(int(chunk_size), MAX_APPLY_ITEMS))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hash_store = hash_store
+
+        self._lock = threading.Lock()
+        self._nodes: dict[str, int] = defaultdict(int)
+        self._skipped: dict[str, int] = defaultdict(int)
+        self._latencies: dict[str, list[float]] = defaultdict(list)
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        self.apply_calls = 0
+        self.latencies_ms: list[float] = []
+
+    def apply(self, nodes: Sequence[NodeApply]) -> int:
+        """
+        Write nodes, blocking until every chunk is applied
+
+        Args:
+            nodes: Nodes to write (any number, any mix of views)
+
+        Returns:
+            Number of nodes written (unchanged nodes are not counted)
+        """
+        by_view: dict[str, list[tuple[NodeApply, HashEntry | None]]] = defaultdict(list)
+        for node in nodes:
+            view = view_of(node)
+            entry = None
+            if self.hash_store is not None:
+                entry = self.hash_store.entry(node)
+                if self.hash_store.unchanged(entry):
+                    with self._lock:
+                        self._skipped[view] += 1
+                    continue
+            by_view[view].append((node, entry))
+
+        chunks = [
+            (view, view_nodes[i:i + self.chunk_size])
+            for view, view_nodes in by_view.items()
+            for i in range(0, len(view_nodes), self.chunk_size)
+        ]
+        if len(chunks) <= 1 or self.max_workers == 1:
+            for view, chunk in chunks:
+                self._apply_chunk(view, chunk)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                futures = [pool.submit(self._apply_chunk, view, chunk) for view, chunk in chunks]
+                for future in futures:
+                    future.result()
+        return sum(len(chunk) for _, chunk in chunks)
+
+    def _apply_chunk(self, view: str, items: list[tuple[NodeApply, HashEntry | None]]) -> None:
+        chunk = [node for node, _ in items]
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            with self._lock:
+                self.apply_calls += 1
+            try:
+                self.client.data_modeling.instances.apply(nodes=chunk, auto_create_direct_relations=True)
+            except CogniteAPIError as e:
+                if e.code not in THROTTLE_CODES or attempt >= self.max_retries:
+                    raise
+                delay = min(self.base_backoff * 2 ** attempt, self.max_backoff)
+                with self._lock:
+                    self.retries += 1
+                    self.backoff_seconds += delay
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._nodes[view] += len(chunk)
+                self._latencies[view].append(elapsed_ms)
+                self.latencies_ms.append(elapsed_ms)
+            if self.hash_store is not None:
+                self.hash_store.record([entry for _, entry in items])
+            return
+
+    def counters(self) -> dict[str, Any]:
+        """Cumulative write counters (latencies is the length of latencies_ms)"""
+        with self._lock:
+            return {
+                "apply_calls": self.apply_calls,
+                "items": sum(self._nodes.values()),
+                "backoff_seconds": self.backoff_seconds,
+                "latencies": len(self.latencies_ms)
+            }
+
+    def stats(self) -> dict[str, Any]:
+        """Written and skipped counts and chunk latencies per view"""
+        with self._lock:
+            views = {}
+            for view in sorted(set(self._latencies) | set(self._skipped)):
+                ordered = sorted(self._latencies.get(view, []))
+                views[view] = {
+                    "written": self._nodes.get(view, 0),
+                    "skipped": self._skipped.get(view, 0),
+                    "chunks": len(ordered),
+                    "p50_ms": round(ordered[len(ordered) // 2], 1) if ordered else None,
+                    "max_ms": round(ordered[-1], 1) if ordered else None
+                }
+            return {
+                "views": views,
+                "written": sum(self._nodes.values()),
+                "skipped": sum(self._skipped.values()),
+                "chunks": sum(len(latencies) for latencies in self._latencies.values()),
+                "retries": self.retries,
+                "backoff_seconds": round(self.backoff_seconds, 2)
+            }
@@ -3,30 +3,51 @@ Weekly FPL Data Update Function
 Fetches latest data from FPL API and updates the data model in CDF
 """
 import os
-import requests
-import numpy as np
 from datetime import datetime
 from typing import Any
 from collections import defaultdict
 from cognite.client import CogniteClient
 from cognite.client.data_classes.data_modeling import NodeApply, ViewId
 
+from cdf_writer import InstanceWriter
+from http_transport import get_shared_transport
+from league_standings import league_entries
+from manager_analytics import LeagueHistory
+from node_hashes import NodeHashStore
+from watermarks import WatermarkStore, next_watermark
+
+
+def fetch_json(url: str) -> Any:
+    """GET a FPL API URL through the pooled, rate-limited transport and return the decoded JSON body"""
+    return get_shared_transport().get_json(url)
 
 def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
     """
     Fetch latest FPL data and update CDF data model with enhanced analytics
+    
+    Performance records are written incrementally: finished gameweeks already
+    ingested for a manager are skipped, and nodes whose content did not change
+    since the last run are not re-applied, unless data["full_rebuild"] is set.
     """
     SPACE = "fantasy_football"
     FPL_LEAGUE_ID = data.get("league_id") or os.getenv("FPL_LEAGUE_ID", "sl9tyc")
     
-    stats = {"teams": 0, "gameweeks": 0, "managers": 0, "performance": 0, "players": 0, "team_betting": 0}
+    stats = {"teams": 0, "gameweeks": 0, "managers": 0, "performance": 0, "players": 0, "team_betting": 0,
+             "rate_limiter": {}, "watermarks": {}, "writer": {}, "node_hashes": {}}
+    
+    full_rebuild = bool(data.get("full_rebuild", False))
+    watermarks = WatermarkStore(client, scope="fpl_weekly_update")
+    node_hashes = NodeHashStore(client, scope="fpl_weekly_update")
+    writer = InstanceWriter(client, max_workers=data.get("write_workers", 4), hash_store=node_hashes)
     
     try:
+        if not full_rebuild:
+            watermarks.load()
+            node_hashes.load()
+        
         # 1. Fetch bootstrap data (teams, gameweeks)
         print("Fetching FPL bootstrap data...")
-        response = requests.get("https://fantasy.premierleague.com/api/bootstrap-static/")
-        response.raise_for_status()
-        bootstrap = response.json()
+        bootstrap = fetch_json("https://fantasy.premierleague.com/api/bootstrap-static/")
         
         # 2. Create Team nodes
         team_nodes = []
@@ -46,12 +67,13 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
             ))
         
         if team_nodes:
-            client.data_modeling.instances.apply(team_nodes)
+            writer.apply(team_nodes)
             stats["teams"] = len(team_nodes)
             print(f"✓ Loaded {len(team_nodes)} teams")
         
         # 3. Create Gameweek nodes
         gameweek_nodes = []
+        finished_gws = {event["id"] for event in bootstrap.get("events", []) if event.get("finished")}
         for event in bootstrap.get("events", []):
             gameweek_nodes.append(NodeApply(
                 space=SPACE,
@@ -71,7 +93,7 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
             ))
         
         if gameweek_nodes:
-            client.data_modeling.instances.apply(gameweek_nodes)
+            writer.apply(gameweek_nodes)
             stats["gameweeks"] = len(gameweek_nodes)
             print(f"✓ Loaded {len(gameweek_nodes)} gameweeks")
         
@@ -105,82 +127,53 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
             ))
         
         if player_nodes:
-            client.data_modeling.instances.apply(player_nodes)
+            writer.apply(player_nodes)
             stats["players"] = len(player_nodes)
             print(f"✓ Loaded {len(player_nodes)} players")
         
-        # 5. Fetch league standings
+        # 5. Fetch league standings (every page)
         print(f"Fetching league {FPL_LEAGUE_ID} standings...")
-        league_response = requests.get(
-            f"https://fantasy.premierleague.com/api/leagues-classic/{FPL_LEAGUE_ID}/standings/"
-        )
-        league_response.raise_for_status()
-        league_data = league_response.json()
+        standings = league_entries(lambda page: fetch_json(
+            f"https://fantasy.premierleague.com/api/leagues-classic/{FPL_LEAGUE_ID}/standings/?page_standings={page}"
+        ))
         
         # 6. Create Manager nodes with analytics and performance records
-        manager_nodes = []
+        manager_properties = {}
         performance_nodes = []
+        ingest_gameweeks = {}
+        
+        # Histories are packed into managers x gameweeks matrices; the analytics of
+        # all managers are computed together once every history is in
+        league_history = LeagueHistory([standing["entry"] for standing in standings], len(bootstrap.get("events", [])))
         
-        for standing in league_data["standings"]["results"]:
+        for standing in standings:
             entry_id = standing["entry"]
             
             # Fetch manager history
-            history_response = requests.get(
+            history_data = fetch_json(
                 f"https://fantasy.premierleague.com/api/entry/{entry_id}/history/"
             )
-            history_response.raise_for_status()
-            history_data = history_response.json()
-            current_gw_data = history_data.get("current", [])
+            league_history.add(entry_id, history_data.get("current", []))
             
-            # Compute analytics
-            if current_gw_data:
-                weekly_points = [gw['points'] for gw in current_gw_data]
-                
-                if len(weekly_points) > 1 and np.mean(weekly_points) > 0:
-                    points_mean = float(np.mean(weekly_points))
-                    points_std = float(np.std(weekly_points))
-                    coeff_variation = points_std / points_mean
-                    consistency_score = max(0, min(100, 100 * (1 - min(coeff_variation, 1))))
-                else:
-                    points_mean = float(np.mean(weekly_points)) if weekly_points else 0.0
-                    points_std = 0.0
-                    consistency_score = 0.0
-                
-                starting_value = current_gw_data[0]['value'] / 10.0
-                current_value = current_gw_data[-1]['value'] / 10.0
-                team_value_growth = current_value - starting_value
-                total_transfers = sum(gw.get('event_transfers', 0) for gw in current_gw_data)
-            else:
-                points_mean = points_std = consistency_score = team_value_growth = 0.0
-                total_transfers = 0
-            
-            # Create manager node
-            manager_nodes.append(NodeApply(
-                space=SPACE,
-                external_id=f"manager_{entry_id}",
-                sources=[{
-                    "source": ViewId(space=SPACE, external_id="Manager", version="1"),
-                    "properties": {
-                        "entryId": entry_id,
-                        "managerName": standing["player_name"],
-                        "teamName": standing["entry_name"],
-                        "overallPoints": history_data["current"][0]["total_points"] if history_data.get("current") else 0,
-                        "overallRank": history_data["current"][0]["rank"] if history_data.get("current") else 0,
-                        "leagueRank": standing["rank"],
-                        "teamValue": history_data["current"][0]["value"] / 10.0 if history_data.get("current") else 0.0,
-                        "consistencyScore": round(consistency_score, 2),
-                        "averagePointsPerWeek": round(points_mean, 2),
-                        "pointsStdDev": round(points_std, 2),
-                        "teamValueGrowth": round(team_value_growth, 2),
-                        "totalTransfers": total_transfers,
-                        "transferSuccessRate": 0.0,  # Would require transfer analysis
-                        "successfulTransfers": 0
-                    }
-                }]
-            ))
+            manager_properties[entry_id] = {
+                "entryId": entry_id,
+                "managerName": standing["player_name"],
+                "teamName": standing["entry_name"],
+                "overallPoints": history_data["current"][0]["total_points"] if history_data.get("current") else 0,
+                "overallRank": history_data["current"][0]["rank"] if history_data.get("current") else 0,
+                "leagueRank": standing["rank"],
+                "teamValue": history_data["current"][0]["value"] / 10.0 if history_data.get("current") else 0.0,
+                "transferSuccessRate": 0.0,  # Would require transfer analysis
+                "successfulTransfers": 0
+            }
             
-            # Create performance records for each gameweek
+            # Create performance records for gameweeks above the manager's watermark
+            watermark = watermarks.get(entry_id)
+            ingest_gameweeks[entry_id] = []
             for gw_data in history_data.get("current", []):
+                if gw_data["event"] <= watermark:
+                    continue
+                ingest_gameweeks[entry_id].append(gw_data["event"])
                 performance_nodes.append(NodeApply(
                     space=SPACE,
                     external_id=f"perf_{entry_id}_gw_{gw_data['event']}",
@@ -201,16 +194,41 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
                     }]
                 ))
         
+        analytics = league_history.manager_properties()
+        manager_nodes = [
+            NodeApply(
+                space=SPACE,
+                external_id=f"manager_{entry_id}",
+                sources=[{
+                    "source": ViewId(space=SPACE, external_id="Manager", version="1"),
+                    "properties": {**properties, **analytics[entry_id]}
+                }]
+            )
+            for entry_id, properties in manager_properties.items()
+        ]
+        
         if manager_nodes:
-            client.data_modeling.instances.apply(manager_nodes)
+            writer.apply(manager_nodes)
             stats["managers"] = len(manager_nodes)
             print(f"✓ Loaded {len(manager_nodes)} managers")
         
         if performance_nodes:
-            client.data_modeling.instances.apply(performance_nodes)
+            writer.apply(performance_nodes)
             stats["performance"] = len(performance_nodes)
             print(f"✓ Loaded {len(performance_nodes)} performance records")
         
+        # Advance watermarks only after the performance records are written
+        for entry_id, gameweeks in ingest_gameweeks.items():
+            watermarks.advance(entry_id, next_watermark(watermarks.get(entry_id), gameweeks, finished_gws, set()))
+        stats["watermarks"] = {
+            "mode": "full" if full_rebuild else "incremental",
+            "gameweeks_ingested": sum(len(gws) for gws in ingest_gameweeks.values()),
+            "updated": watermarks.save()
+        }
+        stats["node_hashes"] = {"rows_written": node_hashes.save(), **node_hashes.stats()}
+        stats["rate_limiter"] = get_shared_transport().limiter.stats()
+        stats["writer"] = writer.stats()
+        
         return {
             "status": "success",
             "message": "FPL data updated successfully",
@@ -220,6 +238,7 @@ def handle(data: dict[str, Any], client: CogniteClient) -> dict[str, Any]:
         
     except Exception as e:
         print(f"Error: {e}")
+        stats["writer"] = writer.stats()
         return {
             "status": "error",
             "message": str(e),
@@ -0,0 +1,180 @@
+"""
+Manager Analytics
+Season analytics for every manager of a league, computed in batch over
+managers x gameweeks matrices built from entry/{id}/history/ responses
+"""
+from typing import Any, Iterable
+
+import numpy as np
+
+# Gameweeks in the rolling form window
+ROLLING_WINDOW = 5
+
+
+def _run_lengths(flags: np.ndarray) -> np.ndarray:
+    """Length of the run of True values ending at each column, per row"""
+    counts = np.cumsum(flags, axis=1)
+    resets = np.maximum.accumulate(np.where(flags, 0, counts), axis=1)
+    return counts - resets
+
+
+def _row_mean(values: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Mean of the masked values of each row (0 for empty rows) and the masked counts"""
+    counts = mask.sum(axis=1)
+    totals = np.where(mask, values, 0.0).sum(axis=1)
+    return np.divide(totals, counts, out=np.zeros(len(values)), where=counts > 0), counts
+
+
+class LeagueHistory:
+    """
+    Gameweek history of every manager in a league, as managers x gameweeks matrices
+
+    Rows follow entry_ids and column g holds gameweek g + 1. Gameweeks a manager
+    has no history for (not yet played, or joined later) are NaN.
+    """
+
+    def __init__(self, entry_ids: Iterable[int], max_gameweek: int = 38):
+        """
+        Initialize empty matrices
+
+        Args:
+            entry_ids: Manager entry IDs
+            max_gameweek: Number of gameweeks in the season
+        """
+        self.entry_ids = list(dict.fromkeys(entry_ids))
+        self._index = {entry_id: i for i, entry_id in enumerate(self.entry_ids)}
+
+        shape = (len(self.entry_ids), max(max_gameweek, 1))
+        self.points = np.full(shape, np.nan)
+        self.values = np.full(shape, np.nan)
+        self.transfers = np.full(shape, np.nan)
+        self.overall_ranks = np.full(shape, np.nan)
+
+    def add(self, entry_id: int, current: list[dict[str, Any]]) -> None:
+        """
+        Store a manager's history
+
+        Args:
+            entry_id: Manager entry ID
+            current: "current" list of the entry/{id}/history/ response
+        """
+        i = self._index[entry_id]
+        for gw_data in current:
+            g = gw_data['event'] - 1
+            if not 0 <= g < self.points.shape[1]:
+                continue
+            self.points[i, g] = gw_data['points']
+            self.values[i, g] = gw_data.get('value', 0) / 10.0
+            self.transfers[i, g] = gw_data.get('event_transfers', 0)
+            overall_rank = gw_data.get('overall_rank')
+            self.overall_ranks[i, g] = overall_rank if overall_rank else np.nan
+
+    def analytics(self, window: int = ROLLING_WINDOW) -> dict[str, np.ndarray]:
+        """
+        Compute every manager's analytics at once
+
+        Args:
+            window: Gameweeks in the rolling form window
+
+        Returns:
+            Arrays aligned with entry_ids:
+            - average_points, points_std: mean and (population) standard deviation of weekly points
+            - consistency_score: 0-100, 100 * (1 - coefficient of variation), 0 with fewer than 2 gameweeks
+            - team_value, team_value_growth: latest team value and growth since the first gameweek (£m)
+            - total_transfers: transfers made this season
+            - rolling_form: mean points over the last `window` gameweeks up to the latest one played
+            - current_streak, longest_streak: consecutive gameweeks above the league average
+            - rank_volatility: standard deviation of the gameweek-to-gameweek change in
+              log overall rank, in percent (0 with fewer than 2 ranked gameweeks)
+        """
+        managers, gameweeks = self.points.shape
+        rows = np.arange(managers)
+        played = ~np.isnan(self.points)
+        points = np.where(played, self.points, 0.0)
+
+        # Mean, spread and consistency of weekly points
+        average_points, counts = _row_mean(points, played)
+        squared = np.where(played, (points - average_points[:, None]) ** 2, 0.0).sum(axis=1)
+        points_std = np.sqrt(np.divide(squared, counts, out=np.zeros(managers), where=counts > 0))
+        variation = np.divide(points_std, average_points, out=np.ones(managers), where=average_points > 0)
+        consistency_score = np.where(
+            (counts > 1) & (average_points > 0),
+            np.clip(100 * (1 - np.minimum(variation, 1)), 0, 100),
+            0.0
+        )
+
+        # First and latest gameweek each manager played
+        has_history = counts > 0
+        first = played.argmax(axis=1)
+        latest = gameweeks - 1 - played[:, ::-1].argmax(axis=1)
+        team_value = np.where(has_history, self.values[rows, latest], np.nan)
+        team_value_growth = np.where(has_history, team_value - self.values[rows, first], 0.0)
+        total_transfers = np.where(np.isnan(self.transfers), 0, self.transfers).sum(axis=1).astype(np.int64)
+
+        # Rolling form: windowed sums from cumulative sums along the gameweeks
+        cumulative = np.cumsum(points, axis=1)
+        cumulative_played = np.cumsum(played, axis=1)
+        shifted = np.zeros_like(cumulative)
+        shifted_played = np.zeros_like(cumulative_played)
+        if gameweeks > window:
+            shifted[:, window:] = cumulative[:, :-window]
+            shifted_played[:, window:] = cumulative_played[:, :-window]
+        window_played = cumulative_played - shifted_played
+        form = np.divide(cumulative - shifted, window_played, out=np.zeros_like(cumulative), where=window_played > 0)
+        rolling_form = np.where(has_history, form[rows, latest], 0.0)
+
+        # Streaks of gameweeks above the league average
+        league_average = np.divide(
+            points.sum(axis=0), played.sum(axis=0), out=np.zeros(gameweeks), where=played.sum(axis=0) > 0
+        )
+        runs = _run_lengths(played & (points > league_average[None, :]))
+        longest_streak = runs.max(axis=1)
+        current_streak = np.where(has_history, runs[rows, latest], 0)
+
+        # Rank volatility over consecutive ranked gameweeks
+        ranked = ~np.isnan(self.overall_ranks)
+        log_ranks = np.log(np.where(ranked, self.overall_ranks, 1.0))
+        changes = np.diff(log_ranks, axis=1)
+        consecutive = ranked[:, 1:] & ranked[:, :-1]
+        mean_change, change_counts = _row_mean(changes, consecutive)
+        squared_changes = np.where(consecutive, (changes - mean_change[:, None]) ** 2, 0.0).sum(axis=1)
+        rank_volatility = 100 * np.sqrt(
+            np.divide(squared_changes, change_counts, out=np.zeros(managers), where=change_counts > 1)
+        )
+
+        return {
+            "average_points": average_points,
+            "points_std": points_std,
+            "consistency_score": consistency_score,
+            "team_value": team_value,
+            "team_value_growth": team_value_growth,
+            "total_transfers": total_transfers,
+            "rolling_form": rolling_form,
+            "current_streak": current_streak.astype(np.int64),
+            "longest_streak": longest_streak.astype(np.int64),
+            "rank_volatility": rank_volatility
+        }
+
+    def manager_properties(self, analytics: dict[str, np.ndarray] | None = None) -> dict[int, dict[str, Any]]:
+        """
+        Manager view analytics properties, keyed by entry ID
+
+        Args:
+            analytics: Result of analytics(), computed with the default window if not given
+        """
+        if analytics is None:
+            analytics = self.analytics()
+        return {
+            entry_id: {
+                "consistencyScore": round(float(analytics["consistency_score"][i]), 2),
+                "averagePointsPerWeek": round(float(analytics["average_points"][i]), 2),
+                "pointsStdDev": round(float(analytics["points_std"][i]), 2),
+                "teamValueGrowth": round(float(analytics["team_value_growth"][i]), 2),
+                "totalTransfers": int(analytics["total_transfers"][i]),
+                "rollingForm": round(float(analytics["rolling_form"][i]), 2),
+                "currentStreak": int(analytics["current_streak"][i]),
+                "longestStreak": int(analytics["longest_streak"][i]),
+                "rankVolatility": round(float(analytics["rank_volatility"][i]), 2)
+            }
+            for i, entry_id in enumerate(self.entry_ids)
+        }
@@ -15,6 +15,7 @@ from cognite.client.data_classes.data_modeling import NodeApply, NodeOrEdgeData
 
 # Add parent directory to path to import odds_fetcher
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from src.http_transport import get_shared_transport
 from src.odds_fetcher import OddsFetcher
 
 load_dotenv()
@@ -55,9 +56,7 @@ def fetch_fpl_fixtures():
     url = "https://fantasy.premierleague.com/api/fixtures/"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        fixtures = response.json()
+        fixtures = get_shared_transport().get_json(url)
         print(f"✓ Fetched {len(fixtures)} fixtures")
         return fixtures
     except requests.exceptions.RequestException as e:
@@ -71,9 +70,7 @@ def fetch_fpl_teams():
     url = "https://fantasy.premierleague.com/api/bootstrap-static/"
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
+        data = get_shared_transport().get_json(url)
         teams = {team['id']: team for team in data['teams']}
         print(f"✓ Fetched {len(teams)} teams")
         return teams
@@ -6,7 +6,6 @@ the ManagerTeam nodes with the formation field.
 """
 import os
 import sys
-from collections import defaultdict
 from dotenv import load_dotenv
 from cognite.client import CogniteClient
 from cognite.client.config import ClientConfig
@@ -14,6 +13,11 @@ from cognite.client.credentials import OAuthClientCredentials
 from cognite.client.data_classes.data_modeling import NodeApply, NodeOrEdgeData
 from cognite.client.data_classes.data_modeling.ids import ViewId
 
+# Add parent directory to path to import the shared CDF writer
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from src.cdf_writer import InstanceWriter
+from src.picks_tensor import POSITION_CODES, PicksTensor, id_lookup
+
 load_dotenv()
 
 SPACE = "fantasy_football"
@@ -78,7 +82,7 @@ def fetch_players(client):
 
 
 def fetch_player_selections(client):
-    """Fetch all player selections"""
+    """Fetch all player selections as a picks tensor"""
     print("Fetching player selections...")
     selection_view = ViewId(space=SPACE, external_id="PlayerSelection", version=VERSION)
     
@@ -89,61 +93,60 @@ def fetch_player_selections(client):
             limit=10000
         )
         
-        selections_by_team = defaultdict(list)
+        records = []
         for node in nodes:
             if hasattr(node, 'properties'):
                 props_dict = node.properties.dump() if hasattr(node.properties, 'dump') else node.properties
                 props = props_dict.get(SPACE, {}).get(f"PlayerSelection/{VERSION}", {})
                 
                 if props:
+                    # managerteam_{entry}_gw{gw} and player_{id}
                     manager_team = props.get('managerTeam', {}).get('externalId', '')
                     player = props.get('player', {}).get('externalId', '')
-                    multiplier = props.get('multiplier', 0)
+                    parts = manager_team.split('_')
                     
-                    if manager_team and player:
-                        selections_by_team[manager_team].append({
-                            'player_id': player,
-                            'multiplier': multiplier
+                    if len(parts) == 3 and player:
+                        records.append({
+                            'entry_id': int(parts[1]),
+                            'gameweek': int(parts[2].removeprefix('gw')),
+                            'element': int(player.removeprefix('player_')),
+                            'position': props.get('position'),
+                            'multiplier': props.get('multiplier', 0),
+                            'is_captain': props.get('isCaptain', False),
+                            'is_vice_captain': props.get('isViceCaptain', False)
                         })
         
-        print(f"✓ Fetched selections for {len(selections_by_team)} manager teams")
-        return selections_by_team
+        picks = PicksTensor.from_records(records)
+        print(f"✓ Fetched selections for {int(picks.filled.sum())} manager teams")
+        return picks
     except Exception as e:
         print(f"✗ Error fetching player selections: {e}")
-        return {}
+        return None
 
 
-def calculate_formation(selections, players_dict):
+def calculate_formations(picks, players_dict):
     """
-    Calculate formation from player selections
+    Calculate the formation of every manager team from the picks tensor
     
-    Returns formation as "DEF-MID-FWD" (e.g., "4-3-3")
+    Returns formations as "DEF-MID-FWD" (e.g., "4-3-3") keyed by ManagerTeam
+    external ID, with None for invalid or incomplete teams
     """
-    # Filter for starting XI (multiplier > 0)
-    starting_xi = [s for s in selections if s['multiplier'] > 0]
-    
-    # Count by position
-    position_counts = {'GK': 0, 'DEF': 0, 'MID': 0, 'FWD': 0}
-    
-    for selection in starting_xi:
-        player_data = players_dict.get(selection['player_id'], {})
-        position = player_data.get('position', 'UNK')
-        
-        if position in position_counts:
-            position_counts[position] += 1
+    element_types = id_lookup({
+        int(player_id.removeprefix('player_')): POSITION_CODES.get(player['position'], 0)
+        for player_id, player in players_dict.items()
+    })
+    counts = picks.position_counts(element_types)
+    formations = picks.formations(element_types)
     
-    # Return as DEF-MID-FWD (standard FPL format)
-    formation = f"{position_counts['DEF']}-{position_counts['MID']}-{position_counts['FWD']}"
+    # Valid teams have 11 starters (multiplier > 0), one of them a GK
+    valid = (picks.multipliers > 0).sum(axis=2) == 11
+    valid &= counts[:, :, POSITION_CODES['GK']] == 1
     
-    # Validate (should have 1 GK and 10 outfield = 11 total starters)
-    total_starters = len(starting_xi)
-    if total_starters != 11:
-        return None  # Invalid formation
-    
-    if position_counts['GK'] != 1:
-        return None  # Must have 1 GK
-    
-    return formation
+    result = {}
+    for i, g in zip(*picks.filled.nonzero()):
+        team_id = f"managerteam_{picks.entry_ids[i]}_gw{picks.gameweeks[g]}"
+        result[team_id] = formations[i, g] if valid[i, g] else None
+    return result
 
 
 def fetch_manager_teams(client):
@@ -177,7 +180,7 @@ def fetch_manager_teams(client):
         return []
 
 
-def update_formations(client, manager_teams, selections_by_team, players_dict):
+def update_formations(client, manager_teams, formations):
     """Update formation field for all manager teams"""
     print(f"\nCalculating and updating formations for {len(manager_teams)} teams...")
     
@@ -209,12 +212,10 @@ def update_formations(client, manager_teams, selections_by_team, players_dict):
             bench_boost_skipped += 1
             continue
         
-        selections = selections_by_team.get(team_id, [])
-        
-        if not selections:
+        if team_id not in formations:
             continue
         
-        formation = calculate_formation(selections, players_dict)
+        formation = formations[team_id]
         
         if formation:
             node = NodeApply(
@@ -234,18 +235,17 @@ def update_formations(client, manager_teams, selections_by_team, players_dict):
         else:
             invalid_formations += 1
     
-    # Update in batches
-    batch_size = 100
+    # Update in concurrent chunks
+    writer = InstanceWriter(client)
     total_updated = 0
     
-    for i in range(0, len(nodes), batch_size):
-        batch = nodes[i:i + batch_size]
-        try:
-            result = client.data_modeling.instances.apply(batch)
-            total_updated += len(batch)
-            print(f"  ✓ Updated batch {i//batch_size + 1}/{(len(nodes)-1)//batch_size + 1} ({len(batch)} teams)")
-        except Exception as e:
-            print(f"  ✗ Error updating batch: {e}")
+    try:
+        total_updated = writer.apply(nodes)
+        write_stats = writer.stats()
+        print(f"  ✓ Updated {total_updated} teams in {write_stats['chunks']} chunks "
+              f"({write_stats['retries']} throttled retries)")
+    except Exception as e:
+        print(f"  ✗ Error updating manager teams: {e}")
     
     print(f"\n✓ Successfully updated {total_updated} manager teams")
     print(f"  - Formations calculated: {formations_calculated}")
@@ -276,8 +276,8 @@ def main():
         print("✗ Failed to fetch players. Aborting.")
         return 1
     
-    selections_by_team = fetch_player_selections(client)
-    if not selections_by_team:
+    picks = fetch_player_selections(client)
+    if picks is None or not picks.entry_ids:
         print("✗ Failed to fetch player selections. Aborting.")
         return 1
     
@@ -287,7 +287,8 @@ def main():
         return 1
     
     # Calculate and update formations
-    updated, invalid, bench_boost = update_formations(client, manager_teams, selections_by_team, players_dict)
+    formations = calculate_formations(picks, players_dict)
+    updated, invalid, bench_boost = update_formations(client, manager_teams, formations)
     
     # Summary
     print("\n" + "=" * 60)
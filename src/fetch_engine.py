@@ -0,0 +1,125 @@
+"""
+Concurrent Fetch Engine
+Bounded worker pool for fanning out FPL API calls under a global request rate
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    from rate_limiter import AdaptiveRateLimiter, get_shared_limiter
+except ImportError:
+    from .rate_limiter import AdaptiveRateLimiter, get_shared_limiter
+
+
+class FetchEngine:
+    """
+    Runs fetch jobs on a thread pool while respecting a global request rate
+
+    Jobs are argument tuples, e.g. (entry_id, gameweek). Results are yielded
+    as they complete, so callers can process them while other requests are in flight.
+    Only a bounded window of jobs is submitted ahead of the caller, so results
+    never pile up in memory faster than they are consumed.
+    Pacing is done by the shared rate limiter that every FPL request goes through.
+    A requests_per_second ceiling only holds until close(), which puts the
+    limiter's previous ceiling back for later engines in the same process.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        requests_per_second: float | None = None,
+        limiter: AdaptiveRateLimiter | None = None,
+        max_pending: int | None = None
+    ):
+        """
+        Initialize fetch engine
+
+        Args:
+            max_workers: Number of concurrent requests
+            requests_per_second: Ceiling for the global request rate shared by all workers
+            limiter: Rate limiter to configure (defaults to the process-wide limiter)
+            max_pending: Jobs in flight or waiting to be consumed (defaults to 4 x max_workers)
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(self.max_workers, int(max_pending or 4 * self.max_workers))
+        self.limiter = limiter or get_shared_limiter()
+        self._previous_max_rate = None
+        if requests_per_second:
+            self._previous_max_rate = self.limiter.max_rate
+            self.limiter.configure(max_rate=float(requests_per_second))
+        self.jobs = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a single job in the current thread
+
+        Args:
+            fn: Function performing the request
+            *args: Arguments for fn
+
+        Returns:
+            Return value of fn
+        """
+        with self._lock:
+            self.jobs += 1
+        try:
+            return fn(*args)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+
+    def map(self, fn: Callable[..., Any], jobs: Iterable[tuple]) -> Iterator[tuple[tuple, Any, Exception | None]]:
+        """
+        Fetch all jobs concurrently
+
+        Args:
+            fn: Function performing the request, called as fn(*job)
+            jobs: Iterable of argument tuples
+
+        Yields:
+            (job, result, error) in completion order; error is None on success
+        """
+        jobs = list(jobs)
+        if not jobs:
+            return
+
+        remaining = iter(jobs)
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            futures = {pool.submit(self.call, fn, *job): job for job in islice(remaining, self.max_pending)}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = futures.pop(future)
+                    next_job = next(remaining, None)
+                    if next_job is not None:
+                        futures[pool.submit(self.call, fn, *next_job)] = next_job
+
+                    error = future.exception()
+                    yield job, None if error else future.result(), error
+
+    def close(self) -> None:
+        """Restore the limiter ceiling this engine replaced (safe to call twice)"""
+        if self._previous_max_rate is not None:
+            self.limiter.configure(max_rate=self._previous_max_rate)
+            self._previous_max_rate = None
+
+    def __enter__(self) -> "FetchEngine":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Job counts for the run"""
+        return {
+            "jobs": self.jobs,
+            "failures": self.failures,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "max_requests_per_second": self.limiter.max_rate
+        }
@@ -2,10 +2,14 @@
 FPL API Client
 Helper module for interacting with the Fantasy Premier League API
 """
-import time
 from typing import Any
 
-import requests
+try:
+    from http_transport import HTTPTransport, get_shared_transport
+    from league_standings import league_entries
+except ImportError:
+    from .http_transport import HTTPTransport, get_shared_transport
+    from .league_standings import league_entries
 
 
 class FPLClient:
@@ -13,18 +17,15 @@ class FPLClient:
     
     BASE_URL = "https://fantasy.premierleague.com/api"
     
-    def __init__(self, rate_limit_delay: float = 0.5):
+    def __init__(self, transport: HTTPTransport | None = None):
         """
         Initialize FPL client
         
         Args:
-            rate_limit_delay: Delay between requests in seconds
+            transport: HTTP transport for all requests (defaults to the process-wide
+                       pooled transport, which is paced by the shared rate limiter)
         """
-        self.rate_limit_delay = rate_limit_delay
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
-        })
+        self.transport = transport or get_shared_transport()
     
     def _get(self, endpoint: str) -> dict[str, Any]:
         """
@@ -36,11 +37,7 @@ class FPLClient:
         Returns:
             JSON response as dictionary
         """
-        url = f"{self.BASE_URL}/{endpoint}"
-        response = self.session.get(url)
-        response.raise_for_status()
-        time.sleep(self.rate_limit_delay)
-        return response.json()
+        return self.transport.get_json(f"{self.BASE_URL}/{endpoint}")
     
     def get_bootstrap_static(self) -> dict[str, Any]:
         """
@@ -79,6 +76,18 @@ class FPLClient:
             endpoint += f"?page_standings={page}"
         return self._get(endpoint)
     
+    def get_all_league_standings(self, league_id: int) -> list[dict[str, Any]]:
+        """
+        Get the standings of every manager in a league, across all pages
+        
+        Args:
+            league_id: FPL league ID
+        
+        Returns:
+            List of standings entries in rank order
+        """
+        return league_entries(lambda page: self.get_league_standings(league_id, page))
+    
     def get_entry(self, entry_id: int) -> dict[str, Any]:
         """
         Get manager entry details
@@ -103,6 +112,18 @@ class FPLClient:
         """
         return self._get(f"entry/{entry_id}/history/")
     
+    def get_entry_transfers(self, entry_id: int) -> list[dict[str, Any]]:
+        """
+        Get every transfer a manager made this season
+        
+        Args:
+            entry_id: FPL entry (team) ID
+        
+        Returns:
+            List of transfers (element_in, element_out, their costs, event and time)
+        """
+        return self._get(f"entry/{entry_id}/transfers/")
+    
     def get_entry_picks(self, entry_id: int, gameweek: int) -> dict[str, Any]:
         """
         Get manager picks for a specific gameweek
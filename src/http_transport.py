@@ -0,0 +1,159 @@
+"""
+HTTP Transport
+Pooled keep-alive HTTP session with gzip, timeouts and retries, shared by all FPL and odds calls
+"""
+import threading
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from rate_limiter import AdaptiveRateLimiter, get_shared_limiter
+except ImportError:
+    from .rate_limiter import AdaptiveRateLimiter, get_shared_limiter
+
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)",
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate"
+}
+
+
+class HTTPTransport:
+    """
+    HTTP transport with connection pooling and a retry policy
+
+    Connections are kept alive and reused across calls and threads, so only the
+    first request to a host pays for the TCP and TLS handshake. Connection errors
+    and 500/502/504 responses are retried with exponential backoff. When a rate
+    limiter is attached, it paces every request and handles 429/503 and Retry-After;
+    otherwise those statuses are retried here as well.
+    """
+
+    def __init__(
+        self,
+        limiter: AdaptiveRateLimiter | None = None,
+        pool_size: int = 16,
+        timeout: float | tuple[float, float] = (5.0, 30.0),
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        headers: dict[str, str] | None = None
+    ):
+        """
+        Initialize transport
+
+        Args:
+            limiter: Rate limiter applied to every request (None for unthrottled APIs)
+            pool_size: Connections kept open per host (should be >= concurrent workers)
+            timeout: Default (connect, read) timeout in seconds
+            max_retries: Retries for connection errors and server errors
+            backoff_factor: Base of the exponential backoff between retries (seconds)
+            headers: Headers sent with every request, on top of the defaults
+        """
+        self.limiter = limiter
+        self.timeout = timeout
+
+        status_forcelist = (500, 502, 504) if limiter else (429, 500, 502, 503, 504)
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=status_forcelist,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_downloaded = 0
+        self.latencies_ms: list[float] = []
+
+    def get(
+        self,
+        url: str,
+        params: dict[str, Any] | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | tuple[float, float] | None = None
+    ) -> requests.Response:
+        """
+        Send a GET request
+
+        Args:
+            url: Absolute URL
+            params: Query parameters
+            headers: Extra headers for this request
+            timeout: Timeout override for this request
+
+        Returns:
+            Response (status is not checked)
+        """
+        def send() -> requests.Response:
+            started = time.perf_counter()
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+            self._record(response, (time.perf_counter() - started) * 1000)
+            return response
+
+        if self.limiter is not None:
+            return self.limiter.execute(send)
+        return send()
+
+    def get_json(self, url: str, params: dict[str, Any] | None = None, **kwargs: Any) -> Any:
+        """
+        Send a GET request and return the decoded JSON body
+
+        Raises:
+            requests.HTTPError: If the final response is an error status
+        """
+        response = self.get(url, params=params, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def _record(self, response: requests.Response, elapsed_ms: float) -> None:
+        # Content-Length is the size on the wire (compressed); fall back to the body size
+        size = response.headers.get("Content-Length", "")
+        size = int(size) if size.isdigit() else len(response.content)
+        with self._lock:
+            self.requests += 1
+            self.bytes_downloaded += size
+            self.latencies_ms.append(elapsed_ms)
+
+    def counters(self) -> dict[str, int]:
+        """Cumulative request counters (latencies is the length of latencies_ms)"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes": self.bytes_downloaded,
+                "latencies": len(self.latencies_ms)
+            }
+
+    def close(self) -> None:
+        """Close all pooled connections"""
+        self.session.close()
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport() -> HTTPTransport:
+    """Return the process-wide transport for FPL API calls (paced by the shared rate limiter)"""
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HTTPTransport(limiter=get_shared_limiter())
+        return _shared_transport
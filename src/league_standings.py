@@ -0,0 +1,126 @@
+"""
+League Standings
+Paginated classic league standings, and the split of league entries into shards
+that separate function calls ingest in parallel
+"""
+from datetime import datetime
+from typing import Any, Callable, Iterator
+
+from cognite.client import CogniteClient
+from cognite.client.data_classes import Row
+from cognite.client.exceptions import CogniteAPIError
+
+# Standings fields kept in a shard plan (all the manager ingestion needs)
+STANDING_FIELDS = ("entry", "player_name", "entry_name", "total", "rank")
+
+
+def iter_standings_pages(fetch_page: Callable[[int], dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    """
+    Yield every page of a classic league's standings
+
+    Args:
+        fetch_page: Returns the leagues-classic/{id}/standings/ response for a page number
+
+    Yields:
+        Page responses, following standings.has_next from page 1
+    """
+    page = 1
+    while True:
+        data = fetch_page(page)
+        yield data
+        standings = data.get("standings", {})
+        if not standings.get("has_next") or not standings.get("results"):
+            return
+        page += 1
+
+
+def league_entries(fetch_page: Callable[[int], dict[str, Any]]) -> list[dict[str, Any]]:
+    """All standings entries of a classic league, across every page"""
+    return [standing for page in iter_standings_pages(fetch_page) for standing in page.get("standings", {}).get("results", [])]
+
+
+def shard_of(entry_id: int, shard_count: int) -> int:
+    """Shard an entry belongs to (stable across runs while shard_count is unchanged)"""
+    return entry_id % shard_count
+
+
+def split_shards(entries: list[dict[str, Any]], shard_count: int) -> list[list[dict[str, Any]]]:
+    """Split standings entries into shard_count shards by entry ID"""
+    shards = [[] for _ in range(shard_count)]
+    for standing in entries:
+        shards[shard_of(standing["entry"], shard_count)].append(standing)
+    return shards
+
+
+class ShardPlanStore:
+    """
+    League entries per shard, kept in a CDF RAW table
+
+    The coordinator reads the standings once and saves each shard's entries;
+    every shard call then loads only its own entries instead of paging through
+    the whole league again. Entries are assigned by entry ID, so a manager stays
+    in the same shard from run to run and its per-shard state stays valid.
+    """
+
+    def __init__(
+        self,
+        client: CogniteClient,
+        db_name: str = "fantasy_football",
+        table_name: str = "fpl_league_shards"
+    ):
+        """
+        Initialize shard plan store
+
+        Args:
+            client: CogniteClient instance
+            db_name: RAW database holding the plan table
+            table_name: RAW plan table
+        """
+        self.client = client
+        self.db_name = db_name
+        self.table_name = table_name
+
+    def _key(self, league_id: Any, shard: int) -> str:
+        return f"league_{league_id}_shard_{shard}"
+
+    def save(self, league_id: Any, shards: list[list[dict[str, Any]]]) -> int:
+        """
+        Write the entries of every shard to RAW
+
+        Returns:
+            Number of shards written
+        """
+        updated_at = datetime.now().isoformat()
+        rows = [
+            Row(
+                key=self._key(league_id, shard),
+                columns={
+                    "league_id": str(league_id),
+                    "shard": shard,
+                    "shard_count": len(shards),
+                    "entries": [{field: standing.get(field) for field in STANDING_FIELDS} for standing in entries],
+                    "updated_at": updated_at
+                }
+            )
+            for shard, entries in enumerate(shards)
+        ]
+        self.client.raw.rows.insert(self.db_name, self.table_name, rows, ensure_parent=True)
+        return len(rows)
+
+    def load(self, league_id: Any, shard: int, shard_count: int) -> list[dict[str, Any]]:
+        """
+        Read one shard's entries
+
+        Raises:
+            ValueError: If no plan with shard_count shards was saved for the league
+        """
+        try:
+            row = self.client.raw.rows.retrieve(self.db_name, self.table_name, self._key(league_id, shard))
+        except CogniteAPIError as e:
+            if e.code != 404:
+                raise
+            row = None
+        columns = row.columns if row is not None else {}
+        if int(columns.get("shard_count") or 0) != shard_count:
+            raise ValueError(f"No plan with {shard_count} shards for league {league_id}, shard {shard}")
+        return list(columns.get("entries") or [])
@@ -0,0 +1,164 @@
+"""
+Buffered RAW Writer
+Row buffers per RAW table, inserted in large batches with concurrent requests
+"""
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterable
+
+from cognite.client import CogniteClient
+from cognite.client.data_classes import Row
+from cognite.client.exceptions import CogniteAPIError
+
+# Rows accepted by one RAW insert request
+MAX_INSERT_ROWS = 10000
+
+# CDF responses that mean "slow down and try again"
+THROTTLE_CODES = (429, 503)
+
+
+class RawWriter:
+    """
+    Collects RAW rows per table and inserts them in batches of batch_size rows
+
+    A full batch is handed to a background pool right away, so fetching goes on
+    while up to max_workers inserts are in flight; when that many are pending,
+    adding rows waits for the oldest one. flush() sends what is left and waits
+    for every insert, raising the first error. Batches are inserted concurrently,
+    so a row key should be written at most once between flushes.
+    """
+
+    def __init__(
+        self,
+        client: CogniteClient,
+        db_name: str,
+        batch_size: int = 2000,
+        max_workers: int = 4,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0
+    ):
+        """
+        Initialize writer
+
+        Args:
+            client: CogniteClient instance
+            db_name: RAW database the tables belong to
+            batch_size: Rows per insert request (capped at the API maximum)
+            max_workers: Inserts in flight at the same time
+            max_retries: Retries of a throttled insert before giving up
+            base_backoff: Pause before the first retry (seconds), doubled on each retry
+            max_backoff: Upper bound for any pause (seconds)
+        """
+        self.client = client
+        self.db_name = db_name
+        self.batch_size = max(1, min(int(batch_size), MAX_INSERT_ROWS))
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._buffers: dict[str, list[Row]] = defaultdict(list)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._pending: list[Future] = []
+        self._lock = threading.Lock()
+        self._rows: dict[str, int] = defaultdict(int)
+        self._latencies: dict[str, list[float]] = defaultdict(list)
+        self.retries = 0
+        self.backoff_seconds = 0.0
+
+    def add(self, table: str, row: Row) -> None:
+        """Buffer a row, sending the table's batch once it is full"""
+        buffer = self._buffers[table]
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self._submit(table)
+
+    def insert(self, table: str, rows: Iterable[Row]) -> None:
+        """Buffer several rows of a table"""
+        for row in rows:
+            self.add(table, row)
+
+    def _submit(self, table: str) -> None:
+        batch, self._buffers[table] = self._buffers[table], []
+        if not batch:
+            return
+        # Bound the inserts in flight (and the rows they hold)
+        while len(self._pending) >= self.max_workers:
+            self._pending.pop(0).result()
+        self._pending.append(self._pool.submit(self._insert, table, batch))
+
+    def _insert(self, table: str, batch: list[Row]) -> None:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                self.client.raw.rows.insert(self.db_name, table, batch, ensure_parent=True)
+            except CogniteAPIError as e:
+                if e.code not in THROTTLE_CODES or attempt >= self.max_retries:
+                    raise
+                delay = min(self.base_backoff * 2 ** attempt, self.max_backoff)
+                with self._lock:
+                    self.retries += 1
+                    self.backoff_seconds += delay
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            with self._lock:
+                self._rows[table] += len(batch)
+                self._latencies[table].append((time.perf_counter() - started) * 1000)
+            return
+
+    def flush(self) -> None:
+        """Insert every buffered row and wait for all inserts, raising the first error"""
+        for table in list(self._buffers):
+            self._submit(table)
+        pending, self._pending = self._pending, []
+        error = None
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Stop the insert pool (buffered rows that were not flushed are dropped)"""
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> "RawWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Rows buffered before an error are still written; the original error wins
+        try:
+            self.flush()
+        except Exception:
+            if exc_type is None:
+                raise
+        finally:
+            self.close()
+
+    def stats(self) -> dict[str, Any]:
+        """Rows, insert requests and latencies per table"""
+        with self._lock:
+            tables = {}
+            for table, latencies in sorted(self._latencies.items()):
+                ordered = sorted(latencies)
+                tables[table] = {
+                    "rows": self._rows[table],
+                    "inserts": len(ordered),
+                    "p50_ms": round(ordered[len(ordered) // 2], 1),
+                    "max_ms": round(ordered[-1], 1)
+                }
+            return {
+                "tables": tables,
+                "rows": sum(self._rows.values()),
+                "inserts": sum(len(latencies) for latencies in self._latencies.values()),
+                "retries": self.retries,
+                "backoff_seconds": round(self.backoff_seconds, 2)
+            }
@@ -0,0 +1,91 @@
+"""
+Transfer Evaluation
+Actual points gained by transfers, from a player x gameweek points matrix
+"""
+from typing import Any
+
+import numpy as np
+
+# Gameweek windows transfers are evaluated over, starting with the transfer gameweek
+WINDOWS = (1, 3, 5)
+
+
+class PointsMatrix:
+    """
+    Points of every player in every gameweek, indexed [player_id, gameweek]
+
+    Blank gameweeks are 0 and double gameweeks hold the sum of both matches,
+    as in the FPL live data.
+    """
+
+    def __init__(self, max_player_id: int, max_gameweek: int = 38):
+        """
+        Initialize an all-zero matrix
+
+        Args:
+            max_player_id: Highest player ID (bootstrap-static elements)
+            max_gameweek: Number of gameweeks in the season
+        """
+        self.points = np.zeros((max_player_id + 1, max_gameweek + 1), dtype=np.int32)
+        self.gameweeks: set[int] = set()
+
+    def add(self, player_id: int, gameweek: int, points: int) -> None:
+        """Set one player's points for a gameweek (unknown players are ignored)"""
+        if 0 < player_id < self.points.shape[0] and 0 < gameweek < self.points.shape[1]:
+            self.points[player_id, gameweek] = points
+            self.gameweeks.add(gameweek)
+
+    def add_live(self, gameweek: int, live_data: dict[str, Any]) -> None:
+        """Set every player's points for a gameweek from an event/{gw}/live/ response"""
+        for element in live_data.get("elements", []):
+            self.add(element["id"], gameweek, element.get("stats", {}).get("total_points") or 0)
+        self.gameweeks.add(gameweek)
+
+
+def evaluate_transfers(
+    matrix: PointsMatrix,
+    last_finished: int,
+    gameweeks: np.ndarray,
+    players_in: np.ndarray,
+    players_out: np.ndarray
+) -> dict[str, np.ndarray]:
+    """
+    Points gained by transfers over the next 1/3/5 gameweeks, in one pass
+
+    A transfer made for gameweek g is evaluated over gameweeks g..g+N-1, up to
+    the last finished gameweek. Windows that are still open hold the points so
+    far and are evaluated again on later runs.
+
+    Args:
+        matrix: Points matrix holding every finished gameweek
+        last_finished: Last finished gameweek (0 if none)
+        gameweeks: Gameweek of each transfer
+        players_in: Player ID transferred in
+        players_out: Player ID transferred out
+
+    Returns:
+        Arrays aligned with the input: "next{N}" (points of the player in minus
+        the player out, per window), "evaluated_through" (last gameweek counted),
+        "started" (any gameweek counted) and "complete" (longest window closed)
+    """
+    last_finished = min(int(last_finished), matrix.points.shape[1] - 1)
+    gameweeks = np.asarray(gameweeks, dtype=np.int64)
+    players_in = np.clip(np.asarray(players_in, dtype=np.int64), 0, matrix.points.shape[0] - 1)
+    players_out = np.clip(np.asarray(players_out, dtype=np.int64), 0, matrix.points.shape[0] - 1)
+
+    # cumulative[p, g] = points of player p in gameweeks 1..g
+    cumulative = np.cumsum(matrix.points, axis=1)
+    start = np.clip(gameweeks - 1, 0, last_finished)
+
+    result = {}
+    for window in WINDOWS:
+        end = np.clip(gameweeks + window - 1, start, last_finished)
+        gained_in = cumulative[players_in, end] - cumulative[players_in, start]
+        gained_out = cumulative[players_out, end] - cumulative[players_out, start]
+        result[f"next{window}"] = gained_in - gained_out
+
+    longest = max(WINDOWS)
+    result["evaluated_through"] = np.clip(gameweeks + longest - 1, start, last_finished)
+    result["started"] = gameweeks <= last_finished
+    result["complete"] = gameweeks + longest - 1 <= last_finished
+    return result
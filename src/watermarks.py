@@ -0,0 +1,131 @@
+"""
+Ingestion Watermarks
+Per-manager record of the last finished gameweek ingested, kept in a CDF RAW table
+"""
+from datetime import datetime
+from typing import Any
+
+from cognite.client import CogniteClient
+from cognite.client.data_classes import Row
+from cognite.client.exceptions import CogniteAPIError
+
+
+class WatermarkStore:
+    """
+    Watermarks for incremental ingestion
+
+    Finished gameweeks never change, so once a manager's finished gameweeks
+    are written they are skipped on later runs. Each function keeps its own
+    watermarks (scope), since they write different nodes.
+    """
+
+    def __init__(
+        self,
+        client: CogniteClient,
+        scope: str,
+        db_name: str = "fantasy_football",
+        table_name: str = "fpl_ingestion_state"
+    ):
+        """
+        Initialize watermark store
+
+        Args:
+            client: CogniteClient instance
+            scope: Name of the ingestion the watermarks belong to (e.g. the function external ID)
+            db_name: RAW database holding the state table
+            table_name: RAW state table
+        """
+        self.client = client
+        self.scope = scope
+        self.db_name = db_name
+        self.table_name = table_name
+        self._watermarks: dict[int, int] = {}
+        self._changed: set[int] = set()
+
+    def _key(self, entry_id: int) -> str:
+        return f"{self.scope}_manager_{entry_id}"
+
+    def load(self) -> "WatermarkStore":
+        """Read all watermarks of this scope from RAW (a missing table means no watermarks)"""
+        try:
+            rows = self.client.raw.rows.list(self.db_name, self.table_name, limit=None)
+        except CogniteAPIError as e:
+            if e.code != 404:
+                raise
+            rows = []
+
+        prefix = f"{self.scope}_manager_"
+        for row in rows:
+            if row.key.startswith(prefix):
+                columns = row.columns or {}
+                self._watermarks[int(columns["entry_id"])] = int(columns.get("last_finished_gameweek") or 0)
+        return self
+
+    def get(self, entry_id: int) -> int:
+        """Last finished gameweek ingested for a manager (0 if none)"""
+        return self._watermarks.get(entry_id, 0)
+
+    def advance(self, entry_id: int, gameweek: int) -> None:
+        """Move a manager's watermark forward (never backwards)"""
+        if gameweek > self.get(entry_id):
+            self._watermarks[entry_id] = gameweek
+            self._changed.add(entry_id)
+
+    def save(self) -> int:
+        """
+        Write changed watermarks to RAW
+
+        Returns:
+            Number of watermarks written
+        """
+        if not self._changed:
+            return 0
+
+        rows = [
+            Row(
+                key=self._key(entry_id),
+                columns={
+                    "scope": self.scope,
+                    "entry_id": entry_id,
+                    "last_finished_gameweek": self._watermarks[entry_id],
+                    "updated_at": datetime.now().isoformat()
+                }
+            )
+            for entry_id in sorted(self._changed)
+        ]
+        self.client.raw.rows.insert(self.db_name, self.table_name, rows, ensure_parent=True)
+        written = len(rows)
+        self._changed.clear()
+        return written
+
+    def stats(self) -> dict[str, Any]:
+        """Watermark summary for the run"""
+        return {
+            "managers": len(self._watermarks),
+            "updated": len(self._changed)
+        }
+
+
+def next_watermark(watermark: int, gameweeks: list[int], finished: set[int], failed: set[int]) -> int:
+    """
+    Compute a manager's new watermark after a run
+
+    The watermark advances through consecutive ingested gameweeks that are
+    finished and were written without errors, and stops at the first that is not.
+
+    Args:
+        watermark: Current watermark
+        gameweeks: Gameweeks ingested this run
+        finished: Gameweeks that are finished
+        failed: Gameweeks that failed this run
+
+    Returns:
+        New watermark
+    """
+    for gameweek in sorted(gameweeks):
+        if gameweek <= watermark:
+            continue
+        if gameweek not in finished or gameweek in failed:
+            break
+        watermark = gameweek
+    return watermark
@@ -1,6 +1,7 @@
 """
 Configuration and Constants for Fantasy Football Dashboard
 """
+import os
 
 # Premier League Team Colors (official colors)
 PREMIER_LEAGUE_COLORS = {
@@ -509,6 +510,14 @@ FIXTURE_VIEW = "Fixture"
 # Cache TTL (in seconds)
 CACHE_TTL = 3600  # 1 hour
 
+# Directory of the on-disk cache tier below st.cache_data (share it between
+# replicas to start them warm); entries are reloaded when CDF has newer data,
+# and expire after CACHE_TTL like the memory tier
+DISK_CACHE_DIR = os.getenv("FPL_DISK_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".disk_cache"))
+
+# Loads issued at once by the startup prefetch
+PREFETCH_WORKERS = 8
+
 # Plotly Chart Theme Configuration - Dark Modern
 PLOTLY_THEME = {
     "layout": {
@@ -0,0 +1,79 @@
+"""
+Disk Cache
+Loader results kept as Arrow IPC files in a local directory and read back
+memory-mapped, so restarted or extra app processes start from disk
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any
+
+import pandas as pd
+import pyarrow as pa
+
+# Schema metadata key holding the data version of an entry
+DATA_VERSION_KEY = b"data_version"
+
+
+class DiskCache:
+    """
+    DataFrames stored per (name, params) as Arrow IPC files, with their data version
+
+    The data version is the last update time (ms) of the newest node or row the
+    frame was loaded from. get() returns it with the frame, so the caller can ask
+    CDF whether anything changed since and reload if so. Entries older than `ttl`
+    seconds are misses, which also catches deletions. Reads memory-map the file,
+    and numeric columns without nulls come back without a copy. Files are
+    written to a temporary name and renamed into place, so processes sharing
+    the directory never read a partial file. Errors are misses: the disk cache
+    never fails a load.
+    """
+
+    def __init__(self, directory: str, ttl: float):
+        """
+        Initialize cache
+
+        Args:
+            directory: Directory holding the .arrow files (created on first write)
+            ttl: Age (seconds) after which an entry is stale
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def path(self, name: str, params: Any) -> str:
+        """File of an entry: the name plus a digest of name and params"""
+        key = json.dumps([name, params], sort_keys=True, default=str)
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return os.path.join(self.directory, f"{name}-{digest}.arrow")
+
+    def get(self, name: str, params: Any) -> tuple[pd.DataFrame, int] | None:
+        """Stored DataFrame and its data version, or None if missing, expired or unreadable"""
+        path = self.path(name, params)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            data_version = int(table.schema.metadata[DATA_VERSION_KEY])
+            return table.to_pandas(split_blocks=True), data_version
+        except (OSError, KeyError, TypeError, ValueError, pa.ArrowException):
+            return None
+
+    def put(self, name: str, params: Any, df: pd.DataFrame, data_version: int) -> None:
+        """Store a DataFrame (its index is not kept) with its data version"""
+        path = self.path(name, params)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata(
+                {**(table.schema.metadata or {}), DATA_VERSION_KEY: str(int(data_version)).encode()}
+            )
+            os.makedirs(self.directory, exist_ok=True)
+            with pa.OSFile(temp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temp_path, path)
+        except (OSError, pa.ArrowException):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
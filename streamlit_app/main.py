@@ -6,11 +6,12 @@ import pandas as pd
 
 from config import CUSTOM_CSS
 from utils import (
-    get_cdf_client, fetch_managers, fetch_performance_data,
+    get_cdf_client, fetch_managers, fetch_league_performance,
     fetch_team_betting_data, fetch_teams, fetch_transfer_data,
     fetch_players, fetch_player_picks_from_raw, fetch_player_gameweek_points,
+    fetch_picks_tensor, fetch_player_points_matrix,
     fetch_current_gameweek, fetch_manager_teams, fetch_fixtures,
-    get_team_color, create_team_badge
+    get_team_color, create_team_badge, prefetch, LOAD_STATS
 )
 from tabs import (
     leaderboard, performance_trends, transfer_analysis,
@@ -47,8 +48,9 @@ def main():
         st.info("Please check your .env file and credentials")
         return
     
-    # Fetch data
+    # Fetch data: every tab's loads at once, so the tabs read them from the cache
     with st.spinner("Loading data from CDF..."):
+        prefetch(client)
         managers_df = fetch_managers(client)
         teams_dict = fetch_teams(client)
     
@@ -115,12 +117,12 @@ def main():
         leaderboard.render(
             client, managers_df, 
             fetch_current_gameweek, fetch_manager_teams,
-            fetch_performance_data, fetch_players, fetch_player_gameweek_points
+            fetch_league_performance, fetch_players, fetch_player_gameweek_points
         )
     
     with tab2:
         performance_trends.render(
-            client, managers_df, fetch_performance_data
+            client, managers_df, fetch_league_performance
         )
     
     with tab3:
@@ -131,8 +133,8 @@ def main():
     with tab4:
         managers_favorites.render(
             client, managers_df, teams_dict,
-            fetch_team_betting_data, fetch_players, fetch_player_picks_from_raw,
-            fetch_player_gameweek_points, get_team_color, create_team_badge
+            fetch_team_betting_data, fetch_players, fetch_picks_tensor,
+            fetch_player_points_matrix, get_team_color, create_team_badge
         )
     
     with tab5:
@@ -149,6 +151,11 @@ def main():
     with tab7:
         fun_facts.render(managers_df, client, fetch_transfer_data, fetch_players)
     
+    # Rows, pages and time of each view and RAW table load (cached loads are not repeated)
+    if LOAD_STATS:
+        with st.expander("⏱️ Data loading", expanded=False):
+            st.dataframe(pd.DataFrame.from_dict(LOAD_STATS, orient="index"), use_container_width=True)
+    
     # Footer
     st.markdown("---")
     st.markdown(f"""
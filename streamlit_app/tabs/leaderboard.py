@@ -5,10 +5,11 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from utils import manager_performance
 
 
 def render(client, managers_df, fetch_current_gameweek, fetch_manager_teams,
-           fetch_performance_data, fetch_players, fetch_player_gameweek_points):
+           fetch_league_performance, fetch_players, fetch_player_gameweek_points):
     """Render the Leaderboard tab"""
     st.header("League Leaderboard")
     
@@ -68,12 +69,12 @@ def render(client, managers_df, fetch_current_gameweek, fetch_manager_teams,
     st.markdown("---")
     _render_gameweek_insights(
         client, managers_df, fetch_current_gameweek, fetch_manager_teams,
-        fetch_performance_data, fetch_players, fetch_player_gameweek_points
+        fetch_league_performance, fetch_players, fetch_player_gameweek_points
     )
 
 
 def _render_gameweek_insights(client, managers_df, fetch_current_gameweek, 
-                              fetch_manager_teams, fetch_performance_data,
+                              fetch_manager_teams, fetch_league_performance,
                               fetch_players, fetch_player_gameweek_points):
     """Render gameweek-specific insights"""
     st.subheader("📅 This Gameweek's Highlights")
@@ -91,9 +92,10 @@ def _render_gameweek_insights(client, managers_df, fetch_current_gameweek,
     # Fetch all performance data for this gameweek
     all_performance = []
     with st.spinner("Loading gameweek data..."):
+        league_performance = fetch_league_performance(client)
         for _, manager_row in managers_df.iterrows():
             try:
-                perf_df = fetch_performance_data(client, manager_row["external_id"])
+                perf_df = manager_performance(league_performance, manager_row["external_id"])
                 if not perf_df.empty:
                     gw_perf = perf_df[perf_df["gameweek"] == gw_number]
                     if not gw_perf.empty:
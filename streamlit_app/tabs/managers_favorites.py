@@ -5,12 +5,13 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from picks_tensor import id_lookup
 from utils import apply_plotly_theme
 
 
 def render(client, managers_df, teams_dict, 
-           fetch_team_betting_data, fetch_players, fetch_player_picks_from_raw,
-           fetch_player_gameweek_points, get_team_color, create_team_badge):
+           fetch_team_betting_data, fetch_players, fetch_picks_tensor,
+           fetch_player_points_matrix, get_team_color, create_team_badge):
     """Render the Manager's Favorites tab"""
     st.header("⭐ Manager's Favorite Teams")
     st.write("Discover which Premier League teams managers favor and how their choices pay off in points!")
@@ -45,8 +46,8 @@ def render(client, managers_df, teams_dict,
             _render_overview(betting_filtered, selected_manager)
             _render_team_performance(betting_filtered, selected_manager, get_team_color)
             _render_manager_detail(client, managers_df, betting_filtered, players_dict, teams_dict,
-                                  selected_manager, fetch_player_picks_from_raw, 
-                                  fetch_player_gameweek_points, get_team_color, create_team_badge)
+                                  selected_manager, fetch_picks_tensor, 
+                                  fetch_player_points_matrix, get_team_color, create_team_badge)
         else:
             st.info(f"No team preference data available for {selected_manager}")
     else:
@@ -178,8 +179,8 @@ def _render_value_insights(team_summary):
 
 
 def _render_manager_detail(client, managers_df, betting_filtered, players_dict, teams_dict,
-                           selected_manager, fetch_player_picks_from_raw, 
-                           fetch_player_gameweek_points, get_team_color, create_team_badge):
+                           selected_manager, fetch_picks_tensor, 
+                           fetch_player_points_matrix, get_team_color, create_team_badge):
     """Render individual manager detail view
     
     Note: Player-level detail requires FPL data ingestion function to be run.
@@ -198,44 +199,59 @@ def _render_manager_detail(client, managers_df, betting_filtered, players_dict,
         
         # Get top player from each team
         with st.spinner("Loading top players..."):
-            picks_df = fetch_player_picks_from_raw(client)
-            points_df = fetch_player_gameweek_points(client)
+            picks = fetch_picks_tensor(client)
+            points = fetch_player_points_matrix(client)
             top_players_by_team = {}
+            squad_picks_by_team = {}
+            captain_bonus = None
             
-            if not picks_df.empty and not points_df.empty and players_dict:
-                manager_entry_id = managers_df[managers_df["manager_name"] == selected_manager].iloc[0]["entry_id"]
-                manager_picks = picks_df[picks_df["manager_entry_id"] == manager_entry_id]
+            manager_entry_id = int(managers_df[managers_df["manager_name"] == selected_manager].iloc[0]["entry_id"])
+            if manager_entry_id in picks.entry_ids and points.any() and players_dict:
+                # Points each player earned for the manager (multiplier applied), in one pass over the picks tensor
+                player_ids, player_points = picks.points_by_player(points, manager_entry_id)
+                player_totals = pd.DataFrame({
+                    "player_key": [f"player_{player_id}" for player_id in player_ids],
+                    "points": player_points
+                })
+                player_totals = player_totals[player_totals["player_key"].isin(players_dict)].copy()
+                player_totals["name"] = player_totals["player_key"].map(lambda key: players_dict[key]["name"])
+                player_totals["team_name"] = player_totals["player_key"].map(
+                    lambda key: teams_dict.get(players_dict[key].get("team_id", ""))
+                )
+                player_totals = player_totals.dropna(subset=["team_name"])
                 
-                if not manager_picks.empty:
-                    # Merge picks with points data
-                    manager_picks_with_points = manager_picks.merge(
-                        points_df, 
-                        on=["player_id", "gameweek"], 
-                        how="left"
-                    )
-                    
-                    # Calculate adjusted points
-                    manager_picks_with_points["player_key"] = "player_" + manager_picks_with_points["player_id"].astype(str)
-                    manager_picks_with_points["adjusted_points"] = manager_picks_with_points["total_points"] * manager_picks_with_points["multiplier"]
-                    
-                    # Group by player and sum points
-                    player_totals = manager_picks_with_points.groupby("player_key")["adjusted_points"].sum().to_dict()
-                    
-                    # Find top player per team
-                    for player_key, total_points in player_totals.items():
-                        if player_key in players_dict:
-                            player_info = players_dict[player_key]
-                            team_id = player_info.get("team_id", "")
-                            
-                            if team_id in teams_dict:
-                                team_name = teams_dict[team_id]
-                                player_name = player_info["name"]
-                                
-                                if team_name not in top_players_by_team or total_points > top_players_by_team[team_name]["points"]:
-                                    top_players_by_team[team_name] = {
-                                        "name": player_name,
-                                        "points": total_points
-                                    }
+                # Find top player per team
+                if not player_totals.empty:
+                    top_players = player_totals.loc[player_totals.groupby("team_name")["points"].idxmax()]
+                    top_players_by_team = {
+                        row["team_name"]: {"name": row["name"], "points": row["points"]}
+                        for _, row in top_players.iterrows()
+                    }
+                
+                # Extra points from the armband, over all gameweeks
+                manager_row = picks.entry_index(manager_entry_id)
+                captain_bonus = int(picks.captain_points(points)[manager_row].sum())
+            
+            if manager_entry_id in picks.entry_ids and players_dict:
+                # Squad slots filled from each team over all gameweeks; teams are
+                # numbered 1..n here, since team_usage() counts by integer ID
+                team_ids = sorted({player.get("team_id") for player in players_dict.values() if player.get("team_id")})
+                team_numbers = {team_id: number for number, team_id in enumerate(team_ids, start=1)}
+                player_teams = id_lookup({
+                    int(key.removeprefix("player_")): team_numbers[player["team_id"]]
+                    for key, player in players_dict.items()
+                    if key.removeprefix("player_").isdigit() and player.get("team_id") in team_numbers
+                })
+                usage = picks.team_usage(player_teams)[picks.entry_index(manager_entry_id)]
+                squad_picks_by_team = {
+                    teams_dict[team_id]: int(usage[number])
+                    for team_id, number in team_numbers.items()
+                    if team_id in teams_dict and number < len(usage)
+                }
+        
+        if captain_bonus is not None:
+            st.metric("Captaincy Bonus Points", captain_bonus,
+                      help="Extra points from the captain (and triple captain) multiplier across all gameweeks")
         
         # Display teams with their top player
         for idx, (_, row) in enumerate(manager_data.head(10).iterrows()):
@@ -254,11 +270,14 @@ def _render_manager_detail(client, managers_df, betting_filtered, players_dict,
             
             # Show team aggregate metrics
             st.caption(f"_Team totals across all gameweeks:_")
-            col1, col2 = st.columns(2)
+            col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("Total Team Points", int(row["total_points"]))
             with col2:
                 st.metric("Different Players Used", int(row["total_players_used"]))
+            with col3:
+                st.metric("Squad Picks", squad_picks_by_team.get(team_name, 0),
+                          help="Squad slots filled with this team's players, summed over gameweeks")
             
             st.markdown("---")
         
@@ -6,10 +6,10 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from utils import apply_plotly_theme
+from utils import apply_plotly_theme, manager_performance
 
 
-def render(client, managers_df, fetch_performance_data):
+def render(client, managers_df, fetch_league_performance):
     """Render the Performance Trends tab"""
     st.header("Weekly Performance Trends")
     
@@ -31,10 +31,11 @@ def render(client, managers_df, fetch_performance_data):
             selected_performance = []
             
             with st.spinner("Loading performance data..."):
+                league_performance = fetch_league_performance(client)
                 for idx, row in managers_df.iterrows():
                     manager_name = row["manager_name"]
                     try:
-                        perf_df = fetch_performance_data(client, row["external_id"])
+                        perf_df = manager_performance(league_performance, row["external_id"])
                         if not perf_df.empty:
                             perf_df["manager"] = manager_name
                             all_league_performance.append(perf_df)
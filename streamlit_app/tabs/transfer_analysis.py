@@ -178,11 +178,12 @@ def render(client, managers_df, fetch_transfer_data, fetch_players):
             
             display_transfers = recent_transfers[[
                 "gameweek", "player_out_name", "player_in_name",
-                "net_benefit", "transfer_cost", "was_successful"
+                "points_gained_next_1gw", "points_gained_next_5gw",
+                "net_benefit", "transfer_cost", "was_successful", "evaluation_complete"
             ]].copy()
             
             display_transfers.columns = [
-                "GW", "Player Out", "Player In", "Benefit", "Cost", "Success"
+                "GW", "Player Out", "Player In", "Next GW", "Next 5 GWs", "Benefit", "Cost", "Success", "Final"
             ]
             
             # Add visual indicators
@@ -192,6 +193,8 @@ def render(client, managers_df, fetch_transfer_data, fetch_players):
             
             st.dataframe(
                 display_transfers.style.format({
+                    "Next GW": "{:.0f}",
+                    "Next 5 GWs": "{:.0f}",
                     "Benefit": "{:.0f}",
                     "Cost": "{:.0f}"
                 }).apply(
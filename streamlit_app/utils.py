@@ -2,24 +2,42 @@
 Utility functions for Fantasy Football Dashboard
 """
 import streamlit as st
+import numpy as np
 import pandas as pd
 from cognite.client import CogniteClient
 from cognite.client.config import ClientConfig
 from cognite.client.credentials import OAuthClientCredentials
+from cognite.client.data_classes import filters
 from cognite.client.data_classes.data_modeling.ids import ViewId
+from cognite.client.data_classes.data_modeling.query import SourceSelector
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor
 import os
+import time
 from dotenv import load_dotenv
 
 from config import (
     PREMIER_LEAGUE_COLORS, SPACE, VERSION,
     MANAGER_VIEW, GAMEWEEK_PERF_VIEW, TEAM_BETTING_VIEW,
     TEAM_VIEW, TRANSFER_VIEW, PLAYER_VIEW, MANAGER_TEAM_VIEW,
-    GAMEWEEK_VIEW, FIXTURE_VIEW, CACHE_TTL, PLOTLY_THEME
+    GAMEWEEK_VIEW, FIXTURE_VIEW, CACHE_TTL, DISK_CACHE_DIR, PREFETCH_WORKERS, PLOTLY_THEME
 )
+from disk_cache import DiskCache
+from picks_tensor import PicksTensor
+from view_decoder import Column, ViewSchema, decode_nodes, decode_rows
 
 # Load environment variables
 load_dotenv()
 
+# Rows, pages and elapsed time of the latest load of each view and RAW table
+LOAD_STATS = {}
+
+# Parallel cursors per RAW table read
+RAW_PARTITIONS = 4
+
+# Loaded DataFrames on disk, shared by restarts and replicas of the app
+DISK_CACHE = DiskCache(DISK_CACHE_DIR, CACHE_TTL)
+
 
 @st.cache_resource
 def get_cdf_client():
@@ -58,402 +76,380 @@ def get_cdf_client():
     return CogniteClient(cnf)
 
 
+def _record_load(name, rows, started, **counts):
+    LOAD_STATS[name] = {"rows": rows, **counts, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def disk_cached(name, params, load, changed_since):
+    """
+    DataFrame of `name` from the disk cache, or load() it and store it there
+    
+    Entries are keyed by name and params. load() returns the DataFrame and its
+    data version, the last update time of the newest node or row it was read
+    from. A stored entry is used only while changed_since(data_version) finds
+    nothing newer in CDF. A disk hit goes to LOAD_STATS with source "disk".
+    """
+    started = time.perf_counter()
+    cached = DISK_CACHE.get(name, params)
+    if cached is not None:
+        df, data_version = cached
+        if not changed_since(data_version):
+            _record_load(name, len(df), started, source="disk")
+            return df
+    
+    df, data_version = load()
+    DISK_CACHE.put(name, params, df, data_version)
+    return df
+
+
+def load_view(_client, schema, filter=None, page_size=1000):
+    """
+    List every node of a view and decode it into a DataFrame (see view_decoder)
+    
+    Only the schema's properties are requested, and cursors are followed until
+    every node is in. Instance listing is cursor-based without partitions, so
+    pages are fetched one after the other. Results are kept in the disk cache
+    per schema and filter until a node of the view is updated. Rows, pages and
+    elapsed time go to LOAD_STATS.
+    """
+    view = ViewId(space=SPACE, external_id=schema.view, version=VERSION)
+    params = {"schema": schema.fingerprint, "version": VERSION, "filter": filter.dump() if filter is not None else None}
+    
+    def changed_since(data_version):
+        # One node of the view (matching the filter) updated after the stored data
+        conditions = [filters.HasData(views=[view]), filters.Range(["node", "lastUpdatedTime"], gt=data_version)]
+        if filter is not None:
+            conditions.append(filter)
+        updated = _client.data_modeling.instances.list(instance_type="node", filter=filters.And(*conditions), limit=1)
+        return len(updated) > 0
+    
+    return disk_cached(schema.view, params, lambda: _list_view(_client, view, schema, filter, page_size), changed_since)
+
+
+def _list_view(_client, view, schema, filter, page_size):
+    started = time.perf_counter()
+    nodes = []
+    pages = 0
+    for page in _client.data_modeling.instances(
+        chunk_size=page_size,
+        instance_type="node",
+        sources=[SourceSelector(view, properties=schema.properties)],
+        filter=filter
+    ):
+        pages += 1
+        nodes.extend(page)
+    
+    df = decode_nodes(nodes, schema, view)
+    _record_load(schema.view, len(nodes), started, pages=pages, source="cdf")
+    return df, max((node.last_updated_time for node in nodes), default=0)
+
+
+def load_raw_table(_client, table_name, columns=None, partitions=RAW_PARTITIONS):
+    """
+    Read every row of a fantasy_football RAW table with only the given columns
+    
+    Rows are read with `partitions` parallel cursors. Rows, partitions and
+    elapsed time go to LOAD_STATS.
+    """
+    started = time.perf_counter()
+    rows = _client.raw.rows.list(
+        db_name="fantasy_football",
+        table_name=table_name,
+        columns=columns,
+        limit=-1,
+        partitions=partitions
+    )
+    _record_load(table_name, len(rows), started, partitions=partitions, source="cdf")
+    return rows
+
+
+def _raw_data_version(rows):
+    """Last update time of the newest RAW row (0 without rows)"""
+    return max((row.last_updated_time or 0 for row in rows), default=0)
+
+
+def _raw_changed_since(_client, table_name):
+    """changed_since for disk_cached(): whether a row of a RAW table was updated after a data version"""
+    def changed_since(data_version):
+        rows = _client.raw.rows.list(
+            db_name="fantasy_football",
+            table_name=table_name,
+            min_last_updated_time=data_version + 1,
+            limit=1
+        )
+        return len(rows) > 0
+    return changed_since
+
+
+MANAGER_SCHEMA = ViewSchema(MANAGER_VIEW, [
+    Column("entry_id", "entryId", "int"),
+    Column("manager_name", "managerName", "str", "Unknown"),
+    Column("team_name", "teamName", "str", ""),
+    Column("overall_points", "overallPoints", "int"),
+    Column("overall_rank", "overallRank", "int"),
+    Column("league_rank", "leagueRank", "int"),
+    Column("team_value", "teamValue", "float", 0.0),
+    Column("consistency_score", "consistencyScore", "float", 0.0),
+    Column("avg_points_per_week", "averagePointsPerWeek", "float", 0.0),
+    Column("points_std_dev", "pointsStdDev", "float", 0.0),
+    Column("team_value_growth", "teamValueGrowth", "float", 0.0),
+    Column("total_transfers", "totalTransfers", "int"),
+    Column("rolling_form", "rollingForm", "float", 0.0),
+    Column("current_streak", "currentStreak", "int"),
+    Column("longest_streak", "longestStreak", "int"),
+    Column("rank_volatility", "rankVolatility", "float", 0.0)
+], prefix="manager_")
+
+
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_managers(_client):
     """Fetch all managers from CDF"""
     try:
-        manager_view = ViewId(space=SPACE, external_id=MANAGER_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[manager_view],
-            limit=100
-        )
-        
-        managers = []
-        for node in nodes:
-            if not node.external_id.startswith("manager_"):
-                continue
-                
-            if hasattr(node, 'properties') and node.properties is not None:
-                try:
-                    if hasattr(node.properties, 'dump'):
-                        props_dict = node.properties.dump()
-                    else:
-                        props_dict = node.properties
-                    
-                    if isinstance(props_dict, dict):
-                        props = props_dict.get(SPACE, {})
-                        if isinstance(props, dict):
-                            props = props.get(f"{MANAGER_VIEW}/{VERSION}", {})
-                    else:
-                        props = {}
-                except Exception:
-                    props = {}
-                
-                if props and isinstance(props, dict):
-                    managers.append({
-                        "external_id": node.external_id,
-                        "entry_id": props.get("entryId"),
-                        "manager_name": props.get("managerName", "Unknown"),
-                        "team_name": props.get("teamName", ""),
-                        "overall_points": props.get("overallPoints", 0),
-                        "overall_rank": props.get("overallRank", 0),
-                        "league_rank": props.get("leagueRank", 0),
-                        "team_value": props.get("teamValue", 0),
-                        "consistency_score": props.get("consistencyScore", 0),
-                        "avg_points_per_week": props.get("averagePointsPerWeek", 0),
-                        "points_std_dev": props.get("pointsStdDev", 0),
-                        "team_value_growth": props.get("teamValueGrowth", 0),
-                        "total_transfers": props.get("totalTransfers", 0)
-                    })
-        
-        return pd.DataFrame(managers)
+        return load_view(_client, MANAGER_SCHEMA)
     except Exception as e:
         st.error(f"Error fetching managers: {e}")
         return pd.DataFrame()
 
 
+PERFORMANCE_SCHEMA = ViewSchema(GAMEWEEK_PERF_VIEW, [
+    Column("manager", "manager", "xid"),
+    Column("gameweek", "gameweek", "relation"),
+    Column("points", "points", "int"),
+    Column("total_points", "totalPoints", "int"),
+    Column("rank", "rank", "int"),
+    Column("gameweek_rank", "gameweekRank", "int"),
+    Column("transfers", "transfers", "int"),
+    Column("transfer_cost", "transferCost", "int")
+], prefix="performance_", external_id=None)
+
+
 @st.cache_data(ttl=CACHE_TTL)
-def fetch_performance_data(_client, manager_external_id):
-    """Fetch gameweek performance for a manager"""
+def fetch_league_performance(_client):
+    """Fetch gameweek performance of every manager, indexed by (manager external ID, gameweek)"""
     try:
-        perf_view = ViewId(space=SPACE, external_id=GAMEWEEK_PERF_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[perf_view],
-            limit=1000
-        )
-        
-        performance = []
-        for node in nodes:
-            if not node.external_id.startswith(f"performance_{manager_external_id.split('_')[1]}_"):
-                continue
-                
-            if hasattr(node, 'properties') and node.properties is not None:
-                try:
-                    if hasattr(node.properties, 'dump'):
-                        props_dict = node.properties.dump()
-                    else:
-                        props_dict = node.properties
-                    
-                    if isinstance(props_dict, dict):
-                        props = props_dict.get(SPACE, {})
-                        if isinstance(props, dict):
-                            props = props.get(f"{GAMEWEEK_PERF_VIEW}/{VERSION}", {})
-                    else:
-                        props = {}
-                except Exception:
-                    props = {}
-                
-                if props and isinstance(props, dict):
-                    gw_num = node.external_id.split("_gw")[-1]
-                    performance.append({
-                        "gameweek": int(gw_num) if gw_num.isdigit() else 0,
-                        "points": props.get("points", 0),
-                        "total_points": props.get("totalPoints", 0),
-                        "rank": props.get("rank", 0),
-                        "gameweek_rank": props.get("gameweekRank", 0),
-                        "transfers": props.get("transfers", 0),
-                        "transfer_cost": props.get("transferCost", 0)
-                    })
-        
-        df = pd.DataFrame(performance)
-        if not df.empty:
-            df = df.sort_values("gameweek")
-        return df
+        performance = load_view(_client, PERFORMANCE_SCHEMA)
+        return performance.set_index(["manager", "gameweek"]).sort_index()
     except Exception as e:
         st.error(f"Error fetching performance data: {e}")
+        empty = pd.DataFrame(columns=[column.name for column in PERFORMANCE_SCHEMA.columns])
+        return empty.set_index(["manager", "gameweek"])
+
+
+def manager_performance(league_performance, manager_external_id):
+    """One manager's rows of fetch_league_performance(), sorted by gameweek (empty if none)"""
+    if manager_external_id not in league_performance.index.get_level_values("manager"):
         return pd.DataFrame()
+    return league_performance.xs(manager_external_id, level="manager").reset_index()
+
+
+def fetch_performance_data(_client, manager_external_id):
+    """Fetch gameweek performance for a manager"""
+    return manager_performance(fetch_league_performance(_client), manager_external_id)
+
+
+BETTING_SCHEMA = ViewSchema(TEAM_BETTING_VIEW, [
+    Column("manager_id", "manager", "xid"),
+    Column("team_id", "plTeam", "xid"),
+    Column("total_players_used", "totalPlayersUsed", "int"),
+    Column("total_points", "totalPoints", "int"),
+    Column("avg_points_per_player", "averagePointsPerPlayer", "float", 0.0),
+    Column("success_rate", "successRate", "float", 0.0)
+], prefix="betting_", external_id=None)
 
 
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_team_betting_data(_client):
     """Fetch team betting patterns"""
     try:
-        betting_view = ViewId(space=SPACE, external_id=TEAM_BETTING_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[betting_view],
-            limit=1000
-        )
-        
-        betting_data = []
-        for node in nodes:
-            if not node.external_id.startswith("betting_"):
-                continue
-                
-            if hasattr(node, 'properties') and node.properties is not None:
-                try:
-                    if hasattr(node.properties, 'dump'):
-                        props_dict = node.properties.dump()
-                    else:
-                        props_dict = node.properties
-                    
-                    if isinstance(props_dict, dict):
-                        props = props_dict.get(SPACE, {})
-                        if isinstance(props, dict):
-                            props = props.get(f"{TEAM_BETTING_VIEW}/{VERSION}", {})
-                    else:
-                        props = {}
-                except Exception:
-                    props = {}
-                
-                if props and isinstance(props, dict):
-                    manager_id = props.get("manager", {}).get("externalId", "")
-                    team_id = props.get("plTeam", {}).get("externalId", "")
-                    
-                    betting_data.append({
-                        "manager_id": manager_id,
-                        "team_id": team_id,
-                        "total_players_used": props.get("totalPlayersUsed", 0),
-                        "total_points": props.get("totalPoints", 0),
-                        "avg_points_per_player": props.get("averagePointsPerPlayer", 0),
-                        "success_rate": props.get("successRate", 0)
-                    })
-        
-        return pd.DataFrame(betting_data)
+        return load_view(_client, BETTING_SCHEMA)
     except Exception as e:
         st.error(f"Error fetching team betting data: {e}")
         return pd.DataFrame()
 
 
+TEAM_SCHEMA = ViewSchema(TEAM_VIEW, [
+    Column("name", "name", "str", "Unknown Team")
+], prefix="team_")
+
+
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_teams(_client):
     """Fetch Premier League teams"""
     try:
-        team_view = ViewId(space=SPACE, external_id=TEAM_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[team_view],
-            limit=100
-        )
-        
-        teams = {}
-        for node in nodes:
-            if not node.external_id.startswith("team_"):
-                continue
-                
-            if hasattr(node, 'properties') and node.properties is not None:
-                try:
-                    if hasattr(node.properties, 'dump'):
-                        props_dict = node.properties.dump()
-                    else:
-                        props_dict = node.properties
-                    
-                    if isinstance(props_dict, dict):
-                        props = props_dict.get(SPACE, {})
-                        if isinstance(props, dict):
-                            props = props.get(f"{TEAM_VIEW}/{VERSION}", {})
-                    else:
-                        props = {}
-                except Exception:
-                    props = {}
-                
-                if props and isinstance(props, dict):
-                    teams[node.external_id] = props.get("name", "Unknown Team")
-        
-        return teams
+        teams = load_view(_client, TEAM_SCHEMA)
+        return dict(zip(teams["external_id"], teams["name"]))
     except Exception as e:
         st.error(f"Error fetching teams: {e}")
         return {}
 
 
+TRANSFER_SCHEMA = ViewSchema(TRANSFER_VIEW, [
+    Column("manager_id", "manager", "xid"),
+    Column("gameweek", "gameweek", "relation"),
+    Column("player_in_id", "playerIn", "xid"),
+    Column("player_out_id", "playerOut", "xid"),
+    Column("transfer_cost", "transferCost", "int"),
+    Column("player_in_price", "playerInPrice", "float", 0.0),
+    Column("player_out_price", "playerOutPrice", "float", 0.0),
+    Column("points_gained_next_1gw", "pointsGainedNext1GW", "int"),
+    Column("points_gained_next_3gw", "pointsGainedNext3GW", "int"),
+    Column("points_gained_next_5gw", "pointsGainedNext5GW", "int"),
+    Column("evaluation_complete", "evaluationComplete", "bool"),
+    Column("was_successful", "wasSuccessful", "bool"),
+    Column("net_benefit", "netBenefit", "int")
+])
+
+
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_transfer_data(_client):
     """Fetch transfer data with success metrics"""
     try:
-        transfer_view = ViewId(space=SPACE, external_id=TRANSFER_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[transfer_view],
-            limit=2000
-        )
-        
-        transfers = []
-        for node in nodes:
-            if hasattr(node, 'properties'):
-                props_dict = node.properties.dump() if hasattr(node.properties, 'dump') else node.properties
-                props = props_dict.get(SPACE, {}).get(f"{TRANSFER_VIEW}/{VERSION}", {})
-                if props:
-                    manager_id = props.get("manager", {}).get("externalId", "")
-                    gameweek_id = props.get("gameweek", {}).get("externalId", "")
-                    player_in_id = props.get("playerIn", {}).get("externalId", "")
-                    player_out_id = props.get("playerOut", {}).get("externalId", "")
-                    
-                    gw_num = gameweek_id.split("_")[-1] if gameweek_id else "0"
-                    
-                    transfers.append({
-                        "external_id": node.external_id,
-                        "manager_id": manager_id,
-                        "gameweek": int(gw_num) if gw_num.isdigit() else 0,
-                        "player_in_id": player_in_id,
-                        "player_out_id": player_out_id,
-                        "transfer_cost": props.get("transferCost", 0),
-                        "player_in_price": props.get("playerInPrice", 0),
-                        "player_out_price": props.get("playerOutPrice", 0),
-                        "points_gained_next_3gw": props.get("pointsGainedNext3GW", 0),
-                        "was_successful": props.get("wasSuccessful", False),
-                        "net_benefit": props.get("netBenefit", 0)
-                    })
-        
-        return pd.DataFrame(transfers)
+        return load_view(_client, TRANSFER_SCHEMA)
     except Exception as e:
         st.error(f"Error fetching transfer data: {e}")
         return pd.DataFrame()
 
 
+PLAYER_SCHEMA = ViewSchema(PLAYER_VIEW, [
+    Column("web_name", "webName", "str", "Unknown"),
+    Column("first_name", "firstName", "str", ""),
+    Column("last_name", "lastName", "str", ""),
+    Column("team_id", "plTeam", "xid"),
+    Column("position", "position", "str", ""),
+    Column("current_price", "currentPrice", "float", 0.0),
+    Column("total_points", "totalPoints", "int"),
+    Column("form", "form", "float", 0.0),
+    Column("selected_by_percent", "selectedByPercent", "float", 0.0),
+    Column("points_per_game", "pointsPerGame", "float", 0.0)
+])
+
+
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_players(_client):
     """Fetch player data with detailed statistics"""
     try:
-        player_view = ViewId(space=SPACE, external_id=PLAYER_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[player_view],
-            limit=1000
-        )
+        players = load_view(_client, PLAYER_SCHEMA)
         
         # Also get teams dict for team names
         teams_dict = fetch_teams(_client)
+        players["name"] = players["web_name"]
+        players["full_name"] = (players["first_name"] + " " + players["last_name"]).str.strip()
+        players["team_name"] = players["team_id"].map(teams_dict).fillna("Unknown")
         
-        players = {}
-        for node in nodes:
-            if hasattr(node, 'properties'):
-                props_dict = node.properties.dump() if hasattr(node.properties, 'dump') else node.properties
-                props = props_dict.get(SPACE, {}).get(f"{PLAYER_VIEW}/{VERSION}", {})
-                if props:
-                    team_id = props.get("plTeam", {}).get("externalId", "")
-                    team_name = teams_dict.get(team_id, "Unknown") if team_id else "Unknown"
-                    
-                    players[node.external_id] = {
-                        "name": props.get("webName", "Unknown"),
-                        "web_name": props.get("webName", "Unknown"),
-                        "full_name": props.get("fullName", ""),
-                        "team_id": team_id,
-                        "team_name": team_name,
-                        "position": props.get("position", ""),
-                        "current_price": props.get("currentPrice", 0),
-                        "total_points": props.get("totalPoints", 0),
-                        "form": props.get("form", 0),
-                        "selected_by_percent": props.get("selectedByPercent", 0),
-                        "points_per_game": props.get("pointsPerGame", 0)
-                    }
-        
-        return players
+        return players.set_index("external_id").to_dict("index")
     except Exception as e:
         st.error(f"Error fetching players: {e}")
         return {}
 
 
+def _load_pick_records(_client):
+    rows = load_raw_table(_client, "fpl_manager_picks", ["entry_id", "gameweek", "picks", "picks_json"])
+    picks = PicksTensor.from_raw_rows(rows)
+    
+    if picks.parse_errors > 0:
+        st.warning(f"⚠️ Failed to parse {picks.parse_errors} pick records")
+    
+    return pd.DataFrame(picks.records()), _raw_data_version(rows)
+
+
 @st.cache_data(ttl=CACHE_TTL)
-def fetch_player_picks_from_raw(_client):
-    """Fetch raw player picks data to see which players were actually used"""
+def fetch_picks_tensor(_client):
+    """Fetch raw manager picks as a managers x gameweeks x 15 picks tensor"""
     try:
-        rows = _client.raw.rows.list(db_name="fantasy_football", table_name="fpl_manager_picks", limit=5000)
-        
-        picks_data = []
-        parse_errors = 0
-        
-        for row in rows:
-            cols = row.columns
-            picks_json_str = cols.get("picks_json", "[]")
-            
-            try:
-                import json
-                import ast
-                
-                # Try to parse as proper JSON first
-                try:
-                    picks_list = json.loads(picks_json_str)
-                except:
-                    # Fall back to ast.literal_eval for Python string format
-                    picks_list = ast.literal_eval(picks_json_str)
-                
-                for pick in picks_list:
-                    picks_data.append({
-                        "manager_entry_id": cols.get("entry_id"),
-                        "gameweek": cols.get("gameweek"),
-                        "player_id": pick.get("element"),
-                        "multiplier": pick.get("multiplier", 1),
-                        "is_captain": pick.get("is_captain", False),
-                        "is_vice_captain": pick.get("is_vice_captain", False),
-                        "position": pick.get("position")
-                    })
-            except Exception as e:
-                parse_errors += 1
-                continue
-        
-        if parse_errors > 0:
-            st.warning(f"⚠️ Failed to parse {parse_errors} pick records")
-        
-        return pd.DataFrame(picks_data) if picks_data else pd.DataFrame()
+        # Kept on disk as one row per pick (PicksTensor.records())
+        records = disk_cached(
+            "fpl_manager_picks",
+            {"picks": "records"},
+            lambda: _load_pick_records(_client),
+            _raw_changed_since(_client, "fpl_manager_picks")
+        )
+        return PicksTensor.from_pick_arrays(records)
     except Exception as e:
         st.error(f"Error fetching player picks: {e}")
+        return PicksTensor([], [])
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def fetch_player_picks_from_raw(_client):
+    """Fetch raw player picks data to see which players were actually used"""
+    records = fetch_picks_tensor(_client).records()
+    if len(records["player_id"]) == 0:
         return pd.DataFrame()
+    return pd.DataFrame(records).rename(columns={"entry_id": "manager_entry_id"})
+
+
+PLAYER_GAMEWEEK_SCHEMA = ViewSchema("fpl_player_gameweek", [
+    Column("player_id", "player_id", "int"),
+    Column("gameweek", "gameweek", "int"),
+    Column("total_points", "total_points", "int"),
+    Column("minutes", "minutes", "int"),
+    Column("goals_scored", "goals_scored", "int"),
+    Column("assists", "assists", "int")
+], external_id=None)
+
+
+def _load_player_gameweek_points(_client):
+    rows = load_raw_table(_client, "fpl_player_gameweek", PLAYER_GAMEWEEK_SCHEMA.properties)
+    return decode_rows(rows, PLAYER_GAMEWEEK_SCHEMA), _raw_data_version(rows)
 
 
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_player_gameweek_points(_client):
     """Fetch player points by gameweek from raw data"""
     try:
-        rows = _client.raw.rows.list(db_name="fantasy_football", table_name="fpl_player_gameweek", limit=10000)
-        
-        player_points = []
-        for row in rows:
-            cols = row.columns
-            player_points.append({
-                "player_id": cols.get("player_id"),
-                "gameweek": cols.get("gameweek"),
-                "total_points": cols.get("total_points", 0),
-                "minutes": cols.get("minutes", 0),
-                "goals_scored": cols.get("goals_scored", 0),
-                "assists": cols.get("assists", 0)
-            })
-        
-        return pd.DataFrame(player_points)
+        return disk_cached(
+            "fpl_player_gameweek",
+            {"schema": PLAYER_GAMEWEEK_SCHEMA.fingerprint},
+            lambda: _load_player_gameweek_points(_client),
+            _raw_changed_since(_client, "fpl_player_gameweek")
+        )
     except Exception as e:
         st.error(f"Error fetching player gameweek points: {e}")
         return pd.DataFrame()
 
 
+@st.cache_data(ttl=CACHE_TTL)
+def fetch_player_points_matrix(_client):
+    """Player points by gameweek as an array indexed [player_id, gameweek]"""
+    points_df = fetch_player_gameweek_points(_client)
+    points_df = points_df.dropna(subset=["player_id", "gameweek"]) if not points_df.empty else points_df
+    if points_df.empty:
+        return np.zeros((1, 1), dtype=np.int32)
+    
+    player_ids = points_df["player_id"].astype(int).to_numpy()
+    gameweeks = points_df["gameweek"].astype(int).to_numpy()
+    points = np.zeros((player_ids.max() + 1, gameweeks.max() + 1), dtype=np.int32)
+    points[player_ids, gameweeks] = points_df["total_points"].fillna(0).astype(int).to_numpy()
+    return points
+
+
+GAMEWEEK_SCHEMA = ViewSchema(GAMEWEEK_VIEW, [
+    Column("gameweek_number", "gameweekNumber", "int"),
+    Column("name", "name", "str", ""),
+    Column("is_current", "isCurrent", "bool"),
+    Column("is_finished", "isFinished", "bool"),
+    Column("average_score", "averageScore", "int"),
+    Column("highest_score", "highestScore", "int")
+])
+
+
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_current_gameweek(_client):
     """Fetch the current or latest finished gameweek"""
     try:
-        gameweek_view = ViewId(space=SPACE, external_id=GAMEWEEK_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[gameweek_view],
-            limit=100
-        )
+        gameweeks = load_view(_client, GAMEWEEK_SCHEMA).sort_values("gameweek_number")
         
-        gameweeks = []
-        for node in nodes:
-            if hasattr(node, 'properties'):
-                props_dict = node.properties.dump() if hasattr(node.properties, 'dump') else node.properties
-                props = props_dict.get(SPACE, {}).get(f"{GAMEWEEK_VIEW}/{VERSION}", {})
-                if props:
-                    gameweeks.append({
-                        "external_id": node.external_id,
-                        "gameweek_number": props.get("gameweekNumber", 0),
-                        "name": props.get("name", ""),
-                        "is_current": props.get("isCurrent", False),
-                        "is_finished": props.get("isFinished", False),
-                        "average_score": props.get("averageScore", 0),
-                        "highest_score": props.get("highestScore", 0)
-                    })
-        
-        if gameweeks:
+        if not gameweeks.empty:
             # First try to find current gameweek
-            current = [gw for gw in gameweeks if gw["is_current"]]
-            if current:
-                return current[0]
+            current = gameweeks[gameweeks["is_current"]]
+            if not current.empty:
+                return current.iloc[0].to_dict()
             # Otherwise get the latest finished gameweek
-            finished = [gw for gw in gameweeks if gw["is_finished"]]
-            if finished:
-                return max(finished, key=lambda x: x["gameweek_number"])
+            finished = gameweeks[gameweeks["is_finished"]]
+            if not finished.empty:
+                return finished.iloc[-1].to_dict()
             # Otherwise just get the latest gameweek
-            return max(gameweeks, key=lambda x: x["gameweek_number"])
+            return gameweeks.iloc[-1].to_dict()
         
         return None
     except Exception as e:
@@ -461,50 +457,32 @@ def fetch_current_gameweek(_client):
         return None
 
 
+MANAGER_TEAM_SCHEMA = ViewSchema(MANAGER_TEAM_VIEW, [
+    Column("manager_id", "manager", "xid"),
+    Column("gameweek", "gameweek", "relation"),
+    Column("captain_id", "captain", "xid"),
+    Column("vice_captain_id", "viceCaptain", "xid"),
+    Column("active_chip", "activeChip", "str", ""),
+    Column("formation", "formation", "str"),
+    Column("total_points", "totalPoints", "int"),
+    Column("team_value", "teamValue", "float", 0.0),
+    Column("bank", "bank", "float", 0.0)
+])
+
+
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_manager_teams(_client, gameweek_number=None):
     """Fetch manager teams for a specific gameweek (captain, chip info)"""
     try:
-        manager_team_view = ViewId(space=SPACE, external_id=MANAGER_TEAM_VIEW, version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[manager_team_view],
-            limit=1000
-        )
-        
-        manager_teams = []
-        for node in nodes:
-            if hasattr(node, 'properties'):
-                props_dict = node.properties.dump() if hasattr(node.properties, 'dump') else node.properties
-                props = props_dict.get(SPACE, {}).get(f"{MANAGER_TEAM_VIEW}/{VERSION}", {})
-                if props:
-                    # Extract gameweek number from external_id or gameweek relation
-                    gameweek_id = props.get("gameweek", {}).get("externalId", "")
-                    gw_num = gameweek_id.split("_")[-1] if gameweek_id else "0"
-                    
-                    # If filtering by gameweek, skip if doesn't match
-                    if gameweek_number is not None:
-                        if not gw_num.isdigit() or int(gw_num) != gameweek_number:
-                            continue
-                    
-                    manager_id = props.get("manager", {}).get("externalId", "")
-                    captain_id = props.get("captain", {}).get("externalId", "")
-                    vice_captain_id = props.get("viceCaptain", {}).get("externalId", "")
-                    
-                    manager_teams.append({
-                        "external_id": node.external_id,
-                        "manager_id": manager_id,
-                        "gameweek": int(gw_num) if gw_num.isdigit() else 0,
-                        "captain_id": captain_id,
-                        "vice_captain_id": vice_captain_id,
-                        "active_chip": props.get("activeChip", ""),
-                        "formation": props.get("formation"),
-                        "total_points": props.get("totalPoints", 0),
-                        "team_value": props.get("teamValue", 0),
-                        "bank": props.get("bank", 0)
-                    })
-        
-        return pd.DataFrame(manager_teams)
+        # Only the requested gameweek's teams are listed
+        gameweek_filter = None
+        if gameweek_number is not None:
+            manager_team_view = ViewId(space=SPACE, external_id=MANAGER_TEAM_VIEW, version=VERSION)
+            gameweek_filter = filters.Equals(
+                manager_team_view.as_property_ref("gameweek"),
+                {"space": SPACE, "externalId": f"gameweek_{gameweek_number}"}
+            )
+        return load_view(_client, MANAGER_TEAM_SCHEMA, filter=gameweek_filter)
     except Exception as e:
         st.error(f"Error fetching manager teams: {e}")
         return pd.DataFrame()
@@ -522,63 +500,92 @@ def create_team_badge(team_name, team_color):
     return f'<span class="team-badge" style="background-color: {team_color}; color: {text_color};">{team_name}</span>'
 
 
+FIXTURE_SCHEMA = ViewSchema(FIXTURE_VIEW, [
+    Column("fixture_id", "fixtureId", "int"),
+    Column("gameweek", "gameweek", "relation"),
+    Column("home_team_id", "homeTeam", "xid"),
+    Column("away_team_id", "awayTeam", "xid"),
+    Column("kickoff_time", "kickoffTime", "str"),
+    Column("home_team_difficulty", "homeTeamDifficulty", "float"),
+    Column("away_team_difficulty", "awayTeamDifficulty", "float"),
+    Column("home_team_score", "homeTeamScore", "float"),
+    Column("away_team_score", "awayTeamScore", "float"),
+    Column("is_finished", "isFinished", "bool"),
+    Column("started", "started", "bool"),
+    Column("home_win_odds", "homeWinOdds", "float"),
+    Column("draw_odds", "drawOdds", "float"),
+    Column("away_win_odds", "awayWinOdds", "float"),
+    Column("home_win_probability", "homeWinProbability", "float"),
+    Column("draw_probability", "drawProbability", "float"),
+    Column("away_win_probability", "awayWinProbability", "float")
+], external_id=None)
+
+
 @st.cache_data(ttl=CACHE_TTL)
 def fetch_fixtures(_client):
     """Fetch all fixtures with odds and difficulty ratings"""
     try:
-        from cognite.client.data_classes.data_modeling.ids import ViewId
-        
-        fixture_view = ViewId(space=SPACE, external_id="Fixture", version=VERSION)
-        nodes = _client.data_modeling.instances.list(
-            instance_type="node",
-            sources=[fixture_view],
-            limit=500
-        )
-        
-        fixtures = []
-        for node in nodes:
-            if hasattr(node, 'properties'):
-                props_dict = node.properties.dump() if hasattr(node.properties, 'dump') else node.properties
-                props = props_dict.get(SPACE, {}).get(f"Fixture/{VERSION}", {})
-                
-                if props:
-                    # Extract team IDs
-                    home_team = props.get('homeTeam', {})
-                    away_team = props.get('awayTeam', {})
-                    gameweek = props.get('gameweek', {})
-                    
-                    home_team_id = home_team.get('externalId', '') if isinstance(home_team, dict) else ''
-                    away_team_id = away_team.get('externalId', '') if isinstance(away_team, dict) else ''
-                    gameweek_id = gameweek.get('externalId', '') if isinstance(gameweek, dict) else ''
-                    
-                    gw_num = gameweek_id.split('_')[-1] if gameweek_id else '0'
-                    
-                    fixtures.append({
-                        "fixture_id": props.get("fixtureId"),
-                        "gameweek": int(gw_num) if gw_num.isdigit() else 0,
-                        "home_team_id": home_team_id,
-                        "away_team_id": away_team_id,
-                        "kickoff_time": props.get("kickoffTime"),
-                        "home_team_difficulty": props.get("homeTeamDifficulty"),
-                        "away_team_difficulty": props.get("awayTeamDifficulty"),
-                        "home_team_score": props.get("homeTeamScore"),
-                        "away_team_score": props.get("awayTeamScore"),
-                        "is_finished": props.get("isFinished", False),
-                        "started": props.get("started", False),
-                        "home_win_odds": props.get("homeWinOdds"),
-                        "draw_odds": props.get("drawOdds"),
-                        "away_win_odds": props.get("awayWinOdds"),
-                        "home_win_probability": props.get("homeWinProbability"),
-                        "draw_probability": props.get("drawProbability"),
-                        "away_win_probability": props.get("awayWinProbability"),
-                    })
-        
-        return pd.DataFrame(fixtures)
+        return load_view(_client, FIXTURE_SCHEMA)
     except Exception as e:
         st.error(f"Error fetching fixtures: {e}")
         return pd.DataFrame()
 
 
+def _fetch_current_manager_teams(_client):
+    """Manager teams of the current gameweek, as the leaderboard asks for them"""
+    current_gw = fetch_current_gameweek(_client)
+    if not current_gw:
+        return pd.DataFrame()
+    return fetch_manager_teams(_client, current_gw["gameweek_number"])
+
+
+def prefetch(_client, max_workers=PREFETCH_WORKERS):
+    """
+    Issue every independent dashboard load at once and wait for all of them
+    
+    Each load goes through its cached fetch function, called with the same
+    arguments as the tabs use, so the tabs then read the results from the
+    st.cache_data cache. Worker threads share the script run context, which
+    the cache and st.error need. A cold start takes about as long as the
+    slowest load instead of the sum of all of them. Returns the results by
+    fetch function name; a failed load is left to its tab to report.
+    """
+    # Derived loads pull their sources through the cache: picks from raw loads
+    # the picks tensor, the points matrix the player gameweek points, and the
+    # current manager teams the current gameweek
+    loads = {
+        "fetch_managers": fetch_managers,
+        "fetch_teams": fetch_teams,
+        "fetch_players": fetch_players,
+        "fetch_league_performance": fetch_league_performance,
+        "fetch_team_betting_data": fetch_team_betting_data,
+        "fetch_transfer_data": fetch_transfer_data,
+        "fetch_fixtures": fetch_fixtures,
+        "fetch_manager_teams": fetch_manager_teams,
+        "fetch_current_manager_teams": _fetch_current_manager_teams,
+        "fetch_player_picks_from_raw": fetch_player_picks_from_raw,
+        "fetch_player_points_matrix": fetch_player_points_matrix
+    }
+    
+    started = time.perf_counter()
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(
+        max_workers=max_workers, initializer=add_script_run_ctx, initargs=(None, ctx)
+    ) as pool:
+        futures = {name: pool.submit(load, _client) for name, load in loads.items()}
+    
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception:
+            results[name] = None
+    LOAD_STATS["prefetch"] = {
+        "loads": len(loads), "workers": max_workers, "seconds": round(time.perf_counter() - started, 3)
+    }
+    return results
+
+
 def apply_plotly_theme(fig):
     """Apply custom theme to plotly figure without overwriting existing settings"""
     fig.update_layout(
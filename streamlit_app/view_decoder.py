@@ -0,0 +1,133 @@
+"""
+View Decoder
+Columnar decoding of data model nodes and RAW rows into typed DataFrames,
+declared per view with a small schema
+"""
+from typing import Any, Iterable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Column kinds and the dtype each is decoded to
+KIND_DTYPES = {
+    "int": np.int64,        # missing values get the column default (0 if none)
+    "float": np.float64,    # missing values are NaN
+    "bool": np.bool_,       # missing values are False
+    "str": object,          # missing values are the column default (None if none)
+    "relation": np.int64,   # direct relation as the integer ID ending its external ID (manager_123 -> 123)
+    "xid": object           # direct relation as its external ID
+}
+
+
+class Column(NamedTuple):
+    """One DataFrame column decoded from a view property (or RAW column)"""
+    name: str
+    prop: str
+    kind: str = "str"
+    default: Any = None
+
+
+class ViewSchema:
+    """
+    Columns to decode from a view
+
+    Nodes without properties in the view, or whose external ID does not start
+    with `prefix`, are skipped. The node external ID becomes the `external_id`
+    column unless it is set to None.
+    """
+
+    def __init__(
+        self,
+        view: str,
+        columns: Iterable[Column],
+        prefix: str | None = None,
+        external_id: str | None = "external_id"
+    ):
+        self.view = view
+        self.columns = list(columns)
+        self.prefix = prefix
+        self.external_id = external_id
+
+    @property
+    def properties(self) -> list[str]:
+        """View properties to request"""
+        return list(dict.fromkeys(column.prop for column in self.columns))
+
+    @property
+    def fingerprint(self) -> list[Any]:
+        """Everything that shapes the decoded DataFrame, e.g. to key cached results"""
+        return [self.view, self.prefix, self.external_id, [list(column) for column in self.columns]]
+
+
+def _relation_xid(value: Any) -> str:
+    if value is None:
+        return ""
+    if type(value) is dict:
+        return value.get("externalId") or ""
+    return getattr(value, "external_id", None) or ""
+
+
+def _relation_id(external_id: str, default: int) -> int:
+    suffix = external_id.rpartition("_")[2]
+    return int(suffix) if suffix.isdigit() else default
+
+
+def _column_array(values: list[Any], column: Column) -> np.ndarray:
+    """Convert one column's raw values (None where missing) to its typed array"""
+    kind, default = column.kind, column.default
+    if kind == "float":
+        array = np.array(values, dtype=np.float64)
+        if default is not None:
+            array[np.isnan(array)] = default
+        return array
+    if kind == "bool":
+        return np.array(values, dtype=np.bool_)
+    if kind == "str":
+        if default is not None:
+            values = [default if value is None else value for value in values]
+        return np.array(values, dtype=object)
+
+    fill = default or 0
+    if kind == "int":
+        return np.fromiter((fill if value is None else value for value in values), dtype=np.int64, count=len(values))
+
+    xids = [_relation_xid(value) for value in values]
+    if kind == "relation":
+        # Integer suffix of the external ID, e.g. gameweek_12 -> 12
+        return np.fromiter((_relation_id(xid, fill) for xid in xids), dtype=np.int64, count=len(xids))
+    return np.array(xids, dtype=object)
+
+
+def decode(items: Iterable[tuple[str, dict[str, Any] | None]], schema: ViewSchema) -> pd.DataFrame:
+    """
+    Decode (external ID, properties) pairs into a DataFrame
+
+    The items are walked once to keep the matching ones; each column is then
+    gathered with one pass over the kept properties and converted to its
+    dtype in bulk. Missing or null values get the column default.
+    """
+    prefix = schema.prefix
+    external_ids = []
+    kept = []
+    for external_id, props in items:
+        if props and not (prefix and not external_id.startswith(prefix)):
+            external_ids.append(external_id)
+            kept.append(props)
+
+    data = {}
+    if schema.external_id:
+        data[schema.external_id] = np.array(external_ids, dtype=object)
+    for column in schema.columns:
+        prop = column.prop
+        data[column.name] = _column_array([props.get(prop) for props in kept], column)
+    return pd.DataFrame(data)
+
+
+def decode_nodes(nodes: Iterable[Any], schema: ViewSchema, view_id: Any) -> pd.DataFrame:
+    """Decode data model nodes, reading each node's properties in the view without copying them"""
+    return decode(((node.external_id, node.properties.get(view_id)) for node in nodes), schema)
+
+
+def decode_rows(rows: Iterable[Any], schema: ViewSchema) -> pd.DataFrame:
+    """Decode RAW rows, with row keys as external IDs and columns as properties"""
+    return decode(((row.key, row.columns) for row in rows), schema)